@@ -300,6 +300,20 @@ man_pages = [
         [author],
         1,
     ),
+    (
+        "man1/flux-account-batch",
+        "flux-account-batch",
+        "run a file of flux account commands over one connection",
+        [author],
+        1,
+    ),
+    (
+        "man1/flux-account-profile",
+        "flux-account-profile",
+        "turn profiling of flux-accounting service endpoints on or off",
+        [author],
+        1,
+    ),
     (
         "man1/flux-account-fairshare-emulate",
         "flux-account-fairshare-emulate",
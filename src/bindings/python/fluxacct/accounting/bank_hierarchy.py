@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+
+
+class BankHierarchy:
+    """
+    An in-memory copy of the parent/child relationships between the banks in
+    bank_table.
+
+    The hierarchy is read with a single query and then answers parent, children,
+    ancestor, and subtree lookups without going back to the database. It reloads
+    itself on refresh() when the bank hierarchy might have changed: PRAGMA
+    data_version catches commits made by other connections, and the Connection's
+    total_changes counter catches writes made through the same connection.
+    """
+
+    def __init__(self, conn):
+        """
+        Initialize a BankHierarchy object and load it from bank_table.
+
+        Args:
+            conn: The SQLite Connection object.
+        """
+        self.conn = conn
+        self._root = None
+        self._parents = {}
+        self._children = {}
+        self._version = None
+        self.load()
+
+    def _current_version(self):
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        return (data_version, self.conn.total_changes)
+
+    def load(self):
+        """Read every bank and its parent from bank_table."""
+        root = None
+        parents = {}
+        children = {}
+        for bank, parent_bank in self.conn.execute(
+            "SELECT bank, parent_bank FROM bank_table ORDER BY bank_id"
+        ):
+            parent_bank = parent_bank or ""
+            if parent_bank == "" and root is None:
+                root = bank
+            parents[bank] = parent_bank
+            children.setdefault(parent_bank, []).append(bank)
+            children.setdefault(bank, [])
+
+        self._root = root
+        self._parents = parents
+        self._children = children
+        self._version = self._current_version()
+
+    def invalidate(self):
+        """Force the hierarchy to be reloaded on the next call to refresh()."""
+        self._version = None
+
+    def refresh(self):
+        """
+        Reload the hierarchy if bank_table might have changed since it was last
+        loaded.
+
+        Returns:
+            the BankHierarchy object itself.
+        """
+        if self._version is None or self._version != self._current_version():
+            self.load()
+        return self
+
+    @property
+    def root(self):
+        """The name of the root bank, or None if bank_table has no root bank."""
+        return self._root
+
+    def __contains__(self, bank):
+        return bank in self._parents
+
+    def __len__(self):
+        return len(self._parents)
+
+    def parent(self, bank):
+        """
+        Return the name of a bank's parent bank. The root bank's parent is "".
+
+        Raises:
+            ValueError: the bank does not exist in bank_table.
+        """
+        try:
+            return self._parents[bank]
+        except KeyError:
+            raise ValueError(f"bank {bank} not found in bank_table")
+
+    def children(self, bank):
+        """Return the names of the direct sub-banks of a bank in insertion order."""
+        return list(self._children.get(bank, []))
+
+    def is_leaf(self, bank):
+        """Return True if a bank has no sub-banks."""
+        return not self._children.get(bank)
+
+    def ancestors(self, bank):
+        """
+        Return the names of a bank's ancestors, starting with its parent and ending
+        with the root bank.
+        """
+        path = []
+        seen = {bank}
+        parent = self._parents.get(bank, "")
+        while parent and parent not in seen:
+            path.append(parent)
+            seen.add(parent)
+            parent = self._parents.get(parent, "")
+        return path
+
+    def subtree(self, bank):
+        """
+        Iterate over a bank and every bank below it in depth-first order.
+
+        Yields:
+            (bank, depth) tuples, where the passed-in bank has a depth of 0.
+        """
+        stack = [(bank, 0)]
+        seen = set()
+        while stack:
+            name, depth = stack.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            yield name, depth
+            for child in reversed(self._children.get(name, [])):
+                stack.append((child, depth + 1))
+
+
+def get_bank_hierarchy(conn, hierarchy=None):
+    """
+    Return an up-to-date BankHierarchy for a connection. If a cached hierarchy is
+    passed in, refresh and reuse it; otherwise, load a new one.
+
+    Args:
+        conn: The SQLite Connection object.
+        hierarchy: An optional, previously loaded BankHierarchy object.
+    """
+    if hierarchy is None:
+        return BankHierarchy(conn)
+    return hierarchy.refresh()
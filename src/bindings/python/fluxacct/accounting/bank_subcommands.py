@@ -20,6 +20,7 @@ from fluxacct.accounting import sql_util as sql
 from fluxacct.accounting import job_usage_calculation as jobs
 from fluxacct.accounting import util
 from fluxacct.accounting.util import with_cursor
+from fluxacct.accounting.bank_hierarchy import get_bank_hierarchy
 
 
 ###############################################################
@@ -27,11 +28,10 @@ from fluxacct.accounting.util import with_cursor
 #                      Helper Functions                       #
 #                                                             #
 ###############################################################
-def validate_parent_bank(cur, parent_bank):
+def validate_parent_bank(cur, parent_bank, hierarchy=None):
     try:
-        cur.execute("SELECT shares FROM bank_table WHERE bank=?", (parent_bank,))
-        result = cur.fetchone()
-        if result is None:
+        hierarchy = get_bank_hierarchy(cur.connection, hierarchy)
+        if parent_bank not in hierarchy:
             raise ValueError(parent_bank)
 
         return 0
@@ -90,20 +90,38 @@ def reactivate_bank(conn, cur, bank, parent_bank):
 ###############################################################
 
 
-def _build_sharetree(cur):
-    """Build hierarchical sharetree with normalized shares and usage."""
+def _build_sharetree(cur, hierarchy=None):
+    """
+    Build hierarchical sharetree with normalized shares and usage.
+
+    The tree is built from one scan of bank_table and one scan of association_table;
+    parent/child relationships are resolved with a BankHierarchy so that the cost of
+    building the tree is linear in the number of banks and associations.
+    """
     sharetree = {}
 
-    # get root bank
-    cur.execute("SELECT bank, shares, job_usage FROM bank_table WHERE parent_bank=''")
-    root = cur.fetchone()
-    if not root:
+    hierarchy = get_bank_hierarchy(cur.connection, hierarchy)
+    if hierarchy.root is None:
         raise ValueError("No root bank found in bank_table")
 
-    root_bank_name, root_shares, root_usage = root
-    fqname = f"/{root_bank_name}/"
-    sharetree[fqname] = {
-        "name": fqname,
+    # look up the shares and usage of every bank and group every association
+    # under the bank it belongs to
+    bank_values = {}
+    cur.execute("SELECT bank, parent_bank, shares, job_usage FROM bank_table")
+    for bank_name, parent_name, shares, usage in cur.fetchall():
+        bank_values.setdefault((parent_name, bank_name), (shares, usage))
+
+    bank_users = {}
+    cur.execute("""SELECT username, bank, shares, job_usage, fairshare
+           FROM association_table ORDER BY username""")
+    for username, bank_name, shares, usage, fshare in cur.fetchall():
+        bank_users.setdefault(bank_name, []).append((username, shares, usage, fshare))
+
+    root_bank_name = hierarchy.root
+    root_shares, root_usage = bank_values[("", root_bank_name)]
+    root_fqname = f"/{root_bank_name}/"
+    sharetree[root_fqname] = {
+        "name": root_fqname,
         "shortname": root_bank_name,
         "parent": "",
         "children": [],
@@ -117,25 +135,31 @@ def _build_sharetree(cur):
         "isuser": False,
     }
 
-    # recursively build tree
+    def normalize(shares, sibling_shares, parent):
+        if sibling_shares > 0:
+            return (shares / sibling_shares) * parent["nshares"]
+        return 0.0
+
+    # recursively build tree; the sum of shares among sibling banks and among
+    # sibling users is computed once per parent and reused for every child
     def build_tree(parent_name, parent_fqname, depth):
-        # get sub-banks
-        cur.execute(
-            "SELECT bank, shares, job_usage FROM bank_table "
-            "WHERE parent_bank=? ORDER BY bank",
-            (parent_name,),
-        )
-        for row in cur.fetchall():
-            bank_name, shares, usage = row
+        parent = sharetree[parent_fqname]
+
+        child_banks = [
+            (bank_name, *bank_values[(parent_name, bank_name)])
+            for bank_name in sorted(set(hierarchy.children(parent_name)))
+        ]
+        bank_shares = sum(shares for _, shares, _ in child_banks)
+        for bank_name, shares, usage in child_banks:
             child_fqname = f"{parent_fqname}{bank_name}/"
-            sharetree[parent_fqname]["children"].append(bank_name)
+            parent["children"].append(bank_name)
             sharetree[child_fqname] = {
                 "name": child_fqname,
                 "shortname": bank_name,
                 "parent": parent_fqname,
                 "children": [],
                 "shares": shares,
-                "nshares": 0.0,
+                "nshares": normalize(shares, bank_shares, parent),
                 "usage": usage,
                 "nusage": 0.0,
                 "priority": float("nan"),
@@ -145,23 +169,18 @@ def _build_sharetree(cur):
             }
             build_tree(bank_name, child_fqname, depth + 1)
 
-        # get users under this bank
-        cur.execute(
-            """SELECT username, shares, job_usage, fairshare
-               FROM association_table WHERE bank=? ORDER BY username""",
-            (parent_name,),
-        )
-        for row in cur.fetchall():
-            username, shares, usage, fshare = row
+        child_users = bank_users.get(parent_name, [])
+        user_shares = sum(shares for _, shares, _, _ in child_users)
+        for username, shares, usage, fshare in child_users:
             user_fqname = f"{parent_fqname}{username}/"
-            sharetree[parent_fqname]["children"].append(username)
+            parent["children"].append(username)
             sharetree[user_fqname] = {
                 "name": user_fqname,
                 "shortname": username,
                 "parent": parent_fqname,
                 "children": [],
                 "shares": shares,
-                "nshares": 0.0,
+                "nshares": normalize(shares, user_shares, parent),
                 "usage": usage,
                 "nusage": 0.0,
                 "priority": float("nan"),
@@ -170,28 +189,10 @@ def _build_sharetree(cur):
                 "isuser": True,
             }
 
-    build_tree(root_bank_name, fqname, 1)
-
-    # calculate normalized shares and usage
-    root_node = sharetree[f"/{root_bank_name}/"]
-
-    # calculate normalized shares
-    nodes_by_depth = sorted(sharetree.values(), key=lambda n: n["depth"])
-    for node in nodes_by_depth:
-        if node["shortname"] == root_bank_name or not node["parent"]:
-            continue
-
-        parent = sharetree[node["parent"]]
-        sibling_shares = sum(
-            sharetree[f"{node['parent']}{child}/"]["shares"]
-            for child in parent["children"]
-            if sharetree[f"{node['parent']}{child}/"]["isuser"] == node["isuser"]
-        )
-        if sibling_shares > 0:
-            fraction = node["shares"] / sibling_shares
-            node["nshares"] = fraction * parent["nshares"]
+    build_tree(root_bank_name, root_fqname, 1)
 
     # calculate normalized usage
+    root_node = sharetree[root_fqname]
     if root_node["usage"] > 0:
         for node in sharetree.values():
             node["nusage"] = node["usage"] / root_node["usage"]
@@ -201,19 +202,26 @@ def _build_sharetree(cur):
 
 @with_cursor
 def add_bank(
-    conn, cur, bank, shares, parent_bank="", priority=0.0, ignore_older_than=0
+    conn,
+    cur,
+    bank,
+    shares,
+    parent_bank="",
+    priority=0.0,
+    ignore_older_than=0,
+    hierarchy=None,
 ):
+    hierarchy = get_bank_hierarchy(conn, hierarchy)
     if parent_bank == "":
         # a root bank is trying to be added; check that one does not already exist
-        cur.execute("SELECT * FROM bank_table WHERE parent_bank=''")
-        if len(cur.fetchall()) > 0:
+        if hierarchy.root is not None:
             raise ValueError(f"bank_table already has a root bank")
 
     # if the parent bank is not "", that means the bank trying
     # to be added wants to be placed under an existing parent bank
     try:
         if parent_bank != "":
-            validate_parent_bank(cur, parent_bank)
+            validate_parent_bank(cur, parent_bank, hierarchy)
     except ValueError as bad_parent_bank:
         raise ValueError(f"parent bank {bad_parent_bank} not found in bank table")
 
@@ -276,6 +284,7 @@ def view_bank(
     format_string="",
     concise=False,
     active=False,
+    hierarchy=None,
 ):
     if tree and cols is not None:
         # tree format cannot be combined with custom formatting, so raise an Exception
@@ -293,7 +302,7 @@ def view_bank(
     cur.execute(select_stmt, (bank,))
 
     # initialize BankFormatter object
-    formatter = fmt.BankFormatter(cur, bank)
+    formatter = fmt.BankFormatter(cur, bank, hierarchy)
 
     if format_string != "":
         return formatter.as_format_string(format_string)
@@ -307,7 +316,7 @@ def view_bank(
 
 
 @with_cursor
-def delete_bank(conn, cur, bank, force=False):
+def delete_bank(conn, cur, bank, force=False, hierarchy=None):
     """
     Deactivate a bank row in the bank_table by setting its 'active' status to 0.
     If force=True, actually remove the bank row from the bank_table. If the bank contains
@@ -319,6 +328,7 @@ def delete_bank(conn, cur, bank, force=False):
         bank: the name of the bank
         force: an option to actually remove the row from the bank_table instead of
             just setting the 'active' column to 0.
+        hierarchy: an optional, previously loaded BankHierarchy object.
     """
     if force:
         sql_stmt = "DELETE FROM bank_table WHERE bank=?"
@@ -326,42 +336,28 @@ def delete_bank(conn, cur, bank, force=False):
         sql_stmt = "UPDATE bank_table SET active=0 WHERE bank=?"
 
     try:
-        cur.execute(sql_stmt, (bank,))
-
-        # helper function to traverse the bank table and disable all of its sub banks
-        def get_sub_banks(bank):
-            select_stmt = "SELECT bank FROM bank_table WHERE parent_bank=?"
-            cur.execute(select_stmt, (bank,))
-            result = cur.fetchall()
-
-            # we've reached a bank with no sub banks
-            if len(result) == 0:
-                select_assoc_stmt = """
-                    SELECT username, bank
-                    FROM association_table WHERE bank=?
-                    """
-                for assoc_row in cur.execute(select_assoc_stmt, (bank,)):
+        # walk the hierarchy as it was before any of its banks are modified
+        hierarchy = get_bank_hierarchy(conn, hierarchy)
+
+        # disable all of the bank's sub banks and, once a bank with no sub banks is
+        # reached, all of the associations under it
+        select_assoc_stmt = "SELECT username, bank FROM association_table WHERE bank=?"
+        for sub_bank, _ in hierarchy.subtree(bank):
+            cur.execute(sql_stmt, (sub_bank,))
+            if hierarchy.is_leaf(sub_bank):
+                for assoc_row in cur.execute(select_assoc_stmt, (sub_bank,)).fetchall():
                     u.delete_user(
                         conn,
                         username=assoc_row["username"],
                         bank=assoc_row["bank"],
                         force=force,
                     )
-            # else, disable all of its sub banks and continue traversing
-            else:
-                for row in result:
-                    cur.execute(sql_stmt, (row["bank"],))
-                    get_sub_banks(row["bank"])
 
-        get_sub_banks(bank)
         if force:
             # we also need to update the job usage for the rest of the hierarchy as a
             # result of the bank (which may or may not have usage) no longer being in
-            # the database hierarchy; start from the root bank and work down
-            s_root_bank = "SELECT bank FROM bank_table WHERE parent_bank=''"
-            cur.execute(s_root_bank)
-            root_bank = cur.fetchone()[0]
-            jobs.calc_parent_bank_usage(conn, cur, root_bank)
+            # the database hierarchy
+            jobs.rollup_bank_usage(cur)
     # if an exception occurs while recursively deleting
     # the parent banks, then throw the exception and roll
     # back the changes made to the DB
@@ -383,6 +379,7 @@ def edit_bank(
     parent_bank=None,
     priority=None,
     ignore_older_than=None,
+    hierarchy=None,
 ):
     params = locals()
     editable_fields = [
@@ -395,7 +392,7 @@ def edit_bank(
         if params[field] is not None:
             if field == "parent_bank":
                 try:
-                    validate_parent_bank(cur, params[field])
+                    validate_parent_bank(cur, params[field], hierarchy)
                 except ValueError as bad_parent_bank:
                     raise ValueError(
                         f"parent bank {bad_parent_bank} not found in bank table"
@@ -429,6 +426,7 @@ def list_banks(
     cols=None,
     json_fmt=False,
     format_string="",
+    page_size=None,
 ):
     """
     List all banks in bank_table.
@@ -442,6 +440,8 @@ def list_banks(
             returned data is in JSON.
         format_string: a format string defining how each row should be formatted. Column
             names should be used as placeholders.
+        page_size: if set, return a generator of pages of at most page_size banks
+            each instead of a single string.
     """
     # use all column names if none are passed in
     cols = cols or fluxacct.accounting.BANK_TABLE
@@ -451,10 +451,15 @@ def list_banks(
     select_stmt = f"SELECT {', '.join(cols)} FROM bank_table"
     if not inactive:
         select_stmt += " WHERE active=1"
+    if page_size:
+        # the pages are read after this function returns and closes cur
+        cur = conn.cursor()
     cur.execute(select_stmt)
 
     # initialize AccountingFormatter object
-    formatter = fmt.AccountingFormatter(cur)
+    formatter = fmt.AccountingFormatter(cur, page_size=page_size)
+    if page_size:
+        return formatter.pages(json_fmt, format_string)
     if format_string != "":
         return formatter.as_format_string(format_string)
     if json_fmt:
@@ -474,6 +479,7 @@ def bank_info(
     parsable=False,
     noheader=False,
     exclude=None,
+    hierarchy=None,
 ):
     """
     Display fairshare and priority information for banks and users.
@@ -487,6 +493,7 @@ def bank_info(
         parsable: output "|" delimited columns for easy parsing
         noheader: do not display headers
         exclude: do not display this bank in output
+        hierarchy: an optional, previously loaded BankHierarchy object
     """
     # determine which bank/user we're querying
     bank = tree or tree_no_users or to_root
@@ -506,7 +513,7 @@ def bank_info(
             default_bank = result["default_bank"]
 
     # build the tree structure from the database
-    sharetree = _build_sharetree(cur)
+    sharetree = _build_sharetree(cur, hierarchy)
 
     # find the target node(s)
     target_name = user if user else bank
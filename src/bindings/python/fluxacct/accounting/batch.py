@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+
+# a batch stops at its first failed operation and none of its changes are kept
+ATOMIC = "atomic"
+# every operation in a batch is attempted and the changes of the ones that
+# succeed are kept
+CONTINUE = "continue"
+MODES = (ATOMIC, CONTINUE)
+
+
+class BatchConnection:
+    """
+    A wrapper around a SQLite Connection which ignores calls to commit() and
+    rollback(), so that the changes made by several subcommands end up in the one
+    transaction that apply_batch() commits or rolls back. Every other attribute
+    is passed through to the Connection.
+    """
+
+    def __init__(self, conn):
+        object.__setattr__(self, "_conn", conn)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+    def commit(self):
+        """Leave the changes made so far to be committed with the batch."""
+
+    def rollback(self):
+        """
+        Leave the changes made so far to be rolled back with the operation that
+        made them; every subcommand which rolls back raises an exception after.
+        """
+
+
+def apply_batch(conn, operations, apply, mode=ATOMIC, hierarchy=None):
+    """
+    Apply a list of operations to the flux-accounting DB in a single transaction.
+
+    In ATOMIC mode, the batch stops at the first operation that fails and the
+    changes made by every operation are rolled back. In CONTINUE mode, each
+    operation runs inside of its own savepoint; the changes of an operation that
+    fails are rolled back and the rest of the batch is still applied.
+
+    Args:
+        conn: The SQLite Connection object.
+        operations: A list of operations, each of which is passed to apply.
+        apply: A function which is called with a BatchConnection and an operation,
+            and either returns the result of the operation or raises an exception.
+        mode: Either ATOMIC or CONTINUE.
+        hierarchy: An optional BankHierarchy object, which is reloaded if any
+            changes are rolled back.
+
+    Returns:
+        A tuple of whether the transaction was committed and a list with the result
+        of each operation, which is a dictionary with a "status" of "ok", "error",
+        or "skipped" and either a "result" or an "error" message.
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {', '.join(MODES)}")
+
+    # the transaction is started here rather than by the first statement so that
+    # the write lock is held for the whole batch
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+
+    batch_conn = BatchConnection(conn)
+    results = []
+    failed = False
+    try:
+        for operation in operations:
+            if failed and mode == ATOMIC:
+                results.append({"status": "skipped"})
+                continue
+            if mode == CONTINUE:
+                conn.execute("SAVEPOINT operation")
+            try:
+                result = apply(batch_conn, operation)
+            except Exception as exc:
+                if mode == CONTINUE:
+                    conn.execute("ROLLBACK TO operation")
+                    conn.execute("RELEASE operation")
+                failed = True
+                results.append({"status": "error", "error": str(exc)})
+                continue
+            if mode == CONTINUE:
+                conn.execute("RELEASE operation")
+            results.append({"status": "ok", "result": result})
+    except BaseException:
+        conn.rollback()
+        failed = True
+        raise
+    finally:
+        if failed and hierarchy is not None:
+            # a bank added or removed by the rolled back changes may have been
+            # loaded into the hierarchy
+            hierarchy.invalidate()
+
+    if failed and mode == ATOMIC:
+        conn.rollback()
+        return False, results
+
+    conn.commit()
+    return True, results
@@ -16,6 +16,7 @@ import pathlib
 import time
 
 import fluxacct.accounting
+from fluxacct.accounting import memberships
 from flux.util import parse_fsd
 
 LOGGER = logging.getLogger(__name__)
@@ -41,6 +42,39 @@ def set_half_life_period_end(conn, priority_decay_half_life=None):
     conn.commit()
 
 
+def create_assoc_id_triggers(conn):
+    """
+    Create the unique index on the assoc_id column of association_table and the
+    triggers which assign every new association the next assoc_id and remove the
+    rows of an association from the usage tables when it is removed.
+
+    Args:
+        conn: The SQLite Connection object.
+    """
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS association_table_assoc_id_idx "
+        "ON association_table (assoc_id)"
+    )
+    conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS association_table_assoc_id
+            AFTER INSERT ON association_table
+            WHEN NEW.assoc_id IS NULL
+            BEGIN
+                UPDATE association_table
+                SET assoc_id=(SELECT IFNULL(MAX(assoc_id), 0) + 1 FROM association_table)
+                WHERE rowid=NEW.rowid;
+            END;""")
+    # the assoc_id of a removed association can be handed out again, so its usage
+    # must not be left behind for the next association to pick up
+    conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS association_table_delete_usage
+            AFTER DELETE ON association_table
+            BEGIN
+                DELETE FROM job_usage_factor_table WHERE assoc_id=OLD.assoc_id;
+                DELETE FROM job_usage_per_association_table WHERE assoc_id=OLD.assoc_id;
+            END;""")
+
+
 # pylint: disable=too-many-statements
 def create_db(
     filepath,
@@ -87,10 +121,18 @@ def create_db(
                 projects         tinytext    DEFAULT '*'            NOT NULL    ON CONFLICT REPLACE DEFAULT '*',
                 default_project  tinytext    DEFAULT '*'            NOT NULL    ON CONFLICT REPLACE DEFAULT '*',
                 max_sched_jobs   int(11)     DEFAULT 2147483647     NOT NULL    ON CONFLICT REPLACE DEFAULT 2147483647,
+                assoc_id         int(11),
                 PRIMARY KEY   (username, bank)
         );""")
     LOGGER.info("Created association_table successfully")
 
+    # Association Queue and Project Tables
+    # store the queues and projects of each association one row per member, kept
+    # in sync with association_table by triggers
+    LOGGER.info("Creating association_queue_table and association_project_table...")
+    memberships.create_tables(conn)
+    LOGGER.info("Created association_queue_table and association_project_table")
+
     # Bank Table
     # bank_id gets auto-incremented with every new entry
     LOGGER.info("Creating bank_table in DB...")
@@ -108,15 +150,15 @@ def create_db(
     LOGGER.info("Created bank_table successfully")
 
     # Job Usage Factor Table
-    # stores past job usage factors for users
+    # stores past job usage factors for users, keyed by the assoc_id of the
+    # association in association_table
     LOGGER.info("Creating job_usage_factor table in DB...")
     conn.execute("""
             CREATE TABLE IF NOT EXISTS job_usage_factor_table (
-                username            tinytext                    NOT NULL,
+                assoc_id            integer                     NOT NULL,
                 userid              int(11)                     NOT NULL,
-                bank                tinytext                    NOT NULL,
                 last_job_timestamp  real        DEFAULT 0.0,
-                PRIMARY KEY (username, bank)
+                PRIMARY KEY (assoc_id)
         );""")
     LOGGER.info("Created job_usage_factor_table successfully")
 
@@ -195,6 +237,18 @@ def create_db(
             );""")
     LOGGER.info("Created jobs table successfully")
 
+    # Job Data Table
+    # stores the compressed R and jobspec documents of jobs when config_table sets
+    # job_storage to "compressed"; each document is stored once, under a hash of
+    # its contents
+    LOGGER.info("Creating job_data_table in DB...")
+    conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_data_table (
+                hash    text    PRIMARY KEY NOT NULL,
+                data    blob                NOT NULL
+            );""")
+    LOGGER.info("Created job_data_table successfully")
+
     # Priority Factor Table
     # stores the weights for each priority factor to be used in the plugin
     LOGGER.info("Creating priority_factor_weight_table in DB...")
@@ -300,17 +354,18 @@ def create_db(
     # Job Usage Per-Association Table
     # stores periodic job usage values per-association based on how many periods there
     # are (configured via PriorityDecayHalfLife and PriorityUsageResetPeriod parameters
-    # in config_table)
+    # in config_table), keyed by the assoc_id of the association in association_table
     LOGGER.info("Creating job_usage_per_association table in DB...")
     conn.execute("""
             CREATE TABLE IF NOT EXISTS job_usage_per_association_table (
-                username tinytext              NOT NULL,
-                userid   int(11)               NOT NULL,
-                bank     tinytext              NOT NULL,
+                assoc_id int(11)               NOT NULL,
                 period   int(11)               NOT NULL,
                 value    real     DEFAULT 0.0,
-                PRIMARY KEY (username, bank, period)
+                PRIMARY KEY (assoc_id, period)
             );""")
     LOGGER.info("Created job_usage_per_association table successfully")
 
+    create_assoc_id_triggers(conn)
+    conn.commit()
+
     conn.close()
@@ -9,16 +9,24 @@
 #
 # SPDX-License-Identifier: LGPL-3.0
 ###############################################################
+import concurrent.futures
 import csv
+import gzip
+import os
 import sqlite3
 import json
 import math
+import operator
 import time
 
 import fluxacct
 from fluxacct.accounting.util import with_cursor
 from fluxacct.accounting import formatter as fmt
+from fluxacct.accounting import job_data
+from fluxacct.accounting import memberships
+from fluxacct.accounting import util
 from fluxacct.accounting import sql_util as sql
+from fluxacct.accounting import job_usage_calculation as jobs
 from flux.util import parse_fsd
 
 
@@ -29,6 +37,9 @@ def reconfigure_usage_bins(conn, cursor):
     should be called *after* the admin has updated priority_decay_half_life,
     priority_usage_reset_period, and/or decay_factor in config_table.
 
+    The usage periods of every association are rebuilt from the jobs table under the
+    new configuration, so past usage is kept instead of being reset to 0.
+
     Args:
         conn: The SQLite Connection object.
         cursor: The SQLite Cursor object.
@@ -55,31 +66,61 @@ def reconfigure_usage_bins(conn, cursor):
     new_num_periods = math.ceil(new_reset_period / new_half_life)
 
     # fetch all associations
-    cursor.execute(
-        "SELECT DISTINCT username, userid, bank FROM job_usage_per_association_table"
-    )
+    cursor.execute("""
+        SELECT a.assoc_id, a.userid, a.bank FROM association_table a
+        WHERE a.assoc_id IN (SELECT assoc_id FROM job_usage_per_association_table)
+        """)
     associations = cursor.fetchall()
 
+    # the archived jobs are read too, and can only be attached outside of a
+    # transaction; edit_config() puts back the old configuration it commits here
+    # if the usage bins cannot be rebuilt
+    if conn.in_transaction:
+        conn.commit()
+    now = time.time()
     try:
-        # delete all existing period rows for every association
-        cursor.execute("DELETE FROM job_usage_per_association_table")
+        # place the usage of every job inside of the new usage reset period into the
+        # period it finished in under the new configuration
+        usage, last_job_timestamps = jobs.rebin_job_usage(
+            cursor, new_half_life, new_num_periods, now
+        )
+        empty = [0.0] * new_num_periods
 
-        # re-insert the correct number of period rows for every association
-        # initialized to 0.0 under the new configuration
-        for username, userid, bank in associations:
-            for period in range(new_num_periods):
-                cursor.execute(
-                    """
-                    INSERT INTO job_usage_per_association_table
-                    (username, userid, bank, period, value)
-                    VALUES (?, ?, ?, ?, 0.0)
-                    """,
-                    (username, userid, bank, period),
-                )
+        # delete all existing period rows for every association and re-insert the
+        # correct number of period rows under the new configuration
+        cursor.execute("DELETE FROM job_usage_per_association_table")
+        cursor.executemany(
+            """
+            INSERT INTO job_usage_per_association_table (assoc_id, period, value)
+            VALUES (?, ?, ?)
+            """,
+            (
+                (assoc_id, period, value)
+                for assoc_id, userid, bank in associations
+                for period, value in enumerate(usage.get((userid, bank), empty))
+            ),
+        )
+        cursor.executemany(
+            "UPDATE association_table SET job_usage=? WHERE assoc_id=?",
+            (
+                (sum(usage.get((userid, bank), empty)), assoc_id)
+                for assoc_id, userid, bank in associations
+            ),
+        )
+        jobs.rollup_bank_usage(cursor)
 
-        # reset last_job_timestamp for all associations so that update_job_usage()
-        # replays all jobs from scratch
-        cursor.execute("UPDATE job_usage_factor_table SET last_job_timestamp=0")
+        # update_job_usage() picks up from the most recent job counted for each
+        # association
+        cursor.executemany(
+            """
+            UPDATE job_usage_factor_table SET last_job_timestamp=?
+            WHERE assoc_id=?
+            """,
+            (
+                (last_job_timestamps.get((userid, bank), 0), assoc_id)
+                for assoc_id, userid, bank in associations
+            ),
+        )
 
         # reset the half-life period end timestamp so that update_job_usage() starts
         # a fresh half-life window
@@ -89,13 +130,18 @@ def reconfigure_usage_bins(conn, cursor):
             SET end_half_life_period=?
             WHERE cluster='cluster'
             """,
-            (str(time.time() + new_half_life),),
+            (str(now + new_half_life),),
         )
         cursor.execute(
             "INSERT INTO config_table (key, value) "
             "VALUES ('reconfigure_time', ?) ON CONFLICT(key)"
             "DO UPDATE SET value = excluded.value",
-            (time.time(),),
+            (now,),
+        )
+        # the usage of every association has been rebuilt, so an unfinished chunked
+        # job-usage update must not be resumed
+        cursor.execute(
+            "DELETE FROM config_table WHERE key=?", (jobs.UPDATE_USAGE_CHECKPOINT,)
         )
 
         conn.commit()
@@ -106,28 +152,155 @@ def reconfigure_usage_bins(conn, cursor):
         )
 
 
-def export_db_info(conn):
+# the file extension added for each kind of compression export_db_info() can write
+EXPORT_COMPRESSION = {None: "", "gzip": ".gz", "zstd": ".zst"}
+# the column which records when a row last changed, for the tables that have one
+CHANGED_SINCE_COLUMNS = {"association_table": "mod_time", "jobs": "t_inactive"}
+
+
+def open_export_file(path, compression=None):
+    """Open a .csv file for writing, compressed with gzip or zstd if asked."""
+    if compression == "gzip":
+        return gzip.open(path, "wt", newline="")
+    if compression == "zstd":
+        try:
+            # pylint: disable=import-outside-toplevel
+            import zstandard
+        except ImportError:
+            raise ValueError(
+                "zstd compression requires the zstandard Python module"
+            ) from None
+        return zstandard.open(path, "wt", newline="")
+    return open(path, "w", newline="")
+
+
+def export_table(conn, table, path, compression=None, since=None):
+    """
+    Write the rows of a table to a .csv file, reading them a page at a time so
+    that the whole table is never held in memory.
+
+    Args:
+        conn: The SQLite Connection object.
+        table: The name of the table.
+        path: The path of the .csv file.
+        compression: Either None, "gzip", or "zstd".
+        since: Only write the rows which changed at or after this seconds-since-epoch
+            timestamp, for a table in CHANGED_SINCE_COLUMNS.
+
+    Returns:
+        the number of rows written.
+    """
+    query = f'SELECT * FROM "{table}"'
+    if table == "jobs":
+        # the R and jobspec of jobs are always written as text
+        r_expr, jobspec_expr, joins = job_data.column_sql(conn)
+        columns = {"R": f"{r_expr} AS R", "jobspec": f"{jobspec_expr} AS jobspec"}
+        query = (
+            "SELECT "
+            + ",".join(
+                columns.get(row[1], f"jobs.{row[1]}")
+                for row in conn.execute("PRAGMA table_info(jobs)")
+            )
+            + f" FROM jobs{joins}"
+        )
+    params = ()
+    if since is not None and table in CHANGED_SINCE_COLUMNS:
+        query += f" WHERE {CHANGED_SINCE_COLUMNS[table]} >= ?"
+        params = (since,)
+    cur = conn.execute(query, params)
+
+    count = 0
+    with open_export_file(path, compression) as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow([description[0] for description in cur.description])
+        while True:
+            rows = cur.fetchmany(fluxacct.accounting.PAGE_SIZE)
+            if not rows:
+                break
+            writer.writerows(rows)
+            count += len(rows)
+    return count
+
+
+def export_db_info(conn, directory=None, compression=None, since=None, parallel=1):
     """
     Export all of the information from the tables in the flux-accounting DB into
     separate .csv files.
+
+    Every table is read inside of one read transaction, which holds a shared lock
+    on the DB until the export is done. In rollback journal mode, this keeps any
+    other connection from committing, so up to `parallel` tables can be exported at
+    once on their own read-only connections and still be consistent with each
+    other. A DB in WAL mode is exported one table at a time on the connection
+    which holds the read transaction.
+
+    Args:
+        conn: The SQLite Connection object.
+        directory: The directory to write the .csv files to (default: the current
+            working directory). It is created if it does not exist.
+        compression: Compress the .csv files with "gzip" or "zstd".
+        since: Only export the rows of association_table and jobs which changed at
+            or after this timestamp. Other tables don't record when their rows
+            change and are exported in full.
+        parallel: The number of tables to export at once.
+
+    Returns:
+        A message with the number of tables exported and where they were written.
     """
-    cur = conn.cursor()
-    # get all tables from DB
-    cur.execute("SELECT name FROM sqlite_master WHERE type='table';")
-    tables = cur.fetchall()
-
-    # loop through each table and export it to a separate .csv file
-    for table_name in tables:
-        output_csv = f"{table_name['name']}.csv"
-        cur.execute(f"SELECT * FROM {table_name['name']}")
-        rows = cur.fetchall()
-        column_names = [description[0] for description in cur.description]
-
-        # write data to .csv file
-        with open(output_csv, "w", newline="") as csv_file:
-            writer = csv.writer(csv_file)
-            writer.writerow(column_names)
-            writer.writerows(rows)
+    if compression not in EXPORT_COMPRESSION:
+        raise ValueError("compression must be one of gzip, zstd")
+    directory = directory or os.getcwd()
+    os.makedirs(directory, exist_ok=True)
+    if since is not None:
+        try:
+            since = float(since)
+        except ValueError:
+            since = float(util.parse_timestamp(since))
+
+    path = conn.execute("PRAGMA database_list").fetchone()[2]
+    journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    # an in-memory DB can only be read through the connection that created it
+    snapshot = sqlite3.connect(f"file:{path}?mode=ro", uri=True) if path else conn
+    try:
+        if snapshot is not conn:
+            snapshot.execute("BEGIN")
+        tables = [
+            row[0]
+            for row in snapshot.execute(
+                "SELECT name FROM sqlite_master WHERE type='table'"
+            ).fetchall()
+            # its documents are written out with the jobs that use them, and the
+            # membership tables are rebuilt from association_table when it is loaded
+            if row[0] != job_data.TABLE and row[0] not in memberships.TABLES
+        ]
+
+        def export(table, table_conn):
+            csv_path = os.path.join(
+                directory, f"{table}.csv{EXPORT_COMPRESSION[compression]}"
+            )
+            return export_table(table_conn, table, csv_path, compression, since)
+
+        def export_on_own_connection(table):
+            table_conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            try:
+                return export(table, table_conn)
+            finally:
+                table_conn.close()
+
+        if parallel > 1 and path and journal_mode.lower() != "wal":
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=parallel
+            ) as executor:
+                list(executor.map(export_on_own_connection, tables))
+        else:
+            for table in tables:
+                export(table, snapshot)
+    finally:
+        if snapshot is not conn:
+            snapshot.rollback()
+            snapshot.close()
+
+    return f"exported {len(tables)} table(s) to {directory}"
 
 
 @with_cursor
@@ -180,70 +353,197 @@ def export_db_as_fairshare_json(conn, cursor):
     return json.dumps({"root": root_node}, indent=2)
 
 
-def populate_db(conn, csv_file, columns_included=None):
+# the number of rows inserted by each call to executemany() in populate_db()
+POP_DB_CHUNK_SIZE = 10000
+# how often, in rows, populate_db() reports its progress
+POP_DB_PROGRESS_INTERVAL = 100000
+
+
+def relax_durability(conn):
+    """
+    Sync to disk less often during a bulk load. The journal is kept on disk, so an
+    interrupted load is still rolled back and the rest of the database is left
+    intact; only syncs that guard against a power loss at just the wrong time are
+    skipped.
+
+    Returns:
+        the PRAGMA statements which restore the previous settings.
+    """
+    synchronous = conn.execute("PRAGMA synchronous").fetchone()[0]
+    restore = [f"PRAGMA synchronous={synchronous}"]
+    # NORMAL is 1; a connection that already syncs less often is left alone
+    if synchronous > 1:
+        conn.execute("PRAGMA synchronous=NORMAL")
+    return restore
+
+
+def drop_indexes(conn, table):
+    """
+    Drop the indexes on a table which were created with CREATE INDEX, so that they
+    can be rebuilt once after a bulk load instead of being updated on every insert.
+    Unique indexes are kept, since triggers look up values through them while the
+    rows are inserted (e.g. the next assoc_id in association_table).
+
+    Returns:
+        the CREATE INDEX statements of the dropped indexes.
+    """
+    indexes = conn.execute(
+        "SELECT name, sql FROM sqlite_master "
+        "WHERE type='index' AND tbl_name=? AND sql IS NOT NULL "
+        "AND sql NOT LIKE 'CREATE UNIQUE INDEX%'",
+        (table,),
+    ).fetchall()
+    for name, _ in indexes:
+        conn.execute(f'DROP INDEX "{name}"')
+    return [sql_stmt for _, sql_stmt in indexes]
+
+
+def read_csv_runs(reader, indexes, columns, chunk_size=POP_DB_CHUNK_SIZE):
+    """
+    Read the rows of a .csv file and group consecutive rows by which of their
+    columns are non-empty, so that each group can be inserted with one statement.
+    Rows keep their order, and a row with no values is skipped.
+
+    Yields:
+        a tuple of the names of the non-empty columns and a list of up to
+        chunk_size rows of their values.
+    """
+    if not indexes:
+        return
+    if len(indexes) > 1:
+        select = operator.itemgetter(*indexes)
+    else:
+        # itemgetter() with a single index returns a value instead of a tuple
+        def select(row):
+            return (row[indexes[0]],)
+
+    all_present = tuple(indexes)
+
+    run_columns = ()
+    run = []
+    for row in reader:
+        try:
+            values = select(row)
+        except IndexError:
+            # the columns missing from the end of a short row are empty
+            values = tuple(row[i] if i < len(row) else "" for i in indexes)
+        if "" in values:
+            present = tuple(i for i, value in zip(indexes, values) if value != "")
+            if not present:
+                continue
+            values = tuple(value for value in values if value != "")
+        else:
+            present = all_present
+        if present != run_columns or len(run) >= chunk_size:
+            if run:
+                yield tuple(columns[i] for i in run_columns), run
+            run_columns = present
+            run = []
+        run.append(values)
+    if run:
+        yield tuple(columns[i] for i in run_columns), run
+
+
+def populate_db(conn, csv_file, columns_included=None, table=None, progress=None):
     """
     Populate an existing table from a single .csv file with an option
     to specify columns to include. The .csv file must have the column names in
     the first line to indicate which columns to insert into the table.
 
-    Args:
-        csv_file: Path to the .csv file. The name of the .csv file must match the
-            name of the table in the flux-accounting DB.
+    The rows are inserted in one transaction with executemany(), one statement per
+    run of rows with the same non-empty columns. While the rows are loaded, the DB
+    is synced to disk less often (see relax_durability()), and the indexes on the
+    table are dropped and then rebuilt at the end.
 
+    Args:
+        csv_file: Path to the .csv file. Unless table is passed, the name of the .csv
+            file must match the name of the table in the flux-accounting DB.
         columns_included (list, optional): List of columns to include from the .csv
-            file. If None, it will include all columns listed in the .csv file.
+            file, or a comma-separated string of them. If None, it will include all
+            columns listed in the .csv file.
+        table (str, optional): The name of the table to populate.
+        progress (callable, optional): A function which is called with the number of
+            rows inserted so far every POP_DB_PROGRESS_INTERVAL rows.
+
+    Returns:
+        A message with the number of rows inserted into the table.
 
     Raises:
-        ValueError: If the table derived from the .csv file name does not match
-            any of the tables in the flux-accounting DB.
+        ValueError: If the table derived from the .csv file name (or passed in) does
+            not match any of the tables in the flux-accounting DB, or the .csv file
+            has a column that the table does not.
     """
-    try:
-        cur = conn.cursor()
-
-        # extract table name from .csv filename; check if it exists in DB
-        table_name = csv_file.split("/")[-1].replace(".csv", "")
-        cur.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        tables = [table[0] for table in cur.fetchall()]
-
-        if table_name not in tables:
-            raise ValueError(
-                f'pop-db: table "{table_name}" does not exist in the database'
-            )
+    # extract table name from .csv filename; check if it exists in DB
+    table_name = table or os.path.basename(csv_file).replace(".csv", "")
+    tables = [
+        row[0]
+        for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table';")
+    ]
+    if table_name not in tables:
+        raise ValueError(f'pop-db: table "{table_name}" does not exist in the database')
+    table_columns = {
+        row[1] for row in conn.execute(f'PRAGMA table_info("{table_name}")')
+    }
+
+    if isinstance(columns_included, str):
+        columns_included = columns_included.split(",")
+
+    with open(csv_file, "r", newline="") as file:
+        reader = csv.reader(file)
+        columns = next(reader, [])  # column names
+
+        # the positions of the columns to insert in each row
+        indexes = [
+            i
+            for i, col in enumerate(columns)
+            if not columns_included or col in columns_included
+        ]
+        for i in indexes:
+            if columns[i] not in table_columns:
+                raise ValueError(
+                    f'pop-db: column "{columns[i]}" does not exist in table '
+                    f'"{table_name}"'
+                )
 
-        with open(csv_file, "r", newline="") as file:
-            reader = csv.reader(file)
-            all_columns = next(reader)  # column names
-
-            if columns_included:
-                # filter only the columns specified
-                columns = [col for col in all_columns if col in columns_included]
-            else:
-                columns = all_columns
-
-            for row in reader:
-                # build a list of (column, value) pairs for columns with non-empty values
-                column_value_pairs = [
-                    (columns[i], row[i]) for i in range(len(columns)) if row[i] != ""
-                ]
-                if column_value_pairs:
-                    # separate columns and values for the SQL statement
-                    cols_to_insert = [pair[0] for pair in column_value_pairs]
-                    vals_to_insert = [pair[1] for pair in column_value_pairs]
-                    insert_sql = (
+        if conn.in_transaction:
+            conn.commit()
+        restore = relax_durability(conn)
+        try:
+            conn.execute("BEGIN")
+            index_stmts = drop_indexes(conn, table_name)
+
+            inserted = 0
+            statements = {}
+            for cols_to_insert, rows in read_csv_runs(reader, indexes, columns):
+                insert_sql = statements.get(cols_to_insert)
+                if insert_sql is None:
+                    insert_sql = statements[cols_to_insert] = (
                         f"INSERT INTO {table_name} "
                         f"({', '.join(cols_to_insert)}) "
-                        f"VALUES ({', '.join(['?' for _ in vals_to_insert])})"
+                        f"VALUES ({', '.join(['?' for _ in cols_to_insert])})"
                     )
-
-                    # execute the insertion with only the non-empty values
-                    cur.execute(insert_sql, vals_to_insert)
-
-        conn.commit()
-    except sqlite3.OperationalError as exc:
-        # roll back any changes made to the DB while trying to populate it before
-        # raising an exception to the flux-accounting service
-        conn.rollback()
-        raise sqlite3.OperationalError(exc)
+                conn.executemany(insert_sql, rows)
+                previous, inserted = inserted, inserted + len(rows)
+                if (
+                    progress is not None
+                    and inserted // POP_DB_PROGRESS_INTERVAL
+                    > previous // POP_DB_PROGRESS_INTERVAL
+                ):
+                    progress(inserted)
+
+            for index_stmt in index_stmts:
+                conn.execute(index_stmt)
+            conn.commit()
+        except Exception:
+            # roll back any changes made to the DB while trying to populate it before
+            # raising an exception to the flux-accounting service
+            conn.rollback()
+            raise
+        finally:
+            for pragma in restore:
+                conn.execute(pragma)
+
+    return f"inserted {inserted} row(s) into {table_name}"
 
 
 @with_cursor
@@ -393,6 +693,8 @@ def edit_config(conn, cursor, key_value_strings):
     bin_config_keys = {"priority_usage_reset_period", "priority_decay_half_life"}
     usage_config_keys = {"node_weight", "core_weight", "gpu_weight"}
     requires_rebin = False
+    # the values replaced in config_table, in the order they were replaced
+    old_values = []
 
     for key_value_string in key_value_strings:
         key, value = key_value_string.split("=")
@@ -414,16 +716,33 @@ def edit_config(conn, cursor, key_value_strings):
             # ensure value is exactly "true" or "false" (case-insensitive)
             if value.lower() not in ["true", "false"]:
                 raise ValueError("deny_unknown_queues must be 'true' or 'false'")
+        if key == job_data.STORAGE_KEY and value not in job_data.STORAGE_MODES:
+            raise ValueError(
+                f"{key} must be one of {', '.join(job_data.STORAGE_MODES)}"
+            )
+        old_value = cursor.execute(
+            "SELECT value FROM config_table WHERE key=?", (key,)
+        ).fetchone()
+        if old_value is None:
+            raise ValueError(f"key {key} not found in config_table")
+        old_values.append((old_value[0], key))
         cursor.execute(
             "UPDATE config_table SET value=? WHERE key=?",
             (value, key),
         )
-        if cursor.rowcount == 0:
-            raise ValueError(f"key {key} not found in config_table")
 
     if requires_rebin:
-        # pylint: disable=no-value-for-parameter
-        reconfigure_usage_bins(conn)
+        try:
+            # pylint: disable=no-value-for-parameter
+            reconfigure_usage_bins(conn)
+        except Exception:
+            # the new configuration is committed before the archived jobs are
+            # attached to rebuild the usage bins, so put back the old one
+            cursor.executemany(
+                "UPDATE config_table SET value=? WHERE key=?", reversed(old_values)
+            )
+            conn.commit()
+            raise
 
     conn.commit()
     return 0
@@ -15,19 +15,26 @@ import string
 
 import flux.util
 import fluxacct.accounting.util as u
+from fluxacct.accounting.bank_hierarchy import get_bank_hierarchy
 
 
 class AccountingFormatter:
-    def __init__(self, cursor, error_msg="no results found in query"):
+    def __init__(self, cursor, error_msg="no results found in query", page_size=None):
         """
         Initialize an AccountingFormatter object with a SQLite cursor.
 
         Args:
             cursor: a SQLite Cursor object that has the results of a SQL query.
+            page_size: if set, only the first page of this many rows is fetched
+                here; the rest are fetched as they are needed by pages().
         """
         self.cursor = cursor
         self.column_names = [description[0] for description in cursor.description]
-        self.rows = self.cursor.fetchall()
+        self.page_size = page_size
+        if page_size:
+            self.rows = self.cursor.fetchmany(page_size)
+        else:
+            self.rows = self.cursor.fetchall()
 
         if not self.rows:
             # the SQL query didn't fetch any results; raise an Exception
@@ -43,6 +50,16 @@ class AccountingFormatter:
                 transformed.append(u.format_value(value))
         return transformed
 
+    def _column_widths(self, transformed_rows):
+        """Return the width of each column needed to fit its header and rows."""
+        return [
+            max(
+                len(str(value))
+                for value in [col] + [row[i] for row in transformed_rows]
+            )
+            for i, col in enumerate(self.column_names)
+        ]
+
     def get_column_names(self):
         """
         Return the column names from the query result.
@@ -69,14 +86,7 @@ class AccountingFormatter:
             table: the data from the query formatted as a table.
         """
         transformed_rows = [self._transform_row(row) for row in self.rows]
-
-        col_widths = [
-            max(
-                len(str(value))
-                for value in [col] + [row[i] for row in transformed_rows]
-            )
-            for i, col in enumerate(self.column_names)
-        ]
+        col_widths = self._column_widths(transformed_rows)
 
         # format a row of data
         def format_row(row):
@@ -141,6 +151,97 @@ class AccountingFormatter:
                 + f"\nAvailable columns: {','.join(self.column_names)}"
             )
 
+    def pages(self, json_fmt=False, format_string=""):
+        """
+        Yield the results of the query a page of rows at a time, formatted the same
+        way as as_json(), as_format_string(), or as_table(). Joined together, the
+        pages of JSON or format string output are identical to the output of
+        as_json() or as_format_string(). The columns of a table are sized to fit
+        every row, so all of the rows of a table are read before its first page is
+        yielded; joined together, its pages are identical to the output of
+        as_table().
+
+        Args:
+            json_fmt: format the rows in JSON.
+            format_string: a format string defining how each row should be
+                formatted. Column names should be used as placeholders.
+        """
+        page_size = self.page_size or len(self.rows)
+        if not json_fmt and format_string == "":
+            yield from self._table_pages(page_size)
+            return
+
+        rows = self.rows
+        first = True
+        while rows:
+            # read ahead so that the last page can be told apart from the others
+            next_rows = self.cursor.fetchmany(page_size)
+            if format_string != "":
+                try:
+                    lines = [
+                        format_string.format(**dict(zip(self.column_names, row)))
+                        for row in rows
+                    ]
+                    if first:
+                        lines.insert(
+                            0,
+                            format_string.format(
+                                **dict(zip(self.column_names, self.column_names))
+                            ),
+                        )
+                except KeyError as exc:
+                    raise ValueError(
+                        f"Invalid column name in format string: {exc.args[0]}."
+                        + f"\nAvailable columns: {','.join(self.column_names)}"
+                    )
+                page = "\n".join(lines)
+                if next_rows:
+                    page += "\n"
+            else:
+                items = []
+                for row in rows:
+                    item = json.dumps(
+                        {
+                            col: u.format_value(value)
+                            for col, value in zip(self.column_names, row)
+                        },
+                        indent=2,
+                    )
+                    # indent each row the same way json.dumps() indents a list
+                    items.append("\n".join(f"  {line}" for line in item.split("\n")))
+                page = ("[\n" if first else "") + ",\n".join(items)
+                page += ",\n" if next_rows else "\n]"
+            yield page
+            rows = next_rows
+            first = False
+
+    def _table_pages(self, page_size):
+        """
+        Yield the results of the query as a table a page of rows at a time. Every
+        row is read first so that the columns fit the widest value on any page.
+        """
+        transformed_rows = [
+            self._transform_row(row) for row in self.rows + self.cursor.fetchall()
+        ]
+        col_widths = self._column_widths(transformed_rows)
+
+        def format_row(row):
+            return " | ".join(
+                f"{str(value).ljust(col_widths[i])}" for i, value in enumerate(row)
+            )
+
+        for start in range(0, len(transformed_rows), page_size):
+            lines = [
+                format_row(row) for row in transformed_rows[start : start + page_size]
+            ]
+            if start == 0:
+                lines.insert(0, "-+-".join(["-" * width for width in col_widths]))
+                lines.insert(0, format_row(self.column_names))
+            page = "\n".join(lines)
+            if start + page_size < len(transformed_rows):
+                page += "\n"
+            yield page
+
 
 class BankFormatter(AccountingFormatter):
     """
@@ -148,14 +249,16 @@ class BankFormatter(AccountingFormatter):
     out banks/sub-banks in a hierarchical format and lists of users under banks.
     """
 
-    def __init__(self, cursor, bank_name):
+    def __init__(self, cursor, bank_name, hierarchy=None):
         """
         Initialize a BankFormatter object with a SQLite cursor.
         Args:
             cursor: a SQLite Cursor object that has the results of a SQL query.
             bank_name: the name of the bank.
+            hierarchy: an optional, previously loaded BankHierarchy object.
         """
         self.bank_name = bank_name
+        self.hierarchy = hierarchy
         super().__init__(
             cursor, error_msg=f"bank {self.bank_name} not found in bank_table"
         )
@@ -166,36 +269,47 @@ class BankFormatter(AccountingFormatter):
         """
         Internal generator to traverse banks and yield formatted lines.
         """
-        # fetch direct sub banks
+        hierarchy = get_bank_hierarchy(self.cursor.connection, self.hierarchy)
+
+        # fetch every bank and every association once; the hierarchy is then
+        # traversed in memory instead of with a query per bank
         self.cursor.execute(
-            "SELECT bank,active,shares,job_usage FROM bank_table WHERE parent_bank=?",
-            (bank,),
+            "SELECT bank,parent_bank,active,shares,job_usage FROM bank_table"
         )
-        sub_banks = self.cursor.fetchall()
-        if not sub_banks:
-            # leaf bank: list users
-            select_stmt = (
-                "SELECT username,shares,job_usage,fairshare,active FROM association_table "
-                "WHERE bank=?"
-            )
-            if concise:
-                # only display associations that have a job usage value greater than 0
-                select_stmt += " AND job_usage > 0"
-            if active:
-                # only display associations that are currently active under this bank
-                select_stmt += " AND active=1"
-            self.cursor.execute(
-                select_stmt,
-                (bank,),
-            )
-            for user in self.cursor.fetchall():
-                yield fmt_user(bank, user, indent)
-        else:
-            for sub_bank in sub_banks:
-                yield fmt_bank(sub_bank, indent)
-                yield from self._iterate_hierarchy(
-                    sub_bank["bank"], fmt_bank, fmt_user, indent + " ", concise, active
-                )
+        bank_rows = {}
+        for row in self.cursor.fetchall():
+            bank_rows.setdefault((row["parent_bank"], row["bank"]), row)
+
+        select_stmt = (
+            "SELECT username,bank,shares,job_usage,fairshare,active "
+            "FROM association_table"
+        )
+        where = []
+        if concise:
+            # only display associations that have a job usage value greater than 0
+            where.append("job_usage > 0")
+        if active:
+            # only display associations that are currently active under this bank
+            where.append("active=1")
+        if where:
+            select_stmt += " WHERE " + " AND ".join(where)
+        self.cursor.execute(select_stmt)
+        bank_users = {}
+        for user in self.cursor.fetchall():
+            bank_users.setdefault(user["bank"], []).append(user)
+
+        def iterate(bank, indent):
+            sub_banks = hierarchy.children(bank)
+            if not sub_banks:
+                # leaf bank: list users
+                for user in bank_users.get(bank, []):
+                    yield fmt_user(bank, user, indent)
+            else:
+                for sub_bank in sub_banks:
+                    yield fmt_bank(bank_rows[(bank, sub_bank)], indent)
+                    yield from iterate(sub_bank, indent + " ")
+
+        yield from iterate(bank, indent)
 
     def as_tree(self, concise, active):
         """
@@ -419,7 +533,7 @@ class JobsFormatter(flux.util.OutputFormat):
                 self.headings[field] = field
         super().__init__(fmt)
 
-    def build_table(self, items):
+    def build_table(self, items, header=True):
         """
         Handle constructing a table of job records with the current format.
 
@@ -428,6 +542,7 @@ class JobsFormatter(flux.util.OutputFormat):
 
         Args:
             items (iterable): list of items to format
+            header (bool): whether to start the table with a header line
         """
         # preprocess original format by processing with filter():
         newfmt = self.filter(items)
@@ -436,7 +551,7 @@ class JobsFormatter(flux.util.OutputFormat):
 
         items = self.sort_items(items)
 
-        output_str = f"{formatter.header()}\n"
+        output_str = f"{formatter.header()}\n" if header else ""
         for item in items:
             line = formatter.format(item)
             if not line or line.isspace():
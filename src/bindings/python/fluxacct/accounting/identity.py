@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import pwd
+import time
+
+from flux.constants import FLUX_USERID_UNKNOWN
+
+# how long, in seconds, a uid or username that was found is kept
+DEFAULT_TTL = 3600
+# how long, in seconds, a uid or username that could not be found is kept
+NEGATIVE_TTL = 60
+
+
+def _getpwnam(username):
+    try:
+        return pwd.getpwnam(username).pw_uid, True
+    except KeyError:
+        return FLUX_USERID_UNKNOWN, False
+
+
+def _getpwuid(userid):
+    try:
+        return pwd.getpwuid(userid).pw_name, True
+    except KeyError:
+        return str(userid), False
+
+
+class IdentityCache:
+    """
+    A cache of uid and username lookups. Every lookup that misses the cache goes to
+    the password database (which may be backed by LDAP or SSSD); the result is kept
+    for ttl seconds, or for negative_ttl seconds if the user could not be found.
+
+    The cache can be filled ahead of time with preload_passwd() or preload_db().
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, negative_ttl=NEGATIVE_TTL):
+        """
+        Initialize an IdentityCache object.
+
+        Args:
+            ttl: How long, in seconds, to keep a user that was found.
+            negative_ttl: How long, in seconds, to keep a user that wasn't found.
+        """
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        # username -> (uid, found, expiration) and uid -> (username, found, expiration)
+        self._uids = {}
+        self._usernames = {}
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.preloaded = 0
+
+    def _lookup(self, entries, key, resolve):
+        now = time.monotonic()
+        entry = entries.get(key)
+        if entry is not None and entry[2] > now:
+            if entry[1]:
+                self.hits += 1
+            else:
+                self.negative_hits += 1
+            return entry[0]
+
+        self.misses += 1
+        value, found = resolve(key)
+        entries[key] = (
+            value,
+            found,
+            now + (self.ttl if found else self.negative_ttl),
+        )
+        return value
+
+    def get_uid(self, username):
+        """
+        Return the uid of a username, or FLUX_USERID_UNKNOWN if it can't be found.
+        """
+        return self._lookup(self._uids, username, _getpwnam)
+
+    def get_username(self, userid):
+        """
+        Return the username of a uid, or the uid as a string if it can't be found.
+        """
+        return self._lookup(self._usernames, userid, _getpwuid)
+
+    def add(self, username, userid):
+        """Add a username and its uid to the cache."""
+        expiration = time.monotonic() + self.ttl
+        self._uids[username] = (userid, True, expiration)
+        self._usernames[userid] = (username, True, expiration)
+
+    def preload_passwd(self):
+        """
+        Add every user in the password database to the cache with a single pass
+        over it.
+
+        Returns:
+            the number of users added.
+        """
+        count = 0
+        for entry in pwd.getpwall():
+            self.add(entry.pw_name, entry.pw_uid)
+            count += 1
+        self.preloaded += count
+        return count
+
+    def preload_db(self, conn):
+        """
+        Add the username and uid of every association in the flux-accounting DB to
+        the cache.
+
+        Args:
+            conn: The SQLite Connection object.
+
+        Returns:
+            the number of users added.
+        """
+        count = 0
+        for username, userid in conn.execute(
+            "SELECT DISTINCT username, userid FROM association_table WHERE userid!=?",
+            (FLUX_USERID_UNKNOWN,),
+        ):
+            self.add(username, userid)
+            count += 1
+        self.preloaded += count
+        return count
+
+    def clear(self):
+        """Remove every entry from the cache and reset its statistics."""
+        self._uids.clear()
+        self._usernames.clear()
+        self.hits = self.negative_hits = self.misses = self.preloaded = 0
+
+    def stats(self):
+        """Return the hit and miss counts and the size of the cache."""
+        return {
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "preloaded": self.preloaded,
+            "usernames": len(self._uids),
+            "uids": len(self._usernames),
+            "ttl": self.ttl,
+            "negative_ttl": self.negative_ttl,
+        }
+
+
+# the cache shared by every lookup made through util.get_uid() and
+# util.get_username()
+cache = IdentityCache()
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import calendar
+import os
+import re
+import time
+
+from fluxacct.accounting import job_data
+
+# archived jobs are kept in one SQLite file per month (in UTC) of their t_inactive,
+# named after the flux-accounting DB, e.g. FluxAccounting-jobs-2026-01.db
+PARTITION_SUFFIX = "-jobs-{year:04d}-{month:02d}.db"
+PARTITION_RE = re.compile(r"-jobs-(\d{4})-(\d{2})\.db$")
+# the name a partition is attached under, e.g. jobs_2026_01
+SCHEMA_FORMAT = "jobs_{year:04d}_{month:02d}"
+SCHEMA_PREFIX = "jobs_"
+# SQLite can attach at most 10 databases to a connection by default
+MAX_PARTITIONS = 10
+# the temporary table which collects the jobs of a query that spans more partitions
+# than can be attached at once
+COLLECTED_JOBS = "temp.archived_jobs"
+# the config_table key which records the t_inactive of the most recent job that was
+# archived, so that fetch-job-records doesn't fetch it again once it has left the
+# jobs table
+ARCHIVED_UNTIL = "archived_jobs_t_inactive"
+
+
+def db_path(conn):
+    """Return the path of the main database of a connection, or "" if in memory."""
+    for _, name, path in conn.execute("PRAGMA database_list"):
+        if name == "main":
+            return path
+    return ""
+
+
+def month_bounds(year, month):
+    """Return the first second of a month and of the month after it."""
+    start = calendar.timegm((year, month, 1, 0, 0, 0))
+    year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return start, calendar.timegm((year, month, 1, 0, 0, 0))
+
+
+def partition_path(path, year, month):
+    """Return the path of the partition for a month next to a DB file."""
+    return os.path.splitext(path)[0] + PARTITION_SUFFIX.format(year=year, month=month)
+
+
+def list_partitions(path, start=None, end=None):
+    """
+    Return the partitions next to a DB file, optionally only the ones which could
+    hold jobs that finished after start or before end.
+
+    Args:
+        path: The path of the flux-accounting DB file.
+        start: An optional seconds-since-epoch timestamp.
+        end: An optional seconds-since-epoch timestamp.
+
+    Returns:
+        a list of (year, month) tuples, oldest first.
+    """
+    directory, filename = os.path.split(os.path.splitext(path)[0])
+    partitions = []
+    for entry in os.listdir(directory or "."):
+        if not entry.startswith(filename):
+            continue
+        match = PARTITION_RE.fullmatch(entry[len(filename) :])
+        if match is None:
+            continue
+        year, month = int(match.group(1)), int(match.group(2))
+        month_start, month_end = month_bounds(year, month)
+        if start is not None and month_end <= start:
+            continue
+        if end is not None and month_start >= end:
+            continue
+        partitions.append((year, month))
+    return sorted(partitions)
+
+
+def attached_partitions(conn):
+    """Return the names of the partitions attached to a connection."""
+    return [
+        name
+        for _, name, _ in conn.execute("PRAGMA database_list")
+        if name.startswith(SCHEMA_PREFIX)
+    ]
+
+
+def detach_partitions(conn, names=None):
+    """Detach the partitions attached to a connection, or only the ones named."""
+    for name in attached_partitions(conn) if names is None else names:
+        conn.execute(f"DETACH DATABASE {name}")
+
+
+def attach_partitions(conn, partitions):
+    """
+    Attach partitions of a flux-accounting DB to a connection. Partitions stay
+    attached for later queries until room is needed for other partitions.
+
+    Returns:
+        the names of the partitions, in the order they were passed in.
+    """
+    path = db_path(conn)
+    schemas = [
+        SCHEMA_FORMAT.format(year=year, month=month) for year, month in partitions
+    ]
+    attached = attached_partitions(conn)
+    missing = [
+        (year, month, name)
+        for (year, month), name in zip(partitions, schemas)
+        if name not in attached
+    ]
+    if not missing:
+        return schemas
+    if conn.in_transaction:
+        raise ValueError("archived jobs cannot be attached inside of a transaction")
+
+    # detach the partitions which are not needed by this query to make room
+    unneeded = [name for name in attached if name not in schemas]
+    detach_partitions(
+        conn, unneeded[: max(len(attached) + len(missing) - MAX_PARTITIONS, 0)]
+    )
+    for year, month, name in missing:
+        conn.execute(
+            f"ATTACH DATABASE ? AS {name}", (partition_path(path, year, month),)
+        )
+    return schemas
+
+
+def union_sql(conn, schemas, where=None):
+    """Return a query of the union of the jobs tables of one or more schemas."""
+    columns = ",".join(row[1] for row in conn.execute("PRAGMA main.table_info(jobs)"))
+    return " UNION ALL ".join(
+        f"SELECT {columns} FROM {schema}.jobs" + (f" WHERE {where}" if where else "")
+        for schema in schemas
+    )
+
+
+def collect_partitions(conn, partitions, where=None, params=()):
+    """
+    Copy the jobs which match a WHERE clause from the jobs table and from every
+    partition into a temporary table, attaching at most MAX_PARTITIONS partitions
+    at a time.
+
+    Returns:
+        the name of the temporary table.
+    """
+    if conn.in_transaction:
+        raise ValueError("archived jobs cannot be attached inside of a transaction")
+    conn.execute(f"DROP TABLE IF EXISTS {COLLECTED_JOBS}")
+    conn.execute(f"CREATE TABLE {COLLECTED_JOBS} AS SELECT * FROM main.jobs WHERE 0")
+    batches = [["main"]] + [
+        partitions[i : i + MAX_PARTITIONS]
+        for i in range(0, len(partitions), MAX_PARTITIONS)
+    ]
+    for batch in batches:
+        schemas = batch if batch == ["main"] else attach_partitions(conn, batch)
+        conn.execute(
+            f"INSERT INTO {COLLECTED_JOBS} {union_sql(conn, schemas, where)}",
+            tuple(params) * len(schemas) if where else (),
+        )
+        # the next batch can only be attached outside of a transaction
+        conn.commit()
+    return COLLECTED_JOBS
+
+
+def jobs_source(conn, start=None, end=None, where=None, params=()):
+    """
+    Return the source to select jobs from in a query of the jobs table: the jobs
+    table itself, or the union of it and the jobs tables of the archived
+    partitions which could hold jobs that finished after start or before end.
+    The partitions are attached to the connection. If there are more partitions
+    than can be attached at once, the jobs which match the WHERE clause are
+    copied into a temporary table in batches of partitions instead.
+
+    Args:
+        conn: The SQLite Connection object.
+        start: An optional seconds-since-epoch timestamp.
+        end: An optional seconds-since-epoch timestamp.
+        where: An optional WHERE clause on the columns of the jobs table which
+            the jobs of the query match.
+        params: The parameters of the WHERE clause.
+    """
+    path = db_path(conn)
+    partitions = list_partitions(path, start, end) if path else []
+    if not partitions:
+        return "jobs"
+    if len(partitions) > MAX_PARTITIONS:
+        return collect_partitions(conn, partitions, where, params)
+    schemas = attach_partitions(conn, partitions)
+    return f"({union_sql(conn, ['main'] + schemas)})"
+
+
+def last_job_timestamp(conn, archived_only=False):
+    """
+    Return the t_inactive of the most recent job in the jobs table or that was
+    archived out of it, or 0.0 if there are no jobs.
+
+    Args:
+        conn: The SQLite Connection object.
+        archived_only: Only look at the jobs that were archived.
+    """
+    row = conn.execute(
+        "SELECT value FROM config_table WHERE key=?", (ARCHIVED_UNTIL,)
+    ).fetchone()
+    timestamp = float(row[0]) if row is not None else 0.0
+    if not archived_only:
+        latest = conn.execute("SELECT MAX(t_inactive) FROM jobs").fetchone()[0]
+        timestamp = max(timestamp, latest or 0.0)
+    return timestamp
+
+
+def archive_old_jobs(conn, num_weeks=26):
+    """
+    Move the jobs which finished more than num_weeks ago out of the jobs table and
+    into per-month partitions next to the flux-accounting DB file. Each month of
+    jobs is moved in its own transaction. The usage of the moved jobs stays in
+    the flux-accounting DB, and the partitions are still read by view-job-records
+    and view-usage-report.
+
+    Args:
+        conn: The SQLite Connection object.
+        num_weeks: Archive the jobs that finished more than this many weeks ago.
+
+    Returns:
+        A message with the number of jobs archived and the number of partitions
+        they were written to.
+    """
+    path = db_path(conn)
+    if not path:
+        raise ValueError("jobs can only be archived from a flux-accounting DB file")
+    cutoff = time.time() - (int(num_weeks) * 604800)
+
+    if conn.in_transaction:
+        conn.commit()
+    # a partition can't be written to while it is attached for a query
+    detach_partitions(conn)
+
+    cur = conn.cursor()
+    months = [
+        tuple(map(int, row[0].split("-")))
+        for row in cur.execute(
+            "SELECT DISTINCT strftime('%Y-%m', t_inactive, 'unixepoch') FROM jobs "
+            "WHERE t_inactive < ? ORDER BY 1",
+            (cutoff,),
+        ).fetchall()
+    ]
+
+    # partitions are created with the same columns as the jobs table, and hold
+    # R and jobspec as text so that they can be read on their own
+    create_stmt = re.sub(
+        r"^CREATE TABLE\s+(IF NOT EXISTS\s+)?\"?jobs\"?",
+        "CREATE TABLE IF NOT EXISTS archive.jobs",
+        cur.execute(
+            "SELECT sql FROM sqlite_master WHERE type='table' AND name='jobs'"
+        ).fetchone()[0],
+    )
+    r_expr, jobspec_expr, joins = job_data.column_sql(conn)
+    column_names = [row[1] for row in cur.execute("PRAGMA main.table_info(jobs)")]
+    columns = {"R": r_expr, "jobspec": jobspec_expr}
+    select_stmt = (
+        "SELECT "
+        + ",".join(columns.get(name, f"jobs.{name}") for name in column_names)
+        + f" FROM main.jobs AS jobs{joins} "
+        "WHERE jobs.t_inactive >= ? AND jobs.t_inactive < ?"
+    )
+
+    count = 0
+    for year, month in months:
+        month_start, month_end = month_bounds(year, month)
+        bounds = (month_start, min(month_end, cutoff))
+        cur.execute(
+            "ATTACH DATABASE ? AS archive", (partition_path(path, year, month),)
+        )
+        try:
+            cur.execute(create_stmt)
+            cur.execute(
+                f"INSERT OR IGNORE INTO archive.jobs ({','.join(column_names)}) "
+                + select_stmt,
+                bounds,
+            )
+            archived_until = max(
+                last_job_timestamp(conn, archived_only=True),
+                cur.execute(
+                    "SELECT MAX(t_inactive) FROM main.jobs "
+                    "WHERE t_inactive >= ? AND t_inactive < ?",
+                    bounds,
+                ).fetchone()[0],
+            )
+            # the timestamp is saved as text with repr() so that it isn't rounded
+            cur.execute(
+                "INSERT INTO config_table (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+                (ARCHIVED_UNTIL, repr(archived_until)),
+            )
+            cur.execute(
+                "DELETE FROM main.jobs WHERE t_inactive >= ? AND t_inactive < ?",
+                bounds,
+            )
+            count += cur.rowcount
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            cur.execute("DETACH DATABASE archive")
+
+    if job_data.has_documents(conn):
+        # remove the R and jobspec documents that only the archived jobs used
+        job_data.prune(cur)
+        conn.commit()
+
+    return f"archived {count} job(s) into {len(months)} partition(s)"
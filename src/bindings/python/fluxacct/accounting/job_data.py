@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import functools
+import hashlib
+import sqlite3
+import zlib
+
+# the table which holds the compressed R and jobspec documents of jobs
+TABLE = "job_data_table"
+# the key in config_table which sets how the R and jobspec of new jobs are stored
+STORAGE_KEY = "job_storage"
+# R and jobspec are stored as text in the jobs table
+TEXT = "text"
+# R and jobspec are compressed and stored once in job_data_table; the jobs table
+# holds the key of each document
+COMPRESSED = "compressed"
+STORAGE_MODES = (TEXT, COMPRESSED)
+# the prefix of the key of a document in job_data_table, which can never be
+# the start of an R or jobspec stored as text
+KEY_PREFIX = "blake2b:"
+COMPRESSION_LEVEL = 6
+# the number of jobs converted in each transaction by convert_jobs()
+CONVERT_CHUNK_SIZE = 1000
+
+
+def is_key(value):
+    """Return True if the R or jobspec of a job is the key of a stored document."""
+    return isinstance(value, str) and value.startswith(KEY_PREFIX)
+
+
+@functools.lru_cache(maxsize=1024)
+def decompress(data):
+    """
+    Return a document stored in job_data_table as text. Jobs that were submitted
+    together usually share a jobspec, so the most recent documents are cached.
+    """
+    return zlib.decompress(data).decode("utf-8")
+
+
+def _decompress_column(data):
+    # jobs whose R or jobspec is stored as text are joined to no document
+    return None if data is None else decompress(data)
+
+
+def store(cur, text):
+    """
+    Compress a document and add it to job_data_table, unless the same document
+    is already stored there.
+
+    Args:
+        cur: The SQLite Cursor object.
+        text: The R or jobspec of a job as text.
+
+    Returns:
+        the key of the document.
+    """
+    if is_key(text):
+        return text
+    data = text.encode("utf-8")
+    key = KEY_PREFIX + hashlib.blake2b(data, digest_size=16).hexdigest()
+    found = cur.execute(f"SELECT 1 FROM {TABLE} WHERE hash=?", (key,)).fetchone()
+    if found is None:
+        cur.execute(
+            f"INSERT INTO {TABLE} (hash, data) VALUES (?, ?)",
+            (key, zlib.compress(data, COMPRESSION_LEVEL)),
+        )
+    return key
+
+
+def load(cur, value):
+    """
+    Return the R or jobspec of a job as text, whether it is stored as text or as
+    the key of a document in job_data_table.
+    """
+    if not is_key(value):
+        return value
+    row = cur.execute(f"SELECT data FROM {TABLE} WHERE hash=?", (value,)).fetchone()
+    if row is None:
+        raise ValueError(f"document {value} not found in {TABLE}")
+    return decompress(row[0])
+
+
+def storage_mode(conn):
+    """Return how the R and jobspec of new jobs are stored, TEXT or COMPRESSED."""
+    row = conn.execute(
+        "SELECT value FROM config_table WHERE key=?", (STORAGE_KEY,)
+    ).fetchone()
+    return row[0] if row is not None else TEXT
+
+
+def has_documents(conn):
+    """Return True if any jobs have their R or jobspec stored in job_data_table."""
+    try:
+        return conn.execute(f"SELECT 1 FROM {TABLE} LIMIT 1").fetchone() is not None
+    except sqlite3.OperationalError:
+        # the DB has not been updated to have job_data_table yet
+        return False
+
+
+def column_sql(conn, alias="jobs"):
+    """
+    Return the expressions which select the R and jobspec of a job as text in a
+    query of the jobs table, along with the JOINs they need. If no documents are
+    stored in job_data_table, the columns are selected as they are.
+
+    Args:
+        conn: The SQLite Connection object.
+        alias: The name of the jobs table in the query.
+
+    Returns:
+        A tuple of the R expression, the jobspec expression, and the JOIN clause
+        to add after the jobs table.
+    """
+    if not has_documents(conn):
+        return f"{alias}.R", f"{alias}.jobspec", ""
+    conn.create_function("job_data_decompress", 1, _decompress_column)
+    return (
+        f"IFNULL(job_data_decompress(R_data.data), {alias}.R)",
+        f"IFNULL(job_data_decompress(jobspec_data.data), {alias}.jobspec)",
+        f" LEFT JOIN {TABLE} R_data ON R_data.hash={alias}.R"
+        f" LEFT JOIN {TABLE} jobspec_data ON jobspec_data.hash={alias}.jobspec",
+    )
+
+
+def prune(cur):
+    """
+    Remove the documents in job_data_table which no job refers to anymore.
+
+    Returns:
+        the number of documents removed.
+    """
+    cur.execute(f"""
+        DELETE FROM {TABLE}
+        WHERE hash NOT IN (SELECT R FROM jobs)
+        AND hash NOT IN (SELECT jobspec FROM jobs)
+        """)
+    return cur.rowcount
+
+
+def convert_jobs(conn, mode, chunk_size=CONVERT_CHUNK_SIZE, progress=None):
+    """
+    Set how the R and jobspec of jobs are stored and convert the jobs already in
+    the jobs table. The jobs are converted chunk_size at a time, each chunk in its
+    own transaction, so that other connections are not locked out of the DB for
+    the whole conversion and an interrupted conversion can be run again.
+
+    Args:
+        conn: The SQLite Connection object.
+        mode: Either TEXT or COMPRESSED.
+        chunk_size: The number of jobs converted in each transaction.
+        progress: An optional function which is called with the number of jobs
+            converted so far after each chunk.
+
+    Returns:
+        the number of jobs converted.
+    """
+    if mode not in STORAGE_MODES:
+        raise ValueError(f"storage mode must be one of {', '.join(STORAGE_MODES)}")
+    if chunk_size < 1:
+        raise ValueError("chunk size must be a positive integer")
+
+    cur = conn.cursor()
+    # new jobs are stored in the new mode while the existing ones are converted
+    cur.execute(
+        "INSERT OR REPLACE INTO config_table (key, value) VALUES (?, ?)",
+        (STORAGE_KEY, mode),
+    )
+    conn.commit()
+
+    converted = 0
+    last_rowid = 0
+    while True:
+        rows = cur.execute(
+            "SELECT rowid, R, jobspec FROM jobs WHERE rowid > ? ORDER BY rowid LIMIT ?",
+            (last_rowid, chunk_size),
+        ).fetchall()
+        if not rows:
+            break
+        updates = []
+        for rowid, resources, jobspec in rows:
+            if mode == COMPRESSED:
+                new_resources, new_jobspec = store(cur, resources), store(cur, jobspec)
+            else:
+                new_resources, new_jobspec = load(cur, resources), load(cur, jobspec)
+            if (new_resources, new_jobspec) != (resources, jobspec):
+                updates.append((new_resources, new_jobspec, rowid))
+        cur.executemany("UPDATE jobs SET R=?, jobspec=? WHERE rowid=?", updates)
+        conn.commit()
+        converted += len(updates)
+        last_rowid = rows[-1][0]
+        if progress is not None:
+            progress(converted)
+
+    prune(cur)
+    conn.commit()
+    return converted
@@ -10,12 +10,21 @@
 # SPDX-License-Identifier: LGPL-3.0
 ###############################################################
 import time
+import math
+import json
 import logging
 import sqlite3
+import functools
+import itertools
 from collections import defaultdict
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 
+import fluxacct.accounting
 from fluxacct.accounting import jobs_table_subcommands as j
+from fluxacct.accounting import job_archive
+from fluxacct.accounting import job_data
+from fluxacct.accounting import rv1
 from fluxacct.accounting import util
 from fluxacct.accounting.util import with_cursor
 
@@ -26,51 +35,150 @@ logging.basicConfig(
 )
 LOGGER = logging.getLogger(__name__)
 
+# the config_table key used to record the progress of a chunked job-usage update
+UPDATE_USAGE_CHECKPOINT = "update_usage_checkpoint"
+# the config_table key used to save the summary of the last job-usage update
+UPDATE_USAGE_STATS = "update_usage_stats"
 
-def update_t_inactive(acct_conn, last_t_inactive, user, bank):
+
+class UpdateUsageStats:
+    """
+    Timings and row counts collected during a job-usage update.
+
+    Every phase of an update records how long it took and how many rows it wrote
+    (measured with the Connection's total_changes counter). Phases that run more
+    than once, like the phases of a chunked update, are added up.
+    """
+
+    def __init__(self, conn):
+        """
+        Initialize an UpdateUsageStats object.
+
+        Args:
+            conn: The SQLite Connection object the update runs on.
+        """
+        self.conn = conn
+        self.start_time = time.time()
+        self.phases = {}
+        self.counts = defaultdict(int)
+        self._start = time.perf_counter()
+        self._elapsed = None
+
+    @contextmanager
+    def phase(self, name):
+        """Time a phase of the update and count the rows it writes."""
+        start = time.perf_counter()
+        changes = self.conn.total_changes
+        try:
+            yield
+        finally:
+            phase = self.phases.setdefault(name, {"seconds": 0.0, "rows_written": 0})
+            phase["seconds"] += time.perf_counter() - start
+            phase["rows_written"] += self.conn.total_changes - changes
+
+    def count(self, name, value=1):
+        """Add to one of the counts of the update."""
+        self.counts[name] += value
+
+    def finish(self):
+        """Record the total run time of the update."""
+        self._elapsed = time.perf_counter() - self._start
+
+    def to_dict(self):
+        """Return the summary of the update as a JSON-serializable dictionary."""
+        elapsed = self._elapsed
+        if elapsed is None:
+            elapsed = time.perf_counter() - self._start
+        return {
+            "start_time": self.start_time,
+            "seconds": round(elapsed, 6),
+            "phases": {
+                name: {
+                    "seconds": round(phase["seconds"], 6),
+                    "rows_written": phase["rows_written"],
+                }
+                for name, phase in self.phases.items()
+            },
+            "counts": dict(self.counts),
+        }
+
+    def log(self, logger):
+        """Log the time and rows written of every phase, followed by the counts."""
+        for name, phase in self.phases.items():
+            logger.info(
+                "update-usage phase %s: %.3fs, %d rows written",
+                name,
+                phase["seconds"],
+                phase["rows_written"],
+            )
+        logger.info(
+            "update-usage counts: %s",
+            ", ".join(f"{name}={value}" for name, value in self.counts.items()),
+        )
+
+    def save(self, cur):
+        """Save the summary of the update in config_table."""
+        cur.execute(
+            "INSERT INTO config_table (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+            (UPDATE_USAGE_STATS, json.dumps(self.to_dict())),
+        )
+
+
+def get_assoc_id(cur, user, bank):
+    """Fetch the assoc_id of an association."""
+    cur.execute(
+        "SELECT assoc_id FROM association_table WHERE username=? AND bank=?",
+        (user, bank),
+    )
+    result = cur.fetchone()
+    if result is None:
+        raise ValueError(f"association {user},{bank} not found in association_table")
+    return result[0]
+
+
+def update_t_inactive(acct_conn, last_t_inactive, assoc_id):
     """
     Save the timestamp of the most recent inactive job for the association.
     """
     u_ts = """
-        UPDATE job_usage_factor_table SET last_job_timestamp=? WHERE username=? AND bank=?
+        UPDATE job_usage_factor_table SET last_job_timestamp=? WHERE assoc_id=?
         """
     acct_conn.execute(
         u_ts,
         (
             last_t_inactive,
-            user,
-            bank,
+            assoc_id,
         ),
     )
 
 
-def update_hist_usg_col(acct_conn, usg_h, user, bank):
+def update_hist_usg_col(acct_conn, usg_h, assoc_id):
     """Update the job_usage column for the association."""
     u_usg = """
-        UPDATE association_table SET job_usage=? WHERE username=? AND bank=?
+        UPDATE association_table SET job_usage=? WHERE assoc_id=?
         """
     acct_conn.execute(
         u_usg,
         (
             usg_h,
-            user,
-            bank,
+            assoc_id,
         ),
     )
 
 
-def update_curr_usg_col(acct_conn, usg_h, user, bank, userid):
+def update_curr_usg_col(acct_conn, usg_h, assoc_id):
     """
     Write the current job usage factor for the association to the
     job_usage_factor_table.
     """
     acct_conn.execute(
         """
-        INSERT INTO job_usage_per_association_table (username, userid, bank, period, value)
-        VALUES (?, ?, ?, ?, ?)
-        ON CONFLICT (username, bank, period) DO UPDATE SET value=excluded.value
+        INSERT INTO job_usage_per_association_table (assoc_id, period, value)
+        VALUES (?, ?, ?)
+        ON CONFLICT (assoc_id, period) DO UPDATE SET value=excluded.value
         """,
-        (user, userid, bank, 0, usg_h),
+        (assoc_id, 0, usg_h),
     )
 
 
@@ -96,70 +204,252 @@ def get_usage_weights(cur):
     )
 
 
-def apply_decay_factor(acct_conn, user, bank, userid):
+def get_decay_factor(cur):
     """
-    Apply a decay factor to an association's job usage period values. Since this helper
-    issues a write to the flux-accounting DB and does not have a .commit() call after the
-    update, this function should be called inside of a SQLite TRANSACTION.
+    Fetch the decay factor applied to job usage at the end of every half-life period.
 
     Args:
-        acct_conn: The SQLite Connection object.
-        user: The username of the association.
-        bank: The bank name of the association.
-        userid: The userid of the association.
+        cur: The SQLite Cursor object.
     """
-    cur = acct_conn.cursor()
     cur.execute("SELECT value FROM config_table WHERE key='decay_factor'")
     row = cur.fetchone()
     # if decay_factor is not configured, fall back to 0.5
-    decay = float(row[0]) if row else 0.5
+    return float(row[0]) if row else 0.5
 
-    # fetch all periods ordered from oldest to most recent so we can shift
-    # values forward without overwriting anything we haven't read yet
-    cur.execute(
+
+def decay_usage_periods(cur, associations, decay, periods=1):
+    """
+    Move the job usage periods of one or more associations back by a number of
+    half-life periods and apply the decay factor to them. Since this helper issues
+    writes to the flux-accounting DB and does not call .commit(), it should be called
+    inside of a SQLite TRANSACTION.
+
+    The periods of an association are treated as a ring of n slots: moving back k
+    periods sends period p to (p + k) % n with its value multiplied by decay^k, and
+    the values that fall off the end are cleared and reused as the newest periods.
+    This is done in closed form with two UPDATEs per association no matter how many
+    periods it is moved.
+
+    Args:
+        cur: The SQLite Cursor object.
+        associations: An iterable of assoc_ids.
+        decay: The decay factor applied once per half-life period.
+        periods: The number of half-life periods to move back.
+    """
+    if periods <= 0:
+        return
+    params = [
+        {
+            "assoc_id": assoc_id,
+            "periods": periods,
+            "factor": decay**periods,
+        }
+        for assoc_id in associations
+    ]
+    # every period is first moved to a negative placeholder so that the new period
+    # numbers never collide with the ones that have not been moved yet
+    cur.executemany(
         """
-        SELECT period, value FROM job_usage_per_association_table
-        WHERE username=? AND bank=?
-        ORDER BY period DESC
+        WITH ring(n) AS (
+            SELECT COUNT(*) FROM job_usage_per_association_table
+            WHERE assoc_id=:assoc_id
+        )
+        UPDATE job_usage_per_association_table
+        SET period=-1 - ((period + :periods) % (SELECT n FROM ring)),
+            value=CASE
+                WHEN period + :periods < (SELECT n FROM ring) THEN value * :factor
+                ELSE 0.0
+            END
+        WHERE assoc_id=:assoc_id
         """,
-        (user, bank),
+        params,
     )
-    periods = cur.fetchall()
-
-    for period, value in periods:
-        # the oldest period just gets dropped off the end since it no longer affects
-        # historical usage
-        next_period = period + 1
-        cur.execute(
-            """
-            UPDATE job_usage_per_association_table SET value=?
-            WHERE username=? AND userid=? AND bank=? AND period=?
-            """,
-            (value * decay, user, userid, bank, next_period),
-        )
-
-    # period 0 will be written with the current period's usage
-    cur.execute(
+    cur.executemany(
         """
-        UPDATE job_usage_per_association_table SET value=0.0
-        WHERE username=? AND userid=? AND bank=? AND period=0
+        UPDATE job_usage_per_association_table SET period=-1 - period
+        WHERE assoc_id=:assoc_id AND period < 0
         """,
-        (user, userid, bank),
+        params,
     )
 
+
+def apply_decay_factor(acct_conn, assoc_id, periods=1):
+    """
+    Apply a decay factor to an association's job usage period values. Since this helper
+    issues a write to the flux-accounting DB and does not have a .commit() call after the
+    update, this function should be called inside of a SQLite TRANSACTION.
+
+    Args:
+        acct_conn: The SQLite Connection object.
+        assoc_id: The assoc_id of the association.
+        periods: The number of half-life periods that have ended.
+    """
+    cur = acct_conn.cursor()
+    # every period moves back by the number of half-life periods that have ended;
+    # the oldest periods are dropped and the newest ones are cleared so that they
+    # can be written with the usage of the jobs that finished in them
+    decay_usage_periods(cur, [assoc_id], get_decay_factor(cur), periods)
+
     # return the sum of all periods excluding period 0 since that will be
     # written separately
     cur.execute(
         """
         SELECT SUM(value) FROM job_usage_per_association_table
-        WHERE username=? AND userid=? AND bank=? AND period > 0
+        WHERE assoc_id=? AND period > 0
         """,
-        (user, userid, bank),
+        (assoc_id,),
     )
     result = cur.fetchone()
     return result[0] if result[0] is not None else 0.0
 
 
+def decay_idle_associations(cur, active, decay, periods=1):
+    """
+    Apply the half-life decay to every association that did not run any new jobs
+    when a new half-life period begins, and update its historical job usage.
+
+    Associations whose job usage periods and historical job usage are all 0 are
+    skipped since a decay does not change them; this keeps associations that have
+    not run a job in a long time from being rewritten at every half-life period.
+
+    Args:
+        cur: The SQLite Cursor object.
+        active: A set of the assoc_ids of the associations that ran new jobs and
+            have already been updated.
+        decay: The decay factor applied once per half-life period.
+        periods: The number of half-life periods that have ended.
+
+    Returns:
+        the number of associations that were decayed.
+    """
+    cur.execute("""
+        SELECT a.assoc_id FROM association_table a
+        WHERE a.job_usage != 0 OR EXISTS (
+            SELECT 1 FROM job_usage_per_association_table p
+            WHERE p.assoc_id=a.assoc_id AND p.value != 0
+        )
+        """)
+    idle = [row[0] for row in cur.fetchall() if row[0] not in active]
+    decay_associations(cur, idle, decay, periods)
+
+    return len(idle)
+
+
+def decay_associations(cur, associations, decay, periods=1):
+    """
+    Apply the half-life decay to one or more associations and update their
+    historical job usage.
+
+    Args:
+        cur: The SQLite Cursor object.
+        associations: A list of assoc_ids.
+        decay: The decay factor applied once per half-life period.
+        periods: The number of half-life periods that have ended.
+    """
+    decay_usage_periods(cur, associations, decay, periods)
+    cur.executemany(
+        """
+        UPDATE association_table SET job_usage=(
+            SELECT COALESCE(SUM(value), 0.0) FROM job_usage_per_association_table
+            WHERE assoc_id=:assoc_id
+        )
+        WHERE assoc_id=:assoc_id
+        """,
+        ({"assoc_id": assoc_id} for assoc_id in associations),
+    )
+
+
+def calc_weighted_usage(
+    nnodes, ncores, ngpus, elapsed, node_weight, core_weight, gpu_weight
+):
+    """Return the usage of a single job weighted by the resources it used."""
+    weighted_usage = (
+        (nnodes * node_weight) + (ncores * core_weight) + (ngpus * gpu_weight)
+    ) * elapsed
+    return round(weighted_usage, 5)
+
+
+@functools.lru_cache(maxsize=1024)
+def _resource_counts(resources):
+    # jobs that ran on the same resources share the same R, so avoid parsing it
+    # again for every job
+    return rv1.resource_counts(resources)
+
+
+def rebin_job_usage(cur, half_life, num_periods, now):
+    """
+    Compute the job usage periods of every association from the jobs table and the
+    archived jobs under a given half-life period configuration.
+
+    The jobs are read once, in order of when each job finished. A job that
+    finished within the last half-life period counts towards period 0, a job that
+    finished one half-life period before that counts towards period 1 with the
+    decay factor applied once, and so on. Jobs older than the oldest period and
+    jobs older than their bank's ignore_older_than timestamp are skipped.
+
+    Args:
+        cur: The SQLite Cursor object.
+        half_life: The length of a half-life period, in seconds.
+        num_periods: The number of periods for every association.
+        now: The timestamp that periods are counted back from.
+
+    Returns:
+        usage: A dictionary keyed by (userid, bank) of lists of num_periods
+            values, one per period.
+        last_job_timestamps: A dictionary keyed by (userid, bank) of the t_inactive
+            timestamp of the most recent job counted for the association.
+    """
+    decay = get_decay_factor(cur)
+    node_weight, core_weight, gpu_weight = get_usage_weights(cur)
+    decay_per_period = [decay**period for period in range(num_periods)]
+
+    usage = {}
+    last_job_timestamps = {}
+    oldest = now - (num_periods * half_life)
+    # jobs which have been archived out of the jobs table still count
+    source = job_archive.jobs_source(
+        cur.connection, oldest, None, "t_inactive > ?", [oldest]
+    )
+    r_expr, _, joins = job_data.column_sql(cur.connection)
+    cur.execute(
+        f"""
+        SELECT jobs.userid, jobs.bank, jobs.t_run, jobs.t_inactive, {r_expr}
+        FROM {source} AS jobs JOIN bank_table ON jobs.bank=bank_table.bank{joins}
+        WHERE jobs.t_inactive > ? AND jobs.t_inactive > bank_table.ignore_older_than
+        ORDER BY jobs.t_inactive
+        """,
+        (oldest,),
+    )
+    for userid, bank, t_run, t_inactive, resources in cur:
+        period = max(int((now - t_inactive) // half_life), 0)
+        if period >= num_periods:
+            continue
+        try:
+            nnodes, ncores, ngpus = _resource_counts(resources)
+        except (ValueError, TypeError, KeyError):
+            # can't count the resources in R; skip it
+            continue
+
+        key = (userid, bank)
+        if key not in usage:
+            usage[key] = [0.0] * num_periods
+        usage[key][period] += (
+            calc_weighted_usage(
+                nnodes,
+                ncores,
+                ngpus,
+                t_inactive - t_run,
+                node_weight,
+                core_weight,
+                gpu_weight,
+            )
+            * decay_per_period[period]
+        )
+        last_job_timestamps[key] = t_inactive
+
+    return usage, last_job_timestamps
+
+
 def calc_usage_factor(
     conn,
     pdhl,
@@ -171,17 +461,45 @@ def calc_usage_factor(
     node_weight,
     core_weight,
     gpu_weight,
+    periods=None,
+    assoc_id=None,
 ):
+    """
+    Add an association's new jobs to its job usage periods and update its
+    historical job usage.
+
+    Args:
+        conn: The SQLite Connection object.
+        pdhl: The length of a half-life period, in seconds.
+        user: The username of the association.
+        bank: The bank name of the association.
+        userid: The userid of the association.
+        end_hl: The timestamp stored in the end_half_life_period column.
+        user_jobs: A list of the association's new JobRecord objects.
+        node_weight: The weight of a node in a job's usage.
+        core_weight: The weight of a core in a job's usage.
+        gpu_weight: The weight of a GPU in a job's usage.
+        periods: The number of half-life periods that have ended since end_hl. If
+            not passed in, a single half-life period is applied if the current time
+            is past the end of the current half-life period.
+        assoc_id: The assoc_id of the association. If not passed in, it is looked
+            up from the username and bank.
+
+    Returns:
+        the historical job usage of the association.
+    """
     cur = conn.cursor()
+    if assoc_id is None:
+        assoc_id = get_assoc_id(cur, user, bank)
 
     # fetch all current period values for this association
     cur.execute(
         """
         SELECT period, value FROM job_usage_per_association_table
-        WHERE username=? AND bank=?
+        WHERE assoc_id=?
         ORDER BY period ASC
         """,
-        (user, bank),
+        (assoc_id,),
     )
     period_rows = cur.fetchall()
     usage_factors = [row[1] for row in period_rows]
@@ -195,59 +513,119 @@ def calc_usage_factor(
     if len(user_jobs) > 0:
         user_jobs.sort(key=lambda job: job.t_inactive)
 
-        per_job_factors = []
-        for job in user_jobs:
-            weighted_usage = (
-                (job.nnodes * node_weight)
-                + (job.ncores * core_weight)
-                + (job.ngpus * gpu_weight)
-            ) * job.elapsed
-            per_job_factors.append(round(weighted_usage, 5))
+        per_job_factors = [
+            calc_weighted_usage(
+                job.nnodes,
+                job.ncores,
+                job.ngpus,
+                job.elapsed,
+                node_weight,
+                core_weight,
+                gpu_weight,
+            )
+            for job in user_jobs
+        ]
 
         last_t_inactive = user_jobs[-1].t_inactive
         usg_current = sum(per_job_factors)
 
-        update_t_inactive(conn, last_t_inactive, user, bank)
+        update_t_inactive(conn, last_t_inactive, assoc_id)
 
-    if len(user_jobs) == 0 and (float(end_hl) > (time.time() - hl_period)):
+    if periods is None:
+        new_half_life_period = float(end_hl) < (time.time() - hl_period)
+        periods = 1
+    else:
+        new_half_life_period = periods > 0
+
+    if len(user_jobs) == 0 and not new_half_life_period:
         # no new jobs in the current half-life period; the job usage for the
         # association stays exactly the same
         usg_historical = sum(usage_factors)
-    elif len(user_jobs) == 0 and (float(end_hl) < (time.time() - hl_period)):
+    elif len(user_jobs) == 0:
         # no new jobs in the new half-life period; previous job usage periods need
         # to have a half-life decay applied to them
-        usg_historical = apply_decay_factor(conn, user, bank, userid)
-
-        update_curr_usg_col(
-            conn,
-            usg_current,
-            user,
-            bank,
-            userid,
-        )
-        update_hist_usg_col(conn, usg_historical, user, bank)
-    elif (last_t_inactive - float(end_hl)) < hl_period:
+        usg_historical = apply_decay_factor(conn, assoc_id, periods)
+
+        update_curr_usg_col(conn, usg_current, assoc_id)
+        update_hist_usg_col(conn, usg_historical, assoc_id)
+    elif not new_half_life_period and (last_t_inactive - float(end_hl)) < hl_period:
         # found new jobs in the current half-life period; we need to 1) add the
         # new jobs to the current usage period, and 2) update the historical usage
         # period
         usg_current += usage_factors[0]
         usg_historical = usg_current + sum(usage_factors[1:])
 
-        update_curr_usg_col(conn, usg_current, user, bank, userid)
-        update_hist_usg_col(conn, usg_historical, user, bank)
+        update_curr_usg_col(conn, usg_current, assoc_id)
+        update_hist_usg_col(conn, usg_historical, assoc_id)
     else:
         # found new jobs in the new half-life period
         # apply decay factor to past usage periods of a user's jobs
-        usg_past = apply_decay_factor(conn, user, bank, userid)
-        usg_historical = usg_current + usg_past
-
-        update_curr_usg_col(conn, usg_historical, user, bank, userid)
-        update_hist_usg_col(conn, usg_historical, user, bank)
+        usg_past = apply_decay_factor(conn, assoc_id, periods)
+
+        # jobs that finished before the new half-life period began are added to the
+        # period they finished in instead of the current one; jobs older than the
+        # last half-life period that was updated are counted in that period
+        decay = get_decay_factor(cur)
+        start = float(end_hl) + (periods * hl_period)
+        usg_current = 0.0
+        usg_gap = defaultdict(float)
+        for job, usage in zip(user_jobs, per_job_factors):
+            period = 0
+            if job.t_inactive < start:
+                period = min(math.ceil((start - job.t_inactive) / hl_period), periods)
+            if period == 0:
+                usg_current += usage
+            elif period < len(usage_factors):
+                usg_gap[period] += usage * decay**period
+        cur.executemany(
+            """
+            UPDATE job_usage_per_association_table SET value=value + ?
+            WHERE assoc_id=? AND period=?
+            """,
+            [(usage, assoc_id, period) for period, usage in usg_gap.items()],
+        )
+        # period 0 only holds the usage of the jobs in the new half-life period;
+        # the historical job usage is the sum of every period, including the ones
+        # the jobs that finished during the gap were added to
+        update_curr_usg_col(conn, usg_current, assoc_id)
+        cur.execute(
+            """
+            SELECT SUM(value) FROM job_usage_per_association_table WHERE assoc_id=?
+            """,
+            (assoc_id,),
+        )
+        usg_historical = cur.fetchone()[0] or 0.0
+        update_hist_usg_col(conn, usg_historical, assoc_id)
 
     return usg_historical
 
 
-def check_end_hl(acct_conn, pdhl):
+def get_elapsed_periods(end_hl, pdhl):
+    """
+    Return the number of half-life periods that have ended since the last time the
+    end of the current half-life period was advanced.
+
+    Args:
+        end_hl: The timestamp stored in the end_half_life_period column.
+        pdhl: The length of a half-life period, in seconds.
+    """
+    elapsed = time.time() - pdhl - float(end_hl)
+    if elapsed <= 0:
+        return 0
+    return math.ceil(elapsed / pdhl)
+
+
+def check_end_hl(acct_conn, pdhl, periods=None):
+    """
+    Advance the end of the current half-life period past every half-life period
+    that has ended.
+
+    Args:
+        acct_conn: The SQLite Connection object.
+        pdhl: The length of a half-life period, in seconds.
+        periods: The number of half-life periods to advance. If not passed in, it
+            is computed from the current time.
+    """
     hl_period = pdhl
 
     cur = acct_conn.cursor()
@@ -262,66 +640,209 @@ def check_end_hl(acct_conn, pdhl):
     row = cur.fetchone()
     end_hl = row[0]
 
-    if float(end_hl) < (time.time() - hl_period):
+    if periods is None:
+        periods = get_elapsed_periods(end_hl, hl_period)
+
+    if periods > 0:
         # update new end of half-life period timestamp
         update_timestamp_stmt = """
             UPDATE t_half_life_period_table
             SET end_half_life_period=?
             WHERE cluster='cluster'
             """
-        acct_conn.execute(update_timestamp_stmt, ((float(end_hl) + hl_period),))
+        acct_conn.execute(
+            update_timestamp_stmt, ((float(end_hl) + (periods * hl_period)),)
+        )
 
 
-def calc_bank_usage(cur, bank):
-    # fetch the job_usage value for every user under the passed-in bank
-    s_associations = "SELECT job_usage FROM association_table WHERE bank=?"
-    cur.execute(s_associations, (bank,))
-    job_usage_list = cur.fetchall()
+def rollup_bank_usage(cur, banks=None):
+    """
+    Recompute the job_usage of banks in the bank_table. A bank with no sub-banks
+    gets the total job usage of the associations under it, and every other bank gets
+    the total job usage of its sub-banks.
 
-    total_usage = 0.0
-    if job_usage_list:
-        # aggregate job usage for bank
-        for job_usage in job_usage_list:
-            total_usage += job_usage[0]
+    The whole rollup is a single statement: a recursive CTE walks up to the root
+    bank from a set of starting banks, carrying each starting bank's usage, and the
+    sums per bank are written back with one UPDATE.
 
-    # update the bank_table with the total job usage for the bank
-    u_job_usage = "UPDATE bank_table SET job_usage=? WHERE bank=?"
-    cur.execute(
-        u_job_usage,
-        (
-            total_usage,
-            bank,
-        ),
-    )
+    Args:
+        cur: The SQLite Cursor object.
+        banks: An optional list of banks. If passed in, only the ancestors of these
+            banks are updated, using the job_usage already stored for every other
+            bank (including the passed-in banks themselves); otherwise, every bank
+            is updated starting from the associations.
+    """
+    # the depth checks stop a walk if the bank_table ever contains a cycle
+    max_depth = "(SELECT COUNT(*) FROM bank_table)"
+    if banks is None:
+        params = []
+        # start from every bank with no sub-banks and the associations under it
+        start = """
+            association_usage(bank, job_usage) AS (
+                SELECT bank, SUM(job_usage) FROM association_table GROUP BY bank
+            ),
+            start(bank_id, bank, parent_bank, job_usage) AS (
+                SELECT leaf.bank_id, leaf.bank, leaf.parent_bank,
+                       COALESCE(association_usage.job_usage, 0.0)
+                FROM bank_table AS leaf
+                LEFT JOIN association_usage ON association_usage.bank=leaf.bank
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM bank_table AS child WHERE child.parent_bank=leaf.bank
+                )
+            ),
+            """
+        walk_filter = ""
+        target_filter = ""
+    else:
+        if len(banks) == 0:
+            return
+        params = list(banks)
+        # collect every ancestor of the passed-in banks, then start from their
+        # sub-banks that are not being updated themselves with their stored usage
+        start = f"""
+            given(bank) AS (VALUES {", ".join(["(?)"] * len(params))}),
+            ancestors(bank, depth) AS (
+                SELECT parent_bank, 0 FROM bank_table
+                WHERE bank IN (SELECT bank FROM given)
+                UNION
+                SELECT bank_table.parent_bank, ancestors.depth + 1
+                FROM ancestors JOIN bank_table ON bank_table.bank=ancestors.bank
+                WHERE ancestors.depth < {max_depth}
+            ),
+            targets(bank) AS (
+                SELECT bank FROM ancestors EXCEPT SELECT bank FROM given
+            ),
+            start(bank_id, bank, parent_bank, job_usage) AS (
+                SELECT bank_id, bank, parent_bank, job_usage FROM bank_table
+                WHERE parent_bank IN (SELECT bank FROM targets)
+                AND bank NOT IN (SELECT bank FROM targets)
+            ),
+            """
+        walk_filter = "AND parent.bank IN (SELECT bank FROM targets)"
+        target_filter = "WHERE bank IN (SELECT bank FROM targets)"
+
+    rollup_cte = f"""
+        WITH RECURSIVE
+            {start}
+            lineage(bank_id, bank, parent_bank, job_usage, depth) AS (
+                SELECT bank_id, bank, parent_bank, job_usage, 0 FROM start
+                UNION ALL
+                SELECT parent.bank_id, parent.bank, parent.parent_bank,
+                       lineage.job_usage, lineage.depth + 1
+                FROM lineage JOIN bank_table AS parent ON parent.bank=lineage.parent_bank
+                WHERE lineage.depth < {max_depth} {walk_filter}
+            ),
+            totals(bank_id, job_usage) AS (
+                SELECT bank_id, SUM(job_usage) FROM lineage {target_filter}
+                GROUP BY bank_id
+            )
+        """
 
-    return total_usage
+    if sqlite3.sqlite_version_info >= (3, 33, 0):
+        cur.execute(
+            f"""
+            {rollup_cte}
+            UPDATE bank_table SET job_usage=totals.job_usage
+            FROM totals WHERE bank_table.bank_id=totals.bank_id
+            """,
+            params,
+        )
+    else:
+        # UPDATE ... FROM is only available starting in SQLite 3.33.0
+        cur.execute(f"{rollup_cte} SELECT job_usage, bank_id FROM totals", params)
+        cur.executemany(
+            "UPDATE bank_table SET job_usage=? WHERE bank_id=?", cur.fetchall()
+        )
 
 
-def calc_parent_bank_usage(acct_conn, cur, bank):
-    # find all sub-banks of the current bank
-    cur.execute("SELECT bank FROM bank_table WHERE parent_bank=?", (bank,))
-    sub_banks = cur.fetchall()
+def get_new_jobs(cur, stats=None):
+    """
+    Fetch the jobs that have finished since the last job counted for every
+    association.
 
-    total_usage = 0.0
-    if len(sub_banks) == 0:
-        # we've reached a bank with no sub banks, so take the usage from that bank
-        # and add it to the total usage for the parent bank
-        total_usage = calc_bank_usage(cur, bank)
-    else:
-        # for each sub bank, keep traversing to find the usage for
-        # each bank with users in it
-        for sub_bank in sub_banks:
-            sub_usage = calc_parent_bank_usage(acct_conn, cur, sub_bank[0])
-            total_usage += sub_usage
+    Args:
+        cur: The SQLite Cursor object.
+        stats: An optional UpdateUsageStats object to record the timings and
+            counts of fetching the jobs in.
 
-    # update the usage for this bank itself
-    u_job_usage = "UPDATE bank_table SET job_usage=? WHERE bank=?"
-    cur.execute(u_job_usage, (total_usage, bank))
+    Returns:
+        a dictionary keyed by (userid, bank) of lists of JobRecord objects.
+    """
+    # fetch the last time the job_usage_per_association_table was reconfigured
+    # (if at all)
+    last_reconfigured = cur.execute(
+        "SELECT value FROM config_table WHERE key='reconfigure_time'"
+    ).fetchone()
+    last_reconfigured = last_reconfigured[0] if last_reconfigured is not None else 0.0
+
+    # fetch new jobs for every association based on their last completed job
+    r_expr, jobspec_expr, joins = job_data.column_sql(cur.connection, alias="r")
+    s_new_jobs = f"""
+        SELECT r.userid,r.id,r.t_submit,r.t_run,r.t_inactive,r.ranks,{r_expr},{jobspec_expr},
+        r.project,r.bank,r.requested_duration,r.actual_duration,b.ignore_older_than
+        FROM jobs r{joins} JOIN association_table a
+        ON r.bank = a.bank JOIN job_usage_factor_table j
+        ON a.assoc_id = j.assoc_id AND r.userid = j.userid
+        LEFT JOIN bank_table b
+        ON r.bank = b.bank WHERE r.t_inactive > j.last_job_timestamp
+        AND r.t_inactive > b.ignore_older_than
+        AND r.t_inactive > ?
+    """
+    if stats is None:
+        stats = UpdateUsageStats(cur.connection)
+    with stats.phase("read_new_jobs"):
+        cur.execute(s_new_jobs, (last_reconfigured,))
+        new_jobs = cur.fetchall()
+    stats.count("job_rows_read", len(new_jobs))
+    # this includes parsing the R of every job
+    with stats.phase("convert_jobs"):
+        new_job_records = j.convert_to_obj(new_jobs)
+    stats.count("jobs_processed", len(new_job_records))
+    # convert new jobs to a dictionary where they key is a tuple of the user ID and bank
+    # associated with the job
+    association_jobs = defaultdict(list)
+    for job in new_job_records:
+        key = (job.userid, job.bank)
+        association_jobs[key].append(job)
 
-    return total_usage
+    return association_jobs
+
+
+def get_half_life(cur):
+    """Fetch PriorityDecayHalfLife, in seconds."""
+    return float(
+        cur.execute(
+            "SELECT value FROM config_table WHERE key='priority_decay_half_life'"
+        ).fetchone()[0]
+    )
+
+
+def get_end_hl(cur):
+    """Fetch the timestamp stored in the end_half_life_period column."""
+    cur.execute(
+        "SELECT end_half_life_period FROM t_half_life_period_table WHERE cluster='cluster'"
+    )
+    return cur.fetchone()[0]
+
+
+def update_job_usage(acct_conn, chunk_size=None, stats=None):
+    """
+    Update the job usage of every association and bank in the flux-accounting DB.
 
+    Args:
+        acct_conn: The SQLite Connection object.
+        chunk_size: An optional number of associations to update per transaction. If
+            passed in, the update is split up into several short transactions so
+            that other writes to the DB can run in between them; otherwise, the
+            whole update is done in a single transaction.
+        stats: An optional UpdateUsageStats object to record the timings and row
+            counts of every phase of the update in.
+    """
+    if stats is None:
+        stats = UpdateUsageStats(acct_conn)
+    if chunk_size is not None:
+        return update_job_usage_chunked(acct_conn, chunk_size, stats)
 
-def update_job_usage(acct_conn):
     LOGGER.info(
         "beginning job-usage update for flux-accounting DB; "
         "slow response times may occur"
@@ -331,12 +852,7 @@ def update_job_usage(acct_conn):
 
     with acct_conn:
         # fetch timestamp of the end of the current half-life period
-        s_end_hl = """
-            SELECT end_half_life_period FROM t_half_life_period_table WHERE cluster='cluster'
-            """
-        cur.execute(s_end_hl)
-        row = cur.fetchone()
-        end_hl = row[0]
+        end_hl = get_end_hl(cur)
 
         # fetch usage weights with fallback defaults
         node_weight, core_weight, gpu_weight = get_usage_weights(cur)
@@ -344,82 +860,263 @@ def update_job_usage(acct_conn):
         # begin transaction for all of the updates in the DB
         acct_conn.execute("BEGIN TRANSACTION")
         s_assoc = """
-            SELECT a.username, a.userid, a.bank, a.default_bank, j.last_job_timestamp
+            SELECT a.assoc_id, a.username, a.userid, a.bank, a.default_bank,
+                   j.last_job_timestamp
             FROM association_table a
             LEFT JOIN job_usage_factor_table j
-            ON a.username = j.username AND a.bank = j.bank
+            ON a.assoc_id = j.assoc_id
             """
-        cur.execute(s_assoc)
-        result = cur.fetchall()
-
-        # fetch the last time the job_usage_per_association_table was reconfigured
-        # (if at all)
-        last_reconfigured = cur.execute(
-            "SELECT value FROM config_table WHERE key='reconfigure_time'"
-        ).fetchone()
-        last_reconfigured = (
-            last_reconfigured[0] if last_reconfigured is not None else 0.0
-        )
+        with stats.phase("read_associations"):
+            cur.execute(s_assoc)
+            result = cur.fetchall()
+        stats.count("associations_read", len(result))
 
-        # fetch new jobs for every association based on their last completed job
-        s_new_jobs = """
-            SELECT r.userid,r.id,r.t_submit,r.t_run,r.t_inactive,r.ranks,r.R,r.jobspec,
-            r.project,r.bank,r.requested_duration,r.actual_duration,b.ignore_older_than
-            FROM jobs r LEFT JOIN job_usage_factor_table j
-            ON r.userid = j.userid AND r.bank = j.bank
-            LEFT JOIN bank_table b
-            ON r.bank = b.bank WHERE r.t_inactive > j.last_job_timestamp
-            AND r.t_inactive > b.ignore_older_than
-            AND r.t_inactive > ?
-        """
-        cur.execute(s_new_jobs, (last_reconfigured,))
-        new_jobs = cur.fetchall()
-        new_job_records = j.convert_to_obj(new_jobs)
-        # convert new jobs to a dictionary where they key is a tuple of the user ID and bank
-        # associated with the job
-        association_jobs = defaultdict(list)
-        for job in new_job_records:
-            key = (job.userid, job.bank)
-            association_jobs[key].append(job)
+        association_jobs = get_new_jobs(cur, stats)
 
         # get PriorityDecayHalfLife
-        pdhl = float(
-            cur.execute(
-                "SELECT value FROM config_table WHERE key='priority_decay_half_life'"
-            ).fetchone()[0]
-        )
-
-        # update the job usage for every user in the association_table
-        for row in result:
-            calc_usage_factor(
-                conn=acct_conn,
-                pdhl=pdhl,
-                user=row["username"],
-                bank=row["bank"],
-                userid=row["userid"],
-                end_hl=end_hl,
-                user_jobs=association_jobs[(row["userid"], row["bank"])],
-                node_weight=node_weight,
-                core_weight=core_weight,
-                gpu_weight=gpu_weight,
-            )
-
-        # find the root bank in the flux-accounting database
-        s_root_bank = "SELECT bank FROM bank_table WHERE parent_bank=''"
-        cur.execute(s_root_bank)
-        result = cur.fetchall()
-        parent_bank = result[0][0]  # store the name of the root bank
+        pdhl = get_half_life(cur)
+
+        # a run can be missed for several half-life periods (e.g during an outage);
+        # all of the periods that have ended are applied at once
+        periods = get_elapsed_periods(end_hl, pdhl)
+        stats.count("half_life_periods", periods)
+
+        # update the job usage for every association that has new jobs
+        active = set()
+        with stats.phase("update_active_associations"):
+            for row in result:
+                user_jobs = association_jobs.get((row["userid"], row["bank"]))
+                if not user_jobs:
+                    continue
+                calc_usage_factor(
+                    conn=acct_conn,
+                    pdhl=pdhl,
+                    user=row["username"],
+                    bank=row["bank"],
+                    userid=row["userid"],
+                    end_hl=end_hl,
+                    user_jobs=user_jobs,
+                    node_weight=node_weight,
+                    core_weight=core_weight,
+                    gpu_weight=gpu_weight,
+                    periods=periods,
+                    assoc_id=row["assoc_id"],
+                )
+                active.add(row["assoc_id"])
+        stats.count("associations_updated", len(active))
+
+        # the job usage of an association without new jobs only changes once a new
+        # half-life period begins
+        if periods > 0:
+            with stats.phase("decay_idle_associations"):
+                decayed = decay_idle_associations(
+                    cur, active, get_decay_factor(cur), periods
+                )
+            stats.count("associations_decayed", decayed)
 
         # update the job usage for every bank in the bank_table
-        calc_parent_bank_usage(acct_conn, cur, parent_bank)
+        with stats.phase("rollup_bank_usage"):
+            rollup_bank_usage(cur)
 
-        check_end_hl(acct_conn, pdhl)
+        with stats.phase("check_end_hl"):
+            check_end_hl(acct_conn, pdhl, periods)
 
+        stats.finish()
         LOGGER.info("job-usage update for flux-accounting DB now complete")
 
         return 0
 
 
+def get_update_usage_checkpoint(cur):
+    """
+    Fetch the progress of an unfinished chunked job-usage update, or None if there
+    is no unfinished update.
+    """
+    row = cur.execute(
+        "SELECT value FROM config_table WHERE key=?", (UPDATE_USAGE_CHECKPOINT,)
+    ).fetchone()
+    return json.loads(row[0]) if row is not None else None
+
+
+def save_update_usage_checkpoint(cur, checkpoint):
+    """Record the progress of a chunked job-usage update in config_table."""
+    cur.execute(
+        "INSERT INTO config_table (key, value) VALUES (?, ?) "
+        "ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+        (UPDATE_USAGE_CHECKPOINT, json.dumps(checkpoint)),
+    )
+
+
+def update_usage_chunk(
+    acct_conn, checkpoint, chunk_size, association_jobs, stats, pdhl, decay, weights
+):
+    """
+    Update the job usage of the next chunk of at most chunk_size associations after
+    the one saved in checkpoint, and save the key of the last association updated
+    in checkpoint in the same transaction.
+
+    Args:
+        acct_conn: The SQLite Connection object.
+        checkpoint: The checkpoint of the job-usage update, as returned by
+            get_update_usage_checkpoint().
+        chunk_size: The number of associations to update.
+        association_jobs: A dictionary of the new jobs of every association, keyed
+            by (userid, bank).
+        stats: An UpdateUsageStats object to record the timings and row counts in.
+        pdhl: The length of a half-life period in seconds.
+        decay: The decay factor applied once per half-life period.
+        weights: A tuple of the node, core, and GPU weights.
+
+    Returns:
+        True if a chunk of associations was updated, False if every association
+        has already been updated.
+    """
+    node_weight, core_weight, gpu_weight = weights
+    end_hl = checkpoint["end_hl"]
+    periods = checkpoint["periods"]
+    cur = acct_conn.cursor()
+    with acct_conn:
+        acct_conn.execute("BEGIN TRANSACTION")
+        with stats.phase("read_associations"):
+            cur.execute(
+                """
+                SELECT a.assoc_id, a.username, a.userid, a.bank,
+                       a.job_usage != 0 OR EXISTS (
+                           SELECT 1 FROM job_usage_per_association_table p
+                           WHERE p.assoc_id=a.assoc_id AND p.value != 0
+                       ) AS has_usage
+                FROM association_table a
+                WHERE (a.username, a.bank) > (?, ?)
+                ORDER BY a.username, a.bank
+                LIMIT ?
+                """,
+                (checkpoint["username"], checkpoint["bank"], chunk_size),
+            )
+            rows = cur.fetchall()
+        if not rows:
+            return False
+        stats.count("associations_read", len(rows))
+        stats.count("chunks")
+
+        idle = []
+        with stats.phase("update_active_associations"):
+            for row in rows:
+                user_jobs = association_jobs.get((row["userid"], row["bank"]))
+                if user_jobs:
+                    calc_usage_factor(
+                        conn=acct_conn,
+                        pdhl=pdhl,
+                        user=row["username"],
+                        bank=row["bank"],
+                        userid=row["userid"],
+                        end_hl=end_hl,
+                        user_jobs=user_jobs,
+                        node_weight=node_weight,
+                        core_weight=core_weight,
+                        gpu_weight=gpu_weight,
+                        periods=periods,
+                        assoc_id=row["assoc_id"],
+                    )
+                    stats.count("associations_updated")
+                elif periods > 0 and row["has_usage"]:
+                    idle.append(row["assoc_id"])
+        with stats.phase("decay_idle_associations"):
+            decay_associations(cur, idle, decay, periods)
+        stats.count("associations_decayed", len(idle))
+
+        checkpoint["username"] = rows[-1]["username"]
+        checkpoint["bank"] = rows[-1]["bank"]
+        save_update_usage_checkpoint(cur, checkpoint)
+
+    return True
+
+
+def update_job_usage_chunked(acct_conn, chunk_size, stats=None):
+    """
+    Update the job usage of every association and bank in the flux-accounting DB in
+    several short transactions of at most chunk_size associations each.
+
+    Associations are updated in order of their (username, bank) key. After every
+    chunk, the key of the last association updated is saved in a checkpoint in
+    config_table in the same transaction as the updates themselves, along with the
+    end of the half-life period and the number of half-life periods that have
+    ended when the update began. If an update does not finish, the next one resumes
+    from the checkpoint with the same values, so every association has a new
+    half-life period applied to it exactly once. The end of the half-life period is
+    only advanced after every association has been updated.
+
+    Args:
+        acct_conn: The SQLite Connection object.
+        chunk_size: The number of associations to update per transaction.
+        stats: An optional UpdateUsageStats object to record the timings and row
+            counts of every phase of the update in.
+    """
+    if int(chunk_size) < 1:
+        raise ValueError("chunk size must be a positive integer")
+    chunk_size = int(chunk_size)
+    if stats is None:
+        stats = UpdateUsageStats(acct_conn)
+
+    LOGGER.info(
+        "beginning job-usage update for flux-accounting DB in chunks of %d "
+        "associations",
+        chunk_size,
+    )
+    acct_conn.row_factory = sqlite3.Row
+    cur = acct_conn.cursor()
+
+    with acct_conn:
+        checkpoint = get_update_usage_checkpoint(cur)
+        if checkpoint is None:
+            end_hl = get_end_hl(cur)
+            checkpoint = {
+                "end_hl": end_hl,
+                "periods": get_elapsed_periods(end_hl, get_half_life(cur)),
+                "username": "",
+                "bank": "",
+            }
+            save_update_usage_checkpoint(cur, checkpoint)
+        else:
+            LOGGER.info(
+                "resuming job-usage update after association %s:%s",
+                checkpoint["bank"],
+                checkpoint["username"],
+            )
+
+        node_weight, core_weight, gpu_weight = get_usage_weights(cur)
+        decay = get_decay_factor(cur)
+        pdhl = get_half_life(cur)
+        association_jobs = get_new_jobs(cur, stats)
+
+    end_hl = checkpoint["end_hl"]
+    periods = checkpoint["periods"]
+    stats.count("half_life_periods", periods)
+    while update_usage_chunk(
+        acct_conn,
+        checkpoint,
+        chunk_size,
+        association_jobs,
+        stats,
+        pdhl=pdhl,
+        decay=decay,
+        weights=(node_weight, core_weight, gpu_weight),
+    ):
+        pass
+
+    with acct_conn:
+        acct_conn.execute("BEGIN TRANSACTION")
+        with stats.phase("rollup_bank_usage"):
+            rollup_bank_usage(cur)
+        with stats.phase("check_end_hl"):
+            check_end_hl(acct_conn, pdhl, periods)
+        cur.execute("DELETE FROM config_table WHERE key=?", (UPDATE_USAGE_CHECKPOINT,))
+
+    stats.finish()
+    LOGGER.info("job-usage update for flux-accounting DB now complete")
+
+    return 0
+
+
 def scrub_old_jobs(conn, num_weeks=26):
     """
     Scrub jobs from the jobs table by removing any record that is older than
@@ -434,6 +1131,9 @@ def scrub_old_jobs(conn, num_weeks=26):
     # fetch all jobs that finished before this time
     select_stmt = "DELETE FROM jobs WHERE t_inactive < ?"
     cur.execute(select_stmt, (cutoff_time,))
+    if job_data.has_documents(conn):
+        # remove the R and jobspec documents that only the removed jobs used
+        job_data.prune(cur)
     conn.commit()
 
     return 0
@@ -527,6 +1227,7 @@ def view_usage_report(
     report_type=None,
     job_size_bins=None,
     time_unit=None,
+    page_size=None,
 ):
     """
     Calculate a usage report for a user, bank, or association.
@@ -542,6 +1243,8 @@ def view_usage_report(
         job_size_bins: A list of job sizes to bin data into.
         time_unit: The time unit used for calculating usage (per hour, minute, or
             second).
+        page_size: If set, return a generator of pages of at most page_size lines
+            of the report each instead of a single string.
     """
     if start:
         start = util.parse_timestamp(start)
@@ -570,16 +1273,19 @@ def view_usage_report(
     total = {}
     ktotal = {}
 
-    result = j.view_jobs(
+    # read the jobs a page at a time instead of formatting all of them at once
+    pages = j.view_jobs(
         conn,
         fields="{username} {bank} {nnodes} {t_run} {t_inactive}",
+        page_size=fluxacct.accounting.PAGE_SIZE,
         after_start_time=(start - 7 * 24 * 60 * 60),
         before_end_time=end,
         user=user,
         bank=bank,
     )
+    lines = itertools.chain.from_iterable(page.split("\n") for page in pages)
 
-    for i, line in enumerate(result.split("\n")):
+    for i, line in enumerate(lines):
         if i == 0:
             # skip header line
             continue
@@ -622,15 +1328,18 @@ def view_usage_report(
                     total[sizebin] = total.get(sizebin, 0) + jobusage
                     break
 
-    result = ""
-    result += format_header(report_type, time_unit, sizebins)
+    report = [format_header(report_type, time_unit, sizebins)]
 
     for key in sorted(ktotal.keys(), key=lambda k: ktotal[k], reverse=True):
-        result += format_line(key, data[key], time_unit, sizebins)
+        report.append(format_line(key, data[key], time_unit, sizebins))
 
-    result += format_line("TOTAL", total, time_unit, sizebins)
+    report.append(format_line("TOTAL", total, time_unit, sizebins))
 
-    return result
+    if page_size:
+        return (
+            "".join(report[i : i + page_size]) for i in range(0, len(report), page_size)
+        )
+    return "".join(report)
 
 
 def clear_usage_period_columns(cur, bank):
@@ -641,11 +1350,16 @@ def clear_usage_period_columns(cur, bank):
         cur: The SQLite Cursor object.
         bank: The bank being cleared.
     """
+    assoc_ids = "SELECT assoc_id FROM association_table WHERE bank=?"
     cur.execute(
-        "UPDATE job_usage_per_association_table SET value=0.0 WHERE bank=?", (bank,)
+        "UPDATE job_usage_per_association_table SET value=0.0 "
+        f"WHERE assoc_id IN ({assoc_ids})",
+        (bank,),
     )
     cur.execute(
-        "UPDATE job_usage_factor_table SET last_job_timestamp=0 WHERE bank=?", (bank,)
+        "UPDATE job_usage_factor_table SET last_job_timestamp=0 "
+        f"WHERE assoc_id IN ({assoc_ids})",
+        (bank,),
     )
 
 
@@ -674,8 +1388,6 @@ def clear_usage(conn, cur, banks, ignore_older_than=None):
             )
             # reset all usage periods for associations under this bank
             clear_usage_period_columns(cur, bank)
-            # propagate new usage up parent banks to root bank
-            util.update_parent_bank_usage(conn, bank)
             if ignore_older_than is not None:
                 # update bank_table with new ignore timestamp
                 cur.execute(
@@ -695,7 +1407,9 @@ def clear_usage(conn, cur, banks, ignore_older_than=None):
                         bank,
                     ),
                 )
-            # commit changes
-            conn.commit()
+        # propagate new usage up parent banks to root bank
+        rollup_bank_usage(cur, banks)
+        # commit changes
+        conn.commit()
 
     return 0
@@ -11,19 +11,55 @@
 ###############################################################
 import json
 
-from flux.resource import ResourceSet
 from flux.job.JobID import JobID
 from flux.constants import FLUX_USERID_UNKNOWN
 from fluxacct.accounting import formatter as fmt
+from fluxacct.accounting import job_archive
+from fluxacct.accounting import job_data
+from fluxacct.accounting import rv1
 from fluxacct.accounting import util
 from fluxacct.accounting import JOB_RECORD_FIELDS, JOB_RECORD_FLOAT_FIELDS
 
+# the fields job records can be sorted by and the SQL expression each one sorts on
+JOB_SORT_KEYS = {
+    "jobid": "CAST(id AS INTEGER)",
+    "userid": "userid",
+    "t_submit": "t_submit",
+    "t_run": "t_run",
+    "t_inactive": "t_inactive",
+    "project": "IFNULL(project, '')",
+    "bank": "IFNULL(bank, '')",
+    "requested_duration": "requested_duration",
+    "actual_duration": "actual_duration",
+    "duration_delta": "requested_duration - actual_duration",
+}
+
 
 class JobRecord:
     """
     A record of an individual job.
+
+    The username of the job's owner and the formatted jobid are not looked up
+    until they are first used. If the job's resource counts are not passed in,
+    they are computed from its R the first time one of them is used.
     """
 
+    __slots__ = (
+        "userid",
+        "t_submit",
+        "t_run",
+        "t_inactive",
+        "resources",
+        "project",
+        "bank",
+        "requested_duration",
+        "actual_duration",
+        "jobid_format",
+        "_jobid",
+        "_username",
+        "_counts",
+    )
+
     def __init__(
         self,
         userid,
@@ -37,24 +73,56 @@ class JobRecord:
         bank,
         requested_duration,
         actual_duration,
-        ncores,
-        ngpus,
+        ncores=None,
+        ngpus=None,
         jobid_format="f58",
     ):
         self.userid = userid
-        self.username = util.get_username(userid)
-        self.jobid = util.JobIDFormat(jobid, jobid_format=jobid_format)
+        self._username = None
+        self._jobid = jobid
+        self.jobid_format = jobid_format
         self.t_submit = t_submit
         self.t_run = t_run
         self.t_inactive = t_inactive
-        self.nnodes = nnodes
         self.resources = resources
         self.project = project
         self.bank = bank
         self.requested_duration = requested_duration
         self.actual_duration = actual_duration
-        self.ncores = ncores
-        self.ngpus = ngpus
+        if None in (nnodes, ncores, ngpus):
+            self._counts = None
+        else:
+            self._counts = (nnodes, ncores, ngpus)
+
+    @property
+    def username(self):
+        if self._username is None:
+            # the lookup is cached across records by the identity cache
+            self._username = util.get_username(self.userid)
+        return self._username
+
+    @property
+    def jobid(self):
+        if not isinstance(self._jobid, util.JobIDFormat):
+            self._jobid = util.JobIDFormat(self._jobid, jobid_format=self.jobid_format)
+        return self._jobid
+
+    def _resource_counts(self):
+        if self._counts is None:
+            self._counts = rv1.resource_counts(self.resources)
+        return self._counts
+
+    @property
+    def nnodes(self):
+        return self._resource_counts()[0]
+
+    @property
+    def ncores(self):
+        return self._resource_counts()[1]
+
+    @property
+    def ngpus(self):
+        return self._resource_counts()[2]
 
     @property
     def elapsed(self):
@@ -69,14 +137,12 @@ class JobRecord:
         return self.requested_duration - self.actual_duration
 
 
-def convert_to_str(job_records, fmt_string=None):
+def default_format(job_records):
     """
-    Convert the results of a query to the jobs table to a readable string
-    that can either be output to stdout or written to a file.
+    Build a format string for job records which lists every field in
+    JOB_RECORD_FIELDS, with each column wide enough for its header and the
+    values in job_records.
     """
-    if fmt_string:
-        output = fmt.JobsFormatter(fmt_string)
-        return output.build_table(job_records)
 
     def field_str(record, field):
         val = getattr(record, field)
@@ -99,7 +165,16 @@ def convert_to_str(job_records, fmt_string=None):
         else:
             parts.append(f"{{{field}:<{width}}}")
 
-    fmt_string = " | ".join(parts)
+    return " | ".join(parts)
+
+
+def convert_to_str(job_records, fmt_string=None):
+    """
+    Convert the results of a query to the jobs table to a readable string
+    that can either be output to stdout or written to a file.
+    """
+    if not fmt_string:
+        fmt_string = default_format(job_records)
 
     output = fmt.JobsFormatter(fmt_string)
     return output.build_table(job_records)
@@ -114,13 +189,11 @@ def convert_to_obj(rows, jobid_format="f58"):
 
     for row in rows:
         try:
-            # attempt to create a ResourceSet from R
-            rset = ResourceSet(row[6])
-            job_nnodes = rset.nnodes
-            job_ncores = rset.ncores
-            job_ngpus = rset.ngpus
+            # attempt to count the resources in R; this can't be put off until the
+            # counts are used because jobs whose R can't be read are left out
+            job_nnodes, job_ncores, job_ngpus = rv1.resource_counts(row[6])
         except (ValueError, TypeError, KeyError):
-            # can't convert R to a ResourceSet object; skip it
+            # can't count the resources in R; skip it
             continue
 
         job_record = JobRecord(
@@ -240,47 +313,93 @@ def get_userid_from_db(cursor, username):
     return FLUX_USERID_UNKNOWN
 
 
-def get_jobs(conn, **kwargs):
+def parse_sort_key(sort):
     """
-    A function to return jobs from the jobs table in the flux-accounting
-    database. The query can be tuned to filter jobs by:
+    Parse a key to sort job records by, which can be prefixed with "-" to sort in
+    descending order.
 
-    - userid
-    - jobs that started after a certain time
-    - jobs that completed before a certain time
-    - jobid
-    - project
-    - bank
-    - requested duration
-    - actual duration
+    Args:
+        sort: The name of the field to sort by.
 
-    The function will execute a SQL query and return a list of jobs. If no
-    jobs are found, an empty list is returned.
+    Returns:
+        A tuple of the SQL expression to sort by and whether to sort in descending
+        order.
     """
-    # find out which args were passed and place them in a dict
-    valid_params = {
-        "user",
-        "after_start_time",
-        "before_end_time",
-        "jobid",
-        "project",
-        "bank",
-        "requested_duration",
-        "actual_duration",
-        "duration_delta",
-    }
-    params = {
-        key: val
-        for key, val in kwargs.items()
-        if val is not None and key in valid_params
-    }
+    descending = sort.startswith("-")
+    key = sort[1:] if descending else sort
+    if key not in JOB_SORT_KEYS:
+        raise ValueError(
+            f"invalid sort key: {key}; valid keys are: {','.join(JOB_SORT_KEYS)}"
+        )
+    return JOB_SORT_KEYS[key], descending
 
-    select_stmt = (
-        "SELECT userid,id,t_submit,t_run,t_inactive,ranks,R,jobspec,project,bank,"
-        "requested_duration,actual_duration FROM jobs"
+
+def parse_count(name, value):
+    """Validate the value of a limit or offset."""
+    try:
+        count = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a non-negative integer")
+    if count < 0:
+        raise ValueError(f"{name} must be a non-negative integer")
+    return count
+
+
+def sort_clauses(conn, source, params):
+    """
+    Build the ORDER BY clause of a query to the jobs table and, if an after_job
+    is passed, the WHERE clause which only matches the jobs that come after it in
+    the sort order.
+
+    Args:
+        conn: The SQLite Connection object.
+        source: The table or subquery the jobs are read from.
+        params: The filters passed to query_jobs().
+
+    Returns:
+        A tuple of the ORDER BY clause (or None if the jobs are not sorted), the
+        keyset WHERE clause (or None), and the parameters of the WHERE clause.
+    """
+    if not any(key in params for key in ("sort", "limit", "offset", "after_job")):
+        return None, None, []
+
+    sort_expr, descending = parse_sort_key(params.get("sort", "jobid"))
+    # jobs which have the same sort value are ordered by their jobid
+    order_by = f"{sort_expr} {'DESC' if descending else 'ASC'}"
+    if sort_expr != JOB_SORT_KEYS["jobid"]:
+        order_by += f", CAST(id AS INTEGER) {'DESC' if descending else 'ASC'}"
+    if "after_job" not in params:
+        return order_by, None, []
+
+    # only return the jobs which come after this one in the sort order
+    after_job = JobID(params["after_job"]).dec
+    found = conn.execute(f"SELECT 1 FROM {source} WHERE id=?", (after_job,)).fetchone()
+    if found is None:
+        raise ValueError(f"job {params['after_job']} not found in jobs table")
+    keyset_clause = (
+        f"({sort_expr}, CAST(id AS INTEGER)) {'<' if descending else '>'} "
+        f"(SELECT {sort_expr}, CAST(id AS INTEGER) FROM {source} WHERE id = ?)"
     )
+    return order_by, keyset_clause, [after_job]
+
+
+def filter_clauses(conn, params):
+    """
+    Build the WHERE clauses of a query to the jobs table from the filters passed
+    to query_jobs().
+
+    Args:
+        conn: The SQLite Connection object.
+        params: The filters passed to query_jobs().
+
+    Returns:
+        A tuple of the list of WHERE clauses, the list of their parameters, and
+        the start and end of the time range of the query (or None if they are not
+        passed).
+    """
     where_clauses = []
     params_list = []
+    start = end = None
 
     if "user" in params:
         if util.get_uid(params["user"]) == FLUX_USERID_UNKNOWN:
@@ -290,11 +409,13 @@ def get_jobs(conn, **kwargs):
         where_clauses.append("userid = ?")
         params_list.append(params["user"])
     if "after_start_time" in params:
+        start = util.parse_timestamp(params["after_start_time"])
         where_clauses.append("t_run > ?")
-        params_list.append(util.parse_timestamp(params["after_start_time"]))
+        params_list.append(start)
     if "before_end_time" in params:
+        end = util.parse_timestamp(params["before_end_time"])
         where_clauses.append("t_inactive < ?")
-        params_list.append(util.parse_timestamp(params["before_end_time"]))
+        params_list.append(end)
     if "jobid" in params:
         # convert jobID passed-in to decimal format
         params["jobid"] = JobID(params["jobid"]).dec
@@ -326,17 +447,140 @@ def get_jobs(conn, **kwargs):
             )
             params_list.append(expression[1])
 
+    return where_clauses, params_list, start, end
+
+
+def query_jobs(conn, **kwargs):
+    """
+    Execute a query for jobs in the jobs table of the flux-accounting database
+    and return the Cursor holding its results, which have not been fetched yet.
+    The query takes the same filters as get_jobs().
+    """
+    # find out which args were passed and place them in a dict
+    valid_params = {
+        "user",
+        "after_start_time",
+        "before_end_time",
+        "jobid",
+        "project",
+        "bank",
+        "requested_duration",
+        "actual_duration",
+        "duration_delta",
+        "sort",
+        "limit",
+        "offset",
+        "after_job",
+    }
+    params = {
+        key: val
+        for key, val in kwargs.items()
+        if val is not None and key in valid_params
+    }
+
+    where_clauses, params_list, start, end = filter_clauses(conn, params)
+
+    # archived jobs are read from the partitions which overlap the time range
+    source = job_archive.jobs_source(
+        conn, start, end, " AND ".join(where_clauses), params_list
+    )
+    # R and jobspec are decompressed in the query if they are stored in
+    # job_data_table
+    r_expr, jobspec_expr, joins = job_data.column_sql(conn)
+    select_stmt = (
+        f"SELECT userid,id,t_submit,t_run,t_inactive,ranks,{r_expr} AS R,"
+        f"{jobspec_expr} AS jobspec,project,bank,requested_duration,actual_duration "
+        f"FROM {source} AS jobs{joins}"
+    )
+
+    # a sort, limit, offset, or keyset cursor is applied in the query itself so
+    # that only the rows which are returned are read and converted
+    order_by, keyset_clause, keyset_params = sort_clauses(conn, source, params)
+    if keyset_clause:
+        where_clauses.append(keyset_clause)
+        params_list.extend(keyset_params)
+
     if where_clauses:
         select_stmt += " WHERE " + " AND ".join(where_clauses)
+    if order_by:
+        select_stmt += f" ORDER BY {order_by}"
+    if "limit" in params or "offset" in params:
+        select_stmt += " LIMIT ? OFFSET ?"
+        # a negative limit means there is no limit
+        params_list.append(
+            parse_count("limit", params["limit"]) if "limit" in params else -1
+        )
+        params_list.append(parse_count("offset", params.get("offset", 0)))
 
     cur = conn.cursor()
     cur.execute(select_stmt, tuple(params_list))
-    job_records = cur.fetchall()
 
-    return job_records
+    return cur
+
+
+def get_jobs(conn, **kwargs):
+    """
+    A function to return jobs from the jobs table in the flux-accounting
+    database. The query can be tuned to filter jobs by:
+
+    - userid
+    - jobs that started after a certain time
+    - jobs that completed before a certain time
+    - jobid
+    - project
+    - bank
+    - requested duration
+    - actual duration
+
+    The jobs can also be sorted by one of the fields in JOB_SORT_KEYS, which can
+    be prefixed with "-" to sort in descending order, and paged through with a
+    limit and offset or by passing the jobid of the last job on the previous page
+    as after_job.
 
+    The function will execute a SQL query and return a list of jobs. If no
+    jobs are found, an empty list is returned.
+    """
+    return query_jobs(conn, **kwargs).fetchall()
+
+
+def job_record_pages(cur, fields, jobid_format, page_size):
+    """
+    Yield the job records fetched by a Cursor as readable strings of at most
+    page_size records each. Only the first page starts with a header. When no
+    fields are passed, each column is sized to fit the values of every job, so
+    every job record is read before the first page is yielded.
+    """
+    if not fields:
+        job_records = convert_to_obj(cur.fetchall(), jobid_format=jobid_format)
+        fields = default_format(job_records)
+        for start in range(0, max(len(job_records), 1), page_size):
+            yield fmt.JobsFormatter(fields).build_table(
+                job_records[start : start + page_size], header=start == 0
+            )
+        return
+
+    first = True
+    while True:
+        rows = cur.fetchmany(page_size)
+        if not rows and not first:
+            return
+        job_records = convert_to_obj(rows, jobid_format=jobid_format)
+        yield fmt.JobsFormatter(fields).build_table(job_records, header=first)
+        first = False
+
+
+def view_jobs(conn, fields, jobid_format="f58", page_size=None, **kwargs):
+    """
+    Return the jobs in the jobs table matching the filters passed in as a readable
+    string. If page_size is set, return a generator of strings of at most
+    page_size jobs each instead, which are only read from the database as they
+    are needed.
+    """
+    if page_size:
+        return job_record_pages(
+            query_jobs(conn, **kwargs), fields, jobid_format, page_size
+        )
 
-def view_jobs(conn, fields, jobid_format="f58", **kwargs):
     # look up jobs in jobs table
     job_records = convert_to_obj(get_jobs(conn, **kwargs), jobid_format=jobid_format)
     # convert query result to a readable string
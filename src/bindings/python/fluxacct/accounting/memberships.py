@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+
+# the queues and projects of an association are stored as comma-separated lists
+# in association_table, which is the format they are shown in and sent to the
+# priority plugin in; each list is also kept one row per member in a table with
+# an index on the member, so that the associations of a queue or project can be
+# looked up without scanning association_table
+QUEUE_TABLE = "association_queue_table"
+PROJECT_TABLE = "association_project_table"
+# the association_table column, the membership table, and the name of the
+# member column of each kind of membership
+MEMBERSHIPS = {
+    "queues": (QUEUE_TABLE, "queue"),
+    "projects": (PROJECT_TABLE, "project"),
+}
+TABLES = (QUEUE_TABLE, PROJECT_TABLE)
+
+
+def split_sql(expr):
+    """
+    Return the SQL which splits a comma-separated list into its members as the
+    "value" column of json_each(). Common table expressions can't be used in a
+    trigger, so the list is turned into a JSON array instead.
+    """
+    escaped = f"replace(replace({expr}, '\\', '\\\\'), '\"', '\\\"')"
+    return f"""json_each('["' || replace({escaped}, ',', '","') || '"]')"""
+
+
+def create_tables(conn):
+    """
+    Create the membership tables and their indexes, and the triggers which keep
+    them in sync with the queues and projects columns of association_table.
+
+    Args:
+        conn: The SQLite Connection object.
+    """
+    for column, (table, member) in MEMBERSHIPS.items():
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                username    tinytext    NOT NULL,
+                bank        tinytext    NOT NULL,
+                {member}    tinytext    NOT NULL,
+                PRIMARY KEY (username, bank, {member})
+            );""")
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_{member}_idx ON {table} ({member})"
+        )
+
+        delete_stmt = (
+            f"DELETE FROM {table} WHERE username=OLD.username AND bank=OLD.bank;"
+        )
+        insert_stmt = f"""
+                INSERT OR IGNORE INTO {table} (username, bank, {member})
+                SELECT NEW.username, NEW.bank, trim(value)
+                FROM {split_sql(f"NEW.{column}")}
+                WHERE trim(value) != '';"""
+        # an INSERT OR REPLACE into association_table doesn't fire the DELETE
+        # trigger, so clear out any rows left by the association it replaced
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_insert
+            AFTER INSERT ON association_table
+            BEGIN
+                DELETE FROM {table} WHERE username=NEW.username AND bank=NEW.bank;
+                {insert_stmt}
+            END;""")
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_update
+            AFTER UPDATE OF username, bank, {column} ON association_table
+            BEGIN
+                {delete_stmt}
+                {insert_stmt}
+            END;""")
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_delete
+            AFTER DELETE ON association_table
+            BEGIN
+                {delete_stmt}
+            END;""")
+
+
+def populate(cur):
+    """
+    Rebuild the membership tables from the queues and projects columns of every
+    association in association_table.
+
+    Args:
+        cur: The SQLite Cursor object.
+    """
+    for column, (table, member) in MEMBERSHIPS.items():
+        cur.execute(f"DELETE FROM {table}")
+        cur.execute(f"""
+            INSERT OR IGNORE INTO {table} (username, bank, {member})
+            SELECT association_table.username, association_table.bank, trim(value)
+            FROM association_table, {split_sql(f"association_table.{column}")}
+            WHERE trim(value) != ''""")
+
+
+def filter_sql(column, values):
+    """
+    Return a WHERE clause on association_table which matches the associations
+    that are members of any of the queues or projects passed in, and its
+    parameters.
+
+    Args:
+        column: Either "queues" or "projects".
+        values: A list of queue or project names.
+    """
+    table, member = MEMBERSHIPS[column]
+    placeholders = ", ".join(["?"] * len(values))
+    return (
+        f"(username, bank) IN (SELECT username, bank FROM {table} "
+        f"WHERE {member} IN ({placeholders}))",
+        list(values),
+    )
+
+
+def is_referenced(cur, column, value):
+    """Return True if any association has a queue or project as a member."""
+    table, member = MEMBERSHIPS[column]
+    cur.execute(f"SELECT 1 FROM {table} WHERE {member}=? LIMIT 1", (value,))
+    return cur.fetchone() is not None
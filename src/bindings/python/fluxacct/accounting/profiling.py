@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import contextlib
+import cProfile
+import itertools
+import json
+import os
+import re
+import sqlite3
+import time
+
+# setting this environment variable to a directory turns on profiling for the
+# flux-accounting commands and writes the profiles to that directory
+PROFILE_ENV = "FLUX_ACCOUNT_PROFILE"
+
+# string and numeric literals in a traced SQL statement; they are replaced so that
+# statements which only differ by the values bound to them are counted together
+SQL_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?(?:e[+-]?\d+)?\b")
+
+_sequence = itertools.count()
+
+
+def get_profile_dir(directory=None):
+    """
+    Return the directory profiles should be written to: DIRECTORY if one was
+    passed in, otherwise the value of FLUX_ACCOUNT_PROFILE. If neither is set,
+    profiling is turned off and None is returned.
+    """
+    if directory:
+        return directory
+    return os.environ.get(PROFILE_ENV) or None
+
+
+def normalize_statement(statement):
+    """Replace the literals in a SQL statement and collapse its whitespace."""
+    return " ".join(SQL_LITERAL.sub("?", statement).split())
+
+
+class Profiler:
+    """
+    Profile a block of code with cProfile and time the SQL statements it runs.
+
+    SQLite statements are timed through a trace callback set on every Connection
+    passed to trace(). SQLite only reports when a statement begins, so each
+    statement is charged the time until the next statement begins (or until
+    the profile is stopped), which includes the Python code that consumes its
+    results.
+
+    When the profile is stopped, two files are written to the profile directory:
+    NAME-<time>-<pid>-<seq>.pstats, which can be loaded with the pstats module,
+    and a .sql.json file next to it listing every distinct statement with its
+    count and time, slowest first.
+    """
+
+    def __init__(self, directory, name, conn=None):
+        """
+        Initialize a Profiler object.
+
+        Args:
+            directory: The directory to write the profile to.
+            name: The name of the command or request being profiled.
+            conn: An optional SQLite Connection object to trace.
+        """
+        self.directory = directory
+        self.name = re.sub(r"[^\w.-]", "_", name)
+        self.path = None
+        self._profile = cProfile.Profile()
+        self._conns = []
+        self._statements = {}
+        self._current = None
+        self._current_start = None
+        if conn is not None:
+            self.trace(conn)
+
+    def trace(self, conn):
+        """Time the SQL statements run on a Connection while profiling."""
+        conn.set_trace_callback(self._trace_callback)
+        self._conns.append(conn)
+
+    def _trace_callback(self, statement):
+        now = time.perf_counter()
+        self._charge(now)
+        self._current = normalize_statement(statement)
+        self._current_start = now
+
+    def _charge(self, now):
+        if self._current is None:
+            return
+        entry = self._statements.setdefault(self._current, [0, 0.0])
+        entry[0] += 1
+        entry[1] += now - self._current_start
+        self._current = None
+
+    def start(self):
+        self._profile.enable()
+        return self
+
+    def stop(self):
+        """
+        Stop profiling and write the profile to the profile directory.
+
+        Returns:
+            the path of the pstats file that was written.
+        """
+        self._profile.disable()
+        self._charge(time.perf_counter())
+        for conn in self._conns:
+            try:
+                conn.set_trace_callback(None)
+            except sqlite3.ProgrammingError:
+                # the Connection was closed by the code being profiled
+                pass
+
+        os.makedirs(self.directory, exist_ok=True)
+        prefix = os.path.join(
+            self.directory,
+            f"{self.name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-"
+            f"{next(_sequence)}",
+        )
+        self.path = f"{prefix}.pstats"
+        self._profile.dump_stats(self.path)
+        with open(f"{prefix}.sql.json", "w", encoding="utf-8") as sql_file:
+            json.dump(self.sql_timings(), sql_file, indent=2)
+
+        return self.path
+
+    def sql_timings(self):
+        """Return every traced statement with its count and time, slowest first."""
+        return [
+            {"statement": statement, "count": count, "seconds": round(seconds, 6)}
+            for statement, (count, seconds) in sorted(
+                self._statements.items(), key=lambda item: item[1][1], reverse=True
+            )
+        ]
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+
+def profile(name, directory=None, conn=None):
+    """
+    Return a context manager which profiles the code it wraps if profiling is
+    turned on (see get_profile_dir()); otherwise, it does nothing. The Profiler
+    object, or None, is bound to the target of the with statement.
+
+    Args:
+        name: The name of the command or request being profiled.
+        directory: An optional directory to write the profile to.
+        conn: An optional SQLite Connection object to trace.
+    """
+    directory = get_profile_dir(directory)
+    if directory is None:
+        return contextlib.nullcontext()
+    return Profiler(directory, name, conn)
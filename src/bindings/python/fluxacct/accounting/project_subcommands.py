@@ -13,6 +13,7 @@ import sqlite3
 
 import fluxacct.accounting
 from fluxacct.accounting import formatter as fmt
+from fluxacct.accounting import memberships
 from fluxacct.accounting import sql_util as sql
 from fluxacct.accounting.util import with_cursor
 
@@ -86,9 +87,7 @@ def add_project(conn, cur, project):
 @with_cursor
 def delete_project(conn, cur, project):
     # look for any rows in the association_table that reference this project
-    select_stmt = "SELECT * FROM association_table WHERE projects LIKE ?"
-    cur.execute(select_stmt, ("%" + project + "%",))
-    result = cur.fetchall()
+    referenced = memberships.is_referenced(cur, "projects", project)
     warning_stmt = (
         "WARNING: user(s) in the association_table still "
         "reference this project. Make sure to edit user rows to "
@@ -100,10 +99,9 @@ def delete_project(conn, cur, project):
 
     conn.commit()
 
-    # if len(rows) > 0, this means that at least one association in the
-    # association_table references this project. If this is the case,
-    # return the warning message after deleting the project.
-    if len(result) > 0:
+    # if at least one association in the association_table references this
+    # project, return the warning message after deleting the project.
+    if referenced:
         return warning_stmt
 
     return 0
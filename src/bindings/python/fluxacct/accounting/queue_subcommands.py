@@ -13,6 +13,7 @@ import sqlite3
 
 import fluxacct.accounting
 from fluxacct.accounting import formatter as fmt
+from fluxacct.accounting import memberships
 from fluxacct.accounting import sql_util as sql
 from fluxacct.accounting.util import with_cursor
 from fluxacct.accounting import INTEGER_MAX
@@ -100,9 +101,7 @@ def delete_queue(conn, cur, queue):
     DB.
     """
     # look for any rows in the association_table that reference this queue
-    select_stmt = "SELECT * FROM association_table WHERE queues LIKE ?"
-    cur.execute(select_stmt, ("%" + queue + "%",))
-    result = cur.fetchall()
+    referenced = memberships.is_referenced(cur, "queues", queue)
     warning_stmt = (
         "WARNING: user(s) in the association_table still "
         "reference this queue. Make sure to edit user rows to "
@@ -113,7 +112,7 @@ def delete_queue(conn, cur, queue):
     cur.execute(delete_stmt, (queue,))
     conn.commit()
 
-    if len(result) > 0:
+    if referenced:
         # at least one association references this queue; return warning message
         return warning_stmt
 
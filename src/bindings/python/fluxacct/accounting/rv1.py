@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import json
+
+from flux.resource import ResourceSet
+
+
+def idset_ranges(idset):
+    """
+    Return the (first, last) ranges of an RFC 22 idset string such as "0-3,7".
+
+    Args:
+        idset: The idset string.
+    """
+    idset = str(idset).strip()
+    if idset.startswith("[") and idset.endswith("]"):
+        idset = idset[1:-1]
+    ranges = []
+    for part in idset.split(","):
+        if part == "":
+            continue
+        first, sep, last = part.partition("-")
+        first = int(first)
+        last = int(last) if sep else first
+        if first < 0 or last < first:
+            raise ValueError(f"invalid idset: {idset}")
+        ranges.append((first, last))
+    return ranges
+
+
+def idset_count(idset):
+    """Return the number of ids in an RFC 22 idset string."""
+    return sum(last - first + 1 for first, last in idset_ranges(idset))
+
+
+def resource_counts(resources):
+    """
+    Return the number of nodes, cores, and GPUs in a job's R.
+
+    For version 1 of R, the counts are computed by counting the ranges of the
+    idsets in each entry of execution.R_lite, without building a ResourceSet.
+    Any other version of R, or an R_lite which lists a rank more than once, is
+    passed to ResourceSet.
+
+    Args:
+        resources: The R of a job, either as a JSON string or decoded.
+
+    Returns:
+        A tuple of the number of nodes, cores, and GPUs.
+    """
+    decoded = (
+        json.loads(resources) if isinstance(resources, (str, bytes)) else resources
+    )
+    if not isinstance(decoded, dict) or decoded.get("version") != 1:
+        rset = ResourceSet(resources)
+        return rset.nnodes, rset.ncores, rset.ngpus
+
+    nnodes = ncores = ngpus = 0
+    ranks = []
+    for entry in decoded["execution"]["R_lite"]:
+        entry_ranks = idset_ranges(entry["rank"])
+        nranks = sum(last - first + 1 for first, last in entry_ranks)
+        children = entry.get("children", {})
+        nnodes += nranks
+        ncores += nranks * idset_count(children.get("core", ""))
+        ngpus += nranks * idset_count(children.get("gpu", ""))
+        ranks.extend(entry_ranks)
+
+    # ranks which appear more than once are merged by ResourceSet
+    ranks.sort()
+    for (_, last), (first, _) in zip(ranks, ranks[1:]):
+        if first <= last:
+            rset = ResourceSet(resources)
+            return rset.nnodes, rset.ncores, rset.ngpus
+
+    return nnodes, ncores, ngpus
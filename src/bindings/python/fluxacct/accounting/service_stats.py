@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import collections
+import errno
+import json
+import os
+import time
+
+# the upper bounds, in seconds, of the request latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+# how many of the most recent requests are kept to find the slowest ones
+RECENT_REQUESTS = 1000
+# how many of the slowest recent requests are reported
+SLOWEST_REQUESTS = 10
+
+
+class RecordingHandle:
+    """
+    A wrapper around a Flux handle passed to a service endpoint which notes
+    whether the request was answered with an error and how many bytes were
+    returned. Every other attribute is looked up on the wrapped handle.
+    """
+
+    def __init__(self, handle):
+        self._handle = handle
+        self.error = False
+        self.nbytes = 0
+
+    def respond(self, msg, payload=None):
+        if isinstance(payload, str):
+            self.nbytes += len(payload.encode("utf-8"))
+        elif payload is not None:
+            self.nbytes += len(json.dumps(payload))
+        return self._handle.respond(msg, payload)
+
+    def respond_error(self, msg, errnum=0, errstr=None):
+        # ENODATA marks the end of a streamed response rather than a failure
+        if errnum != errno.ENODATA:
+            self.error = True
+        return self._handle.respond_error(msg, errnum, errstr)
+
+    def __getattr__(self, name):
+        return getattr(self._handle, name)
+
+
+class EndpointStats:
+    """The request counters and latency histogram of one endpoint."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+
+    def record(self, seconds, error, nbytes):
+        self.requests += 1
+        self.errors += int(error)
+        self.bytes += nbytes
+        self.seconds += seconds
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+
+    def to_dict(self):
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "bytes": self.bytes,
+            "seconds": self.seconds,
+            # cumulative counts of the requests which took at most each bound
+            "latency_buckets": {
+                str(bound): count for bound, count in zip(LATENCY_BUCKETS, self.buckets)
+            },
+        }
+
+
+def sqlite_stats(conn):
+    """
+    Return the size of a flux-accounting DB and its write-ahead log, along with
+    its page and page cache settings.
+
+    Args:
+        conn: The SQLite Connection object.
+    """
+    stats = {}
+    for pragma in (
+        "page_size",
+        "page_count",
+        "freelist_count",
+        "cache_size",
+        "journal_mode",
+    ):
+        stats[pragma] = conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+    stats["total_changes"] = conn.total_changes
+
+    path = conn.execute("PRAGMA database_list").fetchone()[2]
+    stats["path"] = path
+    stats["db_size"] = os.path.getsize(path) if path else 0
+    stats["wal_size"] = (
+        os.path.getsize(f"{path}-wal") if path and os.path.exists(f"{path}-wal") else 0
+    )
+
+    return stats
+
+
+class ServiceStats:
+    """
+    Request counts, error counts, latency histograms, and bytes returned for every
+    endpoint of the flux-accounting service, along with the slowest of its most
+    recent requests.
+    """
+
+    def __init__(self):
+        self.start_time = time.time()
+        self.endpoints = collections.defaultdict(EndpointStats)
+        self.recent = collections.deque(maxlen=RECENT_REQUESTS)
+
+    def record(self, endpoint, seconds, error=False, nbytes=0, payload=None):
+        """
+        Record one request to an endpoint.
+
+        Args:
+            endpoint: The name of the endpoint.
+            seconds: How long the request took.
+            error: Whether the request was answered with an error.
+            nbytes: The size of the response payload.
+            payload: The payload of the request.
+        """
+        self.endpoints[endpoint].record(seconds, error, nbytes)
+        self.recent.append((seconds, endpoint, time.time(), error, payload))
+
+    def slowest(self, count=SLOWEST_REQUESTS):
+        """Return the slowest of the most recent requests, slowest first."""
+        return [
+            {
+                "endpoint": endpoint,
+                "seconds": seconds,
+                "time": timestamp,
+                "error": error,
+                "payload": payload,
+            }
+            for seconds, endpoint, timestamp, error, payload in sorted(
+                self.recent, key=lambda request: request[0], reverse=True
+            )[:count]
+        ]
+
+    def to_dict(self, conn=None):
+        """
+        Return every statistic as a JSON-serializable dictionary.
+
+        Args:
+            conn: An optional SQLite Connection object to include statistics for.
+        """
+        stats = {
+            "start_time": self.start_time,
+            "uptime": time.time() - self.start_time,
+            "endpoints": {
+                name: endpoint.to_dict()
+                for name, endpoint in sorted(self.endpoints.items())
+            },
+            "slowest_requests": self.slowest(),
+        }
+        if conn is not None:
+            stats["sqlite"] = sqlite_stats(conn)
+        return stats
+
+    def to_prometheus(self, conn=None):
+        """
+        Return every statistic in the Prometheus text exposition format.
+
+        Args:
+            conn: An optional SQLite Connection object to include statistics for.
+        """
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP flux_accounting_{name} {help_text}")
+            lines.append(f"# TYPE flux_accounting_{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"flux_accounting_{name}{labels} {value}")
+
+        endpoints = sorted(self.endpoints.items())
+        metric(
+            "requests_total",
+            "counter",
+            "Requests received by the accounting service.",
+            (
+                (f'{{endpoint="{name}"}}', endpoint_stats.requests)
+                for name, endpoint_stats in endpoints
+            ),
+        )
+        metric(
+            "request_errors_total",
+            "counter",
+            "Requests answered with an error.",
+            (
+                (f'{{endpoint="{name}"}}', endpoint_stats.errors)
+                for name, endpoint_stats in endpoints
+            ),
+        )
+        metric(
+            "response_bytes_total",
+            "counter",
+            "Bytes of response payloads returned.",
+            (
+                (f'{{endpoint="{name}"}}', endpoint_stats.bytes)
+                for name, endpoint_stats in endpoints
+            ),
+        )
+
+        samples = []
+        for name, endpoint_stats in endpoints:
+            for bound, count in zip(LATENCY_BUCKETS, endpoint_stats.buckets):
+                samples.append((f'_bucket{{endpoint="{name}",le="{bound}"}}', count))
+            samples.append(
+                (f'_bucket{{endpoint="{name}",le="+Inf"}}', endpoint_stats.requests)
+            )
+            samples.append((f'_sum{{endpoint="{name}"}}', endpoint_stats.seconds))
+            samples.append((f'_count{{endpoint="{name}"}}', endpoint_stats.requests))
+        metric(
+            "request_duration_seconds",
+            "histogram",
+            "Time taken to answer requests.",
+            samples,
+        )
+
+        if conn is not None:
+            db_stats = sqlite_stats(conn)
+            metric(
+                "db_size_bytes",
+                "gauge",
+                "Size of the database file.",
+                [("", db_stats["db_size"])],
+            )
+            metric(
+                "wal_size_bytes",
+                "gauge",
+                "Size of the database's write-ahead log.",
+                [("", db_stats["wal_size"])],
+            )
+            metric(
+                "db_free_pages",
+                "gauge",
+                "Unused pages in the database file.",
+                [("", db_stats["freelist_count"])],
+            )
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path, conn=None):
+        """
+        Write every statistic to a Prometheus textfile-collector file. The file is
+        replaced atomically so that the collector never reads a partial file.
+        """
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as stats_file:
+            stats_file.write(self.to_prometheus(conn))
+        os.replace(tmp_path, path)
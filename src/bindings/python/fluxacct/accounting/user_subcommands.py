@@ -15,6 +15,7 @@ import time
 from flux.constants import FLUX_USERID_UNKNOWN
 import fluxacct.accounting
 from fluxacct.accounting import formatter as fmt
+from fluxacct.accounting import memberships
 from fluxacct.accounting import sql_util as sql
 from fluxacct.accounting import util
 from fluxacct.accounting.util import with_cursor
@@ -256,7 +257,17 @@ def modify_queues(conn, cur, username, bank, add_queue=None, delete_queue=None):
     return 0
 
 
-def insert_per_assoc_usage_rows(conn, cur, username, uid, bank):
+def get_assoc_id(cur, username, bank):
+    """Return the assoc_id of an association, or None if it does not exist."""
+    cur.execute(
+        "SELECT assoc_id FROM association_table WHERE username=? AND bank=?",
+        (username, bank),
+    )
+    result = cur.fetchone()
+    return result[0] if result is not None else None
+
+
+def insert_per_assoc_usage_rows(conn, cur, assoc_id):
     """
     Insert a row for each job usage period into job_usage_per_association_table for a
     newly added association. The number of periods is determined by the
@@ -265,9 +276,7 @@ def insert_per_assoc_usage_rows(conn, cur, username, uid, bank):
     Args:
         conn: The SQLite Connection object.
         cur: The SQLite Cursor object.
-        username: The username of the association.
-        uid: The userid of the association.
-        bank: The bank the association belongs to.
+        assoc_id: The assoc_id of the association.
     """
     cur.execute(
         "SELECT value FROM config_table WHERE key='priority_usage_reset_period'"
@@ -290,10 +299,10 @@ def insert_per_assoc_usage_rows(conn, cur, username, uid, bank):
         conn.execute(
             """
             INSERT OR IGNORE INTO job_usage_per_association_table
-            (username, userid, bank, period, value)
-            VALUES (?, ?, ?, ?, 0.0)
+            (assoc_id, period, value)
+            VALUES (?, ?, 0.0)
             """,
-            (username, uid, bank, period),
+            (assoc_id, period),
         )
 
 
@@ -325,7 +334,13 @@ def view_user(
         # only return a breakdown of the association's job usage factors that make up
         # their historical usage
         cur.execute(
-            "SELECT * FROM job_usage_per_association_table WHERE username=?", (user,)
+            """
+            SELECT a.username, a.userid, a.bank, p.period, p.value
+            FROM job_usage_per_association_table p
+            JOIN association_table a ON a.assoc_id=p.assoc_id
+            WHERE a.username=?
+            """,
+            (user,),
         )
         formatter = fmt.AccountingFormatter(cur)
     else:
@@ -347,7 +362,9 @@ def view_user(
 
 
 @with_cursor
-def list_users(conn, cur, cols=None, json_fmt=False, format_string="", **kwargs):
+def list_users(
+    conn, cur, cols=None, json_fmt=False, format_string="", page_size=None, **kwargs
+):
     """
     List all associations in the association_table in the flux-accounting DB. If
     filters are passed in, limit the associations returned to the ones which fit
@@ -359,6 +376,8 @@ def list_users(conn, cur, cols=None, json_fmt=False, format_string="", **kwargs)
             columns are included.
         format_string: a format string defining how each row should be formatted. Column
             names should be used as placeholders.
+        page_size: if set, return a generator of pages of at most page_size
+            associations each instead of a single string.
         **kwargs: a list of optional constraints to filter the association_table by.
     """
     # use all column names if none are passed in
@@ -375,7 +394,7 @@ def list_users(conn, cur, cols=None, json_fmt=False, format_string="", **kwargs)
     params = []
 
     # which columns to use LIKE with wildcards
-    like_fields = {"queues", "projects", "default_project"}
+    like_fields = {"default_project"}
 
     def to_list(val):
         if isinstance(val, (list, tuple, set)):
@@ -389,7 +408,13 @@ def list_users(conn, cur, cols=None, json_fmt=False, format_string="", **kwargs)
 
         values = to_list(val)
 
-        if col in like_fields:
+        if col in memberships.MEMBERSHIPS:
+            # look up the associations which have any of the queues or projects
+            # in the index of their membership table
+            clause, clause_params = memberships.filter_sql(col, values)
+            where_clauses.append(clause)
+            params.extend(clause_params)
+        elif col in like_fields:
             # build a grouped OR of LIKE conditions: (col LIKE ? OR col LIKE ? ...)
             group = []
             for value in values:
@@ -410,10 +435,15 @@ def list_users(conn, cur, cols=None, json_fmt=False, format_string="", **kwargs)
     if where_clauses:
         select_stmt += " WHERE " + " AND ".join(where_clauses)
 
+    if page_size:
+        # the pages are read after this function returns and closes cur
+        cur = conn.cursor()
     cur.execute(select_stmt, tuple(params))
 
     # initialize AccountingFormatter object
-    formatter = fmt.AccountingFormatter(cur)
+    formatter = fmt.AccountingFormatter(cur, page_size=page_size)
+    if page_size:
+        return formatter.pages(json_fmt, format_string)
     if format_string != "":
         return formatter.as_format_string(format_string)
     if json_fmt:
@@ -523,20 +553,21 @@ def add_user(
             max_sched_jobs,
         ),
     )
+    # the new association was given the next assoc_id when it was inserted
+    assoc_id = get_assoc_id(cur, username, bank)
     # insert the user values into job_usage_factor_table
     cur.execute(
         """
-        INSERT OR IGNORE INTO job_usage_factor_table (username, userid, bank)
-        VALUES (?, ?, ?)
+        INSERT OR IGNORE INTO job_usage_factor_table (assoc_id, userid)
+        VALUES (?, ?)
         """,
         (
-            username,
+            assoc_id,
             uid,
-            bank,
         ),
     )
     # insert per-period usage rows into job_usage_per_association_table
-    insert_per_assoc_usage_rows(conn, cur, username, uid, bank)
+    insert_per_assoc_usage_rows(conn, cur, assoc_id)
 
     # commit changes
     conn.commit()
@@ -834,12 +865,12 @@ def sync_userids(conn, cur):
     association_table and their corresponding rows in the job_usage_factor_table.
     """
     select_stmt = """
-    SELECT j.username,
+    SELECT a.username,
            j.userid AS old_userid,
            a.userid AS new_userid
     FROM job_usage_factor_table j
     JOIN association_table a
-      ON j.username = a.username
+      ON j.assoc_id = a.assoc_id
     WHERE j.userid != a.userid
     """
     cur.execute(select_stmt)
@@ -858,12 +889,12 @@ def sync_userids(conn, cur):
         SET userid = (
             SELECT association_table.userid
             FROM association_table
-            WHERE association_table.username = job_usage_factor_table.username
+            WHERE association_table.assoc_id = job_usage_factor_table.assoc_id
         )
         WHERE EXISTS (
             SELECT 1
             FROM association_table
-            WHERE association_table.username = job_usage_factor_table.username
+            WHERE association_table.assoc_id = job_usage_factor_table.assoc_id
         )
         """
         cur.execute(update_stmt)
@@ -9,40 +9,33 @@
 #
 # SPDX-License-Identifier: LGPL-3.0
 ###############################################################
-import pwd
 import logging
 import functools
 import contextlib
 
-from flux.constants import FLUX_USERID_UNKNOWN
 from flux.util import parse_datetime
 from flux.job.JobID import JobID
 import fluxacct.accounting
+from fluxacct.accounting import identity
 
 
 def get_uid(username):
     """
     Get the userid for a given username. If the userid cannot be found, just return
-    the username.
+    the username. Lookups are cached in identity.cache.
 
     Args:
         username: The username.
     """
-    try:
-        return pwd.getpwnam(username).pw_uid
-    except KeyError:
-        return FLUX_USERID_UNKNOWN
+    return identity.cache.get_uid(username)
 
 
 def get_username(userid):
     """
     Get the username for a given userid. If the username cannot be found, just return
-    the userid as a string.
+    the userid as a string. Lookups are cached in identity.cache.
     """
-    try:
-        return pwd.getpwuid(userid).pw_name
-    except KeyError:
-        return str(userid)
+    return identity.cache.get_username(userid)
 
 
 def parse_timestamp(timestamp):
@@ -113,47 +106,6 @@ def with_cursor(func):
     return wrapper
 
 
-def update_parent_bank_usage(conn, bank):
-    """
-    Recursively update the job_usage for a bank's parent banks up to the root.
-
-    This function should be called after a leaf bank's job_usage has been updated.
-    It will propagate the changes up through the hierarchy.
-
-    Args:
-        conn: The SQLite Connection object.
-        bank: The name of the bank whose parents need updating.
-    """
-    cur = conn.cursor()
-
-    cur.execute("SELECT parent_bank FROM bank_table WHERE bank=?", (bank,))
-    result = cur.fetchone()
-
-    if result is None:
-        return
-
-    parent_bank = result[0]
-
-    if parent_bank == "":
-        # reached the root bank (no parent); stop recursion
-        return
-
-    # calculate the total usage of all sub-banks under the parent
-    cur.execute(
-        "SELECT SUM(job_usage) FROM bank_table WHERE parent_bank=?", (parent_bank,)
-    )
-    total_usage = cur.fetchone()[0] or 0.0
-
-    # update the parent bank's usage
-    cur.execute(
-        "UPDATE bank_table SET job_usage=? WHERE bank=?", (total_usage, parent_bank)
-    )
-    conn.commit()
-
-    # recursively update the parent's parent
-    update_parent_bank_usage(conn, parent_bank)
-
-
 class JobIDFormat:
     """
     Wrapper around flux.job.JobID that allows for the specification of a specific format
@@ -15,12 +15,16 @@ import sys
 import argparse
 import sqlite3
 import json
+import time
 from contextlib import closing
 import logging
 
 import flux
 import flux.job
 import fluxacct.accounting
+from fluxacct.accounting import job_archive
+from fluxacct.accounting import job_data
+from fluxacct.accounting import profiling
 from fluxacct.accounting import util
 
 logging.basicConfig(
@@ -30,6 +34,13 @@ logging.basicConfig(
 )
 LOGGER = logging.getLogger(__name__)
 
+# the number of jobs read from a job-archive DB and inserted per transaction by
+# --copy
+COPY_BATCH_SIZE = 10000
+# the config_table key used to save the progress of --copy, so that a copy which
+# is interrupted can pick up where it left off
+COPY_CHECKPOINT = "copy_job_archive_checkpoint"
+
 
 def set_db_loc(args):
     path = args.path if args.path else fluxacct.accounting.DB_PATH
@@ -65,6 +76,26 @@ def get_jobs(rpc_handle):
         sys.exit(1)
 
 
+# get the project, bank, and requested duration of a job from its jobspec and
+# compute its actual duration
+def jobspec_columns(jobspec, t_run, t_inactive):
+    jobspec = json.loads(jobspec)
+    # using .get() here ensures no KeyError is raised if "attributes" or "project"
+    # are missing; will set "project" to None if it can't be found
+    accounting_attributes = jobspec.get("attributes", {}).get("system", {})
+    columns = {
+        "project": accounting_attributes.get("project"),
+        "bank": accounting_attributes.get("bank"),
+        # store requested job duration
+        "requested_duration": accounting_attributes.get("duration"),
+        "actual_duration": 0.0,
+    }
+    # compute actual job duration
+    if t_inactive is not None and t_run is not None:
+        columns["actual_duration"] = t_inactive - t_run
+    return columns
+
+
 # fetch new jobs using Flux's job-list and job-info interfaces;
 # create job records for each newly seen job
 def fetch_new_jobs(last_timestamp=0.0):
@@ -104,23 +135,13 @@ def fetch_new_jobs(last_timestamp=0.0):
         if data["jobspec"] is not None:
             single_record["jobspec"] = data["jobspec"]
             try:
-                jobspec = json.loads(single_record["jobspec"])
-                # using .get() here ensures no KeyError is raised if
-                # "attributes" or "project" are missing; will set
-                # single_record["project"] to None if it can't be found
-                accounting_attributes = jobspec.get("attributes", {}).get("system", {})
-                single_record["project"] = accounting_attributes.get("project")
-                single_record["bank"] = accounting_attributes.get("bank")
-                # store requested job duration
-                single_record["requested_duration"] = accounting_attributes.get(
-                    "duration"
+                single_record.update(
+                    jobspec_columns(
+                        single_record["jobspec"],
+                        single_job.get("t_run"),
+                        single_job.get("t_inactive"),
+                    )
                 )
-                # compute actual job duration
-                single_record["actual_duration"] = 0.0
-                t_inactive = single_job.get("t_inactive")
-                t_run = single_job.get("t_run")
-                if t_inactive is not None and t_run is not None:
-                    single_record["actual_duration"] = t_inactive - t_run
             except json.JSONDecodeError as exc:
                 # the job's jobspec can't be decoded; don't add any of its elements
                 # to the job dictionary
@@ -152,8 +173,14 @@ def fetch_new_jobs(last_timestamp=0.0):
 
 # insert newly seen jobs into the "jobs" table in the flux-accounting DB
 def insert_jobs_in_db(conn, cur, job_records):
+    compressed = job_data.storage_mode(conn) == job_data.COMPRESSED
     for single_job in job_records:
         try:
+            resources = single_job["R"]
+            jobspec = single_job["jobspec"]
+            if compressed:
+                resources = job_data.store(cur, resources)
+                jobspec = job_data.store(cur, jobspec)
             cur.execute(
                 """
                 INSERT OR IGNORE INTO jobs
@@ -168,8 +195,8 @@ def insert_jobs_in_db(conn, cur, job_records):
                     single_job["t_run"],
                     single_job["t_inactive"],
                     single_job["ranks"],
-                    single_job["R"],
-                    single_job["jobspec"],
+                    resources,
+                    jobspec,
                     (
                         single_job["project"]
                         if single_job.get("project") is not None
@@ -187,42 +214,97 @@ def insert_jobs_in_db(conn, cur, job_records):
     conn.commit()
 
 
-# connect to flux-core's job-archive DB, fetch all records from its jobs table,
-# and populate them into the jobs table of the flux-accounting DB
-def copy_db_contents(old_cur, cur, conn):
-    select_stmt = """
-    SELECT id,userid,t_submit,t_run,t_inactive,ranks,R,jobspec FROM jobs
+def get_copy_checkpoint(cur, source):
     """
-    insert_stmt = """
-    INSERT OR IGNORE INTO jobs
-    (id,userid,t_submit,t_run,t_inactive,ranks,R,jobspec)
-    VALUES (?,?,?,?,?,?,?,?)
+    Return the id of the last job copied from a job-archive DB by an earlier --copy
+    which did not finish, or None.
     """
+    row = cur.execute(
+        "SELECT value FROM config_table WHERE key=?", (COPY_CHECKPOINT,)
+    ).fetchone()
+    if row is None:
+        return None
+    checkpoint = json.loads(row[0])
+    if checkpoint["source"] != source:
+        # the earlier copy was from a different job-archive DB
+        return None
+    return checkpoint["last_id"]
+
+
+# connect to flux-core's job-archive DB, read the records from its jobs table a
+# batch at a time, and populate them into the jobs table of the flux-accounting DB
+def copy_db_contents(
+    old_cur, cur, conn, source="", batch_size=COPY_BATCH_SIZE, fill_columns=False
+):
+    select_stmt = "SELECT id,userid,t_submit,t_run,t_inactive,ranks,R,jobspec FROM jobs"
+    columns = "id,userid,t_submit,t_run,t_inactive,ranks,R,jobspec"
+    if fill_columns:
+        columns += ",project,bank,requested_duration,actual_duration"
+    insert_stmt = (
+        f"INSERT OR IGNORE INTO jobs ({columns}) "
+        f"VALUES ({','.join('?' * len(columns.split(',')))})"
+    )
 
-    old_cur.execute(select_stmt)
-    result = old_cur.fetchall()
-
-    if result:
-        for row in result:
+    # jobs are copied in order of their id so that an interrupted copy can be
+    # resumed after the last job it copied
+    last_id = get_copy_checkpoint(cur, source)
+    if last_id is not None:
+        LOGGER.info("resuming copy from %s after job %s", source, last_id)
+        old_cur.execute(select_stmt + " WHERE id > ? ORDER BY id", (last_id,))
+    else:
+        old_cur.execute(select_stmt + " ORDER BY id")
+
+    compressed = job_data.storage_mode(conn) == job_data.COMPRESSED
+    copied = 0
+    start = time.monotonic()
+    while True:
+        rows = old_cur.fetchmany(batch_size)
+        if not rows:
+            break
+        records = []
+        for row in rows:
             if row[6] == "":
                 # this job never ran; skip it
                 continue
-            cur.execute(
-                insert_stmt,
-                (
-                    row[0],
-                    row[1],
-                    row[2],
-                    row[3],
-                    row[4],
-                    row[5],
-                    row[6],
-                    row[7],
-                ),
-            )
-
+            record = list(row)
+            if fill_columns:
+                try:
+                    extra = jobspec_columns(row[7], row[3], row[4])
+                except json.JSONDecodeError:
+                    # the job's jobspec can't be decoded; leave its columns empty
+                    extra = {"project": None, "bank": None}
+                record += [
+                    extra.get("project") or "",
+                    extra.get("bank") or "",
+                    extra.get("requested_duration"),
+                    extra.get("actual_duration"),
+                ]
+            if compressed:
+                record[6] = job_data.store(cur, record[6])
+                record[7] = job_data.store(cur, record[7])
+            records.append(record)
+        cur.executemany(insert_stmt, records)
+        # the checkpoint is committed along with the jobs it covers
+        cur.execute(
+            "INSERT OR REPLACE INTO config_table (key, value) VALUES (?, ?)",
+            (COPY_CHECKPOINT, json.dumps({"source": source, "last_id": rows[-1][0]})),
+        )
         conn.commit()
 
+        copied += len(records)
+        elapsed = time.monotonic() - start
+        LOGGER.info(
+            "copied %d job(s) from %s (%.0f jobs/sec)",
+            copied,
+            source,
+            copied / elapsed if elapsed > 0 else 0.0,
+        )
+
+    cur.execute("DELETE FROM config_table WHERE key=?", (COPY_CHECKPOINT,))
+    conn.commit()
+
+    return copied
+
 
 # pylint: disable=broad-except
 def main():
@@ -237,6 +319,29 @@ def main():
     parser.add_argument(
         "-c", "--copy", dest="copy", help="copy contents from a job-archive DB"
     )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=COPY_BATCH_SIZE,
+        metavar="N",
+        help="with --copy, copy N jobs per transaction",
+    )
+    parser.add_argument(
+        "--fill-columns",
+        action="store_true",
+        help=(
+            "with --copy, fill in the project, bank, and duration columns of the "
+            "copied jobs from their jobspec"
+        ),
+    )
+    parser.add_argument(
+        "--profile",
+        help=(
+            "profile this command and write its cProfile stats and SQL statement "
+            "timings to DIR (can also be set with FLUX_ACCOUNT_PROFILE=DIR)"
+        ),
+        metavar="DIR",
+    )
     parser.add_argument(
         "-v",
         "--verbose",
@@ -251,21 +356,26 @@ def main():
     conn = est_sqlite_conn(path)
     cur = conn.cursor()
 
-    with closing(cur):
+    with profiling.profile(
+        "flux-account-fetch-job-records", args.profile, conn
+    ), closing(cur):
         if args.copy:
             # copy the contents from one job-archive DB to this one
             old_archive_conn = est_sqlite_conn(args.copy)
             old_cur = old_archive_conn.cursor()
             with closing(old_cur):
-                copy_db_contents(old_cur, cur, conn)
-
-        # get the timestamp of the last seen job
-        timestamp = 0.0
-        cur.execute("SELECT MAX(t_inactive) FROM jobs")
-        timestamp_arr = cur.fetchall()
+                copy_db_contents(
+                    old_cur,
+                    cur,
+                    conn,
+                    os.path.abspath(args.copy),
+                    args.batch_size,
+                    args.fill_columns,
+                )
 
-        if timestamp_arr[0][0]:
-            timestamp = timestamp_arr[0][0]
+        # get the timestamp of the last seen job, including the jobs which have
+        # been archived out of the jobs table
+        timestamp = job_archive.last_job_timestamp(conn)
 
         try:
             job_records = []
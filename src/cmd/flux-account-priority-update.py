@@ -15,12 +15,13 @@ import os
 import sqlite3
 import json
 import subprocess
-import pwd
 
 import flux
 
 import fluxacct.accounting
+from fluxacct.accounting import profiling
 from fluxacct.accounting import sql_util as sql
+from fluxacct.accounting import util
 
 
 def set_db_loc(args):
@@ -62,12 +63,17 @@ def est_sqlite_conn(path):
     return conn
 
 
-def bulk_update(path):
-    conn = est_sqlite_conn(path)
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
+def get_bulk_update_payloads(cur):
+    """
+    Build the payloads sent to the priority plugin on a bulk update.
 
-    data = {}
+    Args:
+        cur: The SQLite Cursor object.
+
+    Returns:
+        A list of (topic, payload) tuples, in the order they are sent to the plugin.
+    """
+    payloads = []
     bulk_user_data = []
     bulk_q_data = []
     bulk_proj_data = []
@@ -97,9 +103,7 @@ def bulk_update(path):
         }
         bulk_user_data.append(single_user_data)
 
-    data = {"data": bulk_user_data}
-
-    flux.Flux().rpc("job-manager.mf_priority.rec_update", json.dumps(data)).get()
+    payloads.append(("job-manager.mf_priority.rec_update", {"data": bulk_user_data}))
 
     # fetch all rows from queue_table
     for row in cur.execute("SELECT * FROM queue_table"):
@@ -118,9 +122,7 @@ def bulk_update(path):
         }
         bulk_q_data.append(single_q_data)
 
-    data = {"data": bulk_q_data}
-
-    flux.Flux().rpc("job-manager.mf_priority.rec_q_update", json.dumps(data)).get()
+    payloads.append(("job-manager.mf_priority.rec_q_update", {"data": bulk_q_data}))
 
     # fetch all rows from project_table
     for row in cur.execute("SELECT project FROM project_table"):
@@ -130,8 +132,9 @@ def bulk_update(path):
         }
         bulk_proj_data.append(single_project)
 
-    data = {"data": bulk_proj_data}
-    flux.Flux().rpc("job-manager.mf_priority.rec_proj_update", data).get()
+    payloads.append(
+        ("job-manager.mf_priority.rec_proj_update", {"data": bulk_proj_data})
+    )
 
     # fetch rows from bank_table
     for row in cur.execute("SELECT bank, priority FROM bank_table"):
@@ -141,8 +144,9 @@ def bulk_update(path):
         }
         bulk_bank_data.append(single_bank)
 
-    data = {"data": bulk_bank_data}
-    flux.Flux().rpc("job-manager.mf_priority.rec_bank_update", data).get()
+    payloads.append(
+        ("job-manager.mf_priority.rec_bank_update", {"data": bulk_bank_data})
+    )
 
     # fetch rows from priority_factor_weight_table
     for row in cur.execute("SELECT * FROM priority_factor_weight_table"):
@@ -152,8 +156,9 @@ def bulk_update(path):
         }
         bulk_factor_data.append(single_priority_factor)
 
-    data = {"data": bulk_factor_data}
-    flux.Flux().rpc("job-manager.mf_priority.rec_fac_update", data).get()
+    payloads.append(
+        ("job-manager.mf_priority.rec_fac_update", {"data": bulk_factor_data})
+    )
 
     # fetch config values for plugin
     plugin_config = {}
@@ -165,8 +170,22 @@ def bulk_update(path):
         # if key is missing, default to False
         plugin_config["deny_unknown_queues"] = False
 
-    data = {"data": plugin_config}
-    flux.Flux().rpc("job-manager.mf_priority.rec_config_update", data).get()
+    payloads.append(
+        ("job-manager.mf_priority.rec_config_update", {"data": plugin_config})
+    )
+
+    return payloads
+
+
+def bulk_update(path, profiler=None):
+    conn = est_sqlite_conn(path)
+    conn.row_factory = sqlite3.Row
+    if profiler is not None:
+        profiler.trace(conn)
+    cur = conn.cursor()
+
+    for topic, data in get_bulk_update_payloads(cur):
+        flux.Flux().rpc(topic, json.dumps(data)).get()
 
     flux.Flux().rpc("job-manager.mf_priority.reprioritize")
 
@@ -178,13 +197,9 @@ def send_instance_owner_info():
     handle = flux.Flux()
     # get uid, username of instance owner
     owner_uid = handle.attr_get("security.owner")
-    try:
-        # look up corresponding username of instance owner
-        owner_info = pwd.getpwuid(int(owner_uid))
-        owner_username = owner_info.pw_name
-    except KeyError:
-        # can't find instance owner info; set username to the uid
-        owner_username = owner_uid
+    # look up corresponding username of instance owner; if it can't be found, the
+    # username is set to the uid
+    owner_username = util.get_username(int(owner_uid))
 
     # construct instance owner dictionary
     instance_owner_data = {
@@ -218,12 +233,21 @@ def main():
     parser.add_argument(
         "-p", "--path", dest="path", help="specify location of database file"
     )
+    parser.add_argument(
+        "--profile",
+        help=(
+            "profile this command and write its cProfile stats and SQL statement "
+            "timings to DIR (can also be set with FLUX_ACCOUNT_PROFILE=DIR)"
+        ),
+        metavar="DIR",
+    )
     args = parser.parse_args()
 
     path = set_db_loc(args)
 
-    bulk_update(path)
-    send_instance_owner_info()
+    with profiling.profile("flux-account-priority-update", args.profile) as profiler:
+        bulk_update(path, profiler)
+        send_instance_owner_info()
 
 
 if __name__ == "__main__":
@@ -9,12 +9,14 @@
 #
 # SPDX-License-Identifier: LGPL-3.0
 ###############################################################
+import errno
 import signal
 import sys
 import sqlite3
 import os
 import argparse
 import logging
+import time
 
 import flux
 import flux.constants
@@ -28,9 +30,15 @@ from fluxacct.accounting import queue_subcommands as qu
 from fluxacct.accounting import project_subcommands as p
 from fluxacct.accounting import jobs_table_subcommands as j
 from fluxacct.accounting import db_info_subcommands as d
+from fluxacct.accounting import batch as bt
+from fluxacct.accounting import identity
+from fluxacct.accounting import job_archive
 from fluxacct.accounting import priorities as prio
+from fluxacct.accounting import profiling
+from fluxacct.accounting import service_stats
 from fluxacct.accounting import visuals as vis
 from fluxacct.accounting import sql_util as sql
+from fluxacct.accounting.bank_hierarchy import BankHierarchy
 
 
 def establish_sqlite_connection(path):
@@ -60,12 +68,74 @@ def background():
         sys.exit(0)
 
 
+# endpoints whose operations can be applied together by accounting.batch
+BATCH_ENDPOINTS = {
+    "add_user",
+    "delete_user",
+    "edit_user",
+    "add_bank",
+    "delete_bank",
+    "edit_bank",
+    "add_queue",
+    "delete_queue",
+    "edit_queue",
+    "add_project",
+    "delete_project",
+    "edit_factor",
+    "edit_all_users",
+    "add_config",
+    "edit_config",
+    "delete_config",
+}
+
+
+class BatchRequest:
+    """
+    A request to an endpoint made by one operation in an accounting.batch request,
+    which collects the endpoint's response instead of sending it.
+    """
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.result = None
+        self.error = None
+
+    def respond(self, msg, payload=None):
+        self.result = list(payload.values())[0] if payload else None
+
+    def respond_error(self, msg, errnum, errstr=None):
+        self.error = errstr or os.strerror(errnum)
+
+
 # pylint: disable=broad-except, too-many-public-methods
 class AccountingService:
-    def __init__(self, flux_handle, conn):
+    def __init__(
+        self,
+        flux_handle,
+        conn,
+        profile_dir=None,
+        stats_file=None,
+        stats_interval=60,
+        preload_identities=None,
+    ):
 
         self.handle = flux_handle
         self.conn = conn
+        # endpoints listed here are profiled on every request; they are turned on
+        # and off with the accounting.profile RPC
+        self.profile_dir = profile_dir
+        self.profiled_endpoints = set()
+        self.request_stats = service_stats.ServiceStats()
+        self.stats_file = stats_file
+        # the bank hierarchy is loaded once and shared by every request that walks
+        # it; it reloads itself whenever bank_table might have changed
+        self.bank_hierarchy = BankHierarchy(conn)
+        # fill the uid/username cache up front so that requests don't have to wait
+        # on the password database
+        if preload_identities == "passwd":
+            identity.cache.preload_passwd()
+        elif preload_identities == "db":
+            identity.cache.preload_db(conn)
 
         try:
             # register service with broker
@@ -111,6 +181,7 @@ class AccountingService:
             "add_project",
             "delete_project",
             "scrub_old_jobs",
+            "archive_old_jobs",
             "export_db",
             "pop_db",
             "shutdown_service",
@@ -123,11 +194,18 @@ class AccountingService:
             "add_config",
             "edit_config",
             "delete_config",
+            "profile",
+            "stats",
+            "batch",
         ]
+        self.endpoints = general_endpoints + privileged_endpoints
 
         for name in general_endpoints:
             watcher = self.handle.msg_watcher_create(
-                getattr(self, name), FLUX_MSGTYPE_REQUEST, f"accounting.{name}", self
+                self.wrap_endpoint(name),
+                FLUX_MSGTYPE_REQUEST,
+                f"accounting.{name}",
+                self,
             )
             self.handle.msg_handler_allow_rolemask(
                 watcher.handle, flux.constants.FLUX_ROLE_USER
@@ -136,9 +214,81 @@ class AccountingService:
 
         for name in privileged_endpoints:
             self.handle.msg_watcher_create(
-                getattr(self, name), FLUX_MSGTYPE_REQUEST, f"accounting.{name}", self
+                self.wrap_endpoint(name),
+                FLUX_MSGTYPE_REQUEST,
+                f"accounting.{name}",
+                self,
             ).start()
 
+        if self.stats_file:
+            # periodically write the service's statistics for a Prometheus
+            # textfile collector
+            self.handle.timer_watcher_create(
+                stats_interval, self.write_stats, repeat=stats_interval
+            ).start()
+
+    def wrap_endpoint(self, name):
+        """
+        Return the handler for an endpoint, wrapped so that every request to it is
+        recorded in the service's statistics, and profiled while profiling is
+        turned on for the endpoint.
+        """
+        handler = getattr(self, name)
+
+        def callback(handle, watcher, msg, arg):
+            recorder = service_stats.RecordingHandle(handle)
+            start = time.perf_counter()
+            try:
+                if name not in self.profiled_endpoints:
+                    return handler(recorder, watcher, msg, arg)
+                with profiling.Profiler(
+                    self.profile_dir, f"accounting.{name}", self.conn
+                ):
+                    return handler(recorder, watcher, msg, arg)
+            finally:
+                try:
+                    payload = msg.payload
+                except Exception:
+                    payload = None
+                self.request_stats.record(
+                    name,
+                    time.perf_counter() - start,
+                    error=recorder.error,
+                    nbytes=recorder.nbytes,
+                    payload=payload,
+                )
+
+        return callback
+
+    def get_page_size(self, msg):
+        """
+        Return the number of rows to send in each response to a request which
+        asked for its results to be streamed, or None if it did not.
+        """
+        if not msg.payload.get("stream"):
+            return None
+        return msg.payload.get("page_size") or fluxacct.accounting.PAGE_SIZE
+
+    def respond_pages(self, handle, msg, key, val):
+        """
+        Respond to a request with the result of an endpoint. If the request asked
+        for its results to be streamed, val is a generator of pages; each page is
+        sent in its own response, and the end of the stream is marked by an
+        ENODATA error.
+        """
+        if not msg.payload.get("stream"):
+            handle.respond(msg, {key: val})
+            return
+        for page in val:
+            handle.respond(msg, {key: page})
+        handle.respond_error(msg, errno.ENODATA)
+
+    def write_stats(self, handle, watcher, revents, arg):
+        try:
+            self.request_stats.write_prometheus(self.stats_file, self.conn)
+        except (OSError, sqlite3.Error) as exc:
+            LOGGER.error("unable to write stats to %s: %s", self.stats_file, exc)
+
     def shutdown(self, handle, watcher, signum, arg):
         print("Shutting down...", file=sys.stderr)
         self.conn.close()
@@ -206,11 +356,10 @@ class AccountingService:
                 projects=msg.payload.get("projects"),
                 default_project=msg.payload.get("default_project"),
                 max_sched_jobs=msg.payload.get("max_sched_jobs"),
+                page_size=self.get_page_size(msg),
             )
 
-            payload = {"list_users": val}
-
-            handle.respond(msg, payload)
+            self.respond_pages(handle, msg, "list_users", val)
         except KeyError as exc:
             handle.respond_error(msg, 0, f"list-users: missing key in payload: {exc}")
         except Exception as exc:
@@ -306,6 +455,7 @@ class AccountingService:
                 msg.payload.get("format"),
                 msg.payload.get("concise"),
                 msg.payload.get("active"),
+                hierarchy=self.bank_hierarchy,
             )
 
             payload = {"view_bank": val}
@@ -325,6 +475,7 @@ class AccountingService:
                 msg.payload.get("parent_bank"),
                 msg.payload.get("priority"),
                 msg.payload.get("ignore_older_than"),
+                hierarchy=self.bank_hierarchy,
             )
 
             payload = {"add_bank": val}
@@ -338,7 +489,10 @@ class AccountingService:
     def delete_bank(self, handle, watcher, msg, arg):
         try:
             val = b.delete_bank(
-                self.conn, msg.payload["bank"], msg.payload.get("force")
+                self.conn,
+                msg.payload["bank"],
+                msg.payload.get("force"),
+                hierarchy=self.bank_hierarchy,
             )
 
             payload = {"delete_bank": val}
@@ -358,6 +512,7 @@ class AccountingService:
                 msg.payload.get("parent_bank"),
                 msg.payload.get("priority"),
                 msg.payload.get("ignore_older_than"),
+                hierarchy=self.bank_hierarchy,
             )
 
             payload = {"edit_bank": val}
@@ -380,11 +535,10 @@ class AccountingService:
                 ),
                 msg.payload.get("json"),
                 msg.payload.get("format"),
+                page_size=self.get_page_size(msg),
             )
 
-            payload = {"list_banks": val}
-
-            handle.respond(msg, payload)
+            self.respond_pages(handle, msg, "list_banks", val)
         except KeyError as exc:
             handle.respond_error(msg, 0, f"list-banks: missing key in payload: {exc}")
         except Exception as exc:
@@ -405,11 +559,14 @@ class AccountingService:
                 requested_duration=msg.payload.get("requested_duration"),
                 actual_duration=msg.payload.get("actual_duration"),
                 duration_delta=msg.payload.get("duration_delta"),
+                sort=msg.payload.get("sort"),
+                limit=msg.payload.get("limit"),
+                offset=msg.payload.get("offset"),
+                after_job=msg.payload.get("after_job"),
+                page_size=self.get_page_size(msg),
             )
 
-            payload = {"view_job_records": val}
-
-            handle.respond(msg, payload)
+            self.respond_pages(handle, msg, "view_job_records", val)
         except KeyError as exc:
             handle.respond_error(
                 msg, 0, f"view-job-records: missing key in payload: {exc}"
@@ -580,13 +737,35 @@ class AccountingService:
         except Exception as exc:
             handle.respond_error(msg, 0, f"scrub-old-jobs: {type(exc).__name__}: {exc}")
 
+    def archive_old_jobs(self, handle, watcher, msg, arg):
+        try:
+            val = job_archive.archive_old_jobs(self.conn, msg.payload["num_weeks"])
+
+            payload = {"archive_old_jobs": val}
+
+            handle.respond(msg, payload)
+        except KeyError as exc:
+            handle.respond_error(
+                msg, 0, f"archive-old-jobs: missing key in payload: {exc}"
+            )
+        except Exception as exc:
+            handle.respond_error(
+                msg, 0, f"archive-old-jobs: {type(exc).__name__}: {exc}"
+            )
+
     def export_db(self, handle, watcher, msg, arg):
         try:
             fairshare_emulate = msg.payload.get("fairshare_emulate", False)
             if fairshare_emulate:
                 val = d.export_db_as_fairshare_json(self.conn)
             else:
-                val = d.export_db_info(self.conn)
+                val = d.export_db_info(
+                    self.conn,
+                    msg.payload.get("directory"),
+                    msg.payload.get("compress"),
+                    msg.payload.get("since"),
+                    msg.payload.get("parallel") or 1,
+                )
 
             payload = {"export_db": val}
 
@@ -598,15 +777,25 @@ class AccountingService:
 
     def pop_db(self, handle, watcher, msg, arg):
         try:
+            stream = msg.payload.get("stream")
+
+            def report_progress(rows):
+                # send the number of rows loaded so far while a large file is loaded
+                handle.respond(msg, {"pop_db": f"inserted {rows} row(s)\n"})
+
             val = d.populate_db(
                 self.conn,
                 msg.payload.get("csv_file"),
                 msg.payload.get("fields"),
+                table=msg.payload.get("table"),
+                progress=report_progress if stream else None,
             )
 
             payload = {"pop_db": val}
 
             handle.respond(msg, payload)
+            if stream:
+                handle.respond_error(msg, errno.ENODATA)
         except KeyError as exc:
             handle.respond_error(msg, 0, f"pop-db: missing key in payload: {exc}")
         except Exception as exc:
@@ -803,11 +992,10 @@ class AccountingService:
                 report_type=msg.payload.get("report_type"),
                 job_size_bins=msg.payload.get("job_size_bins"),
                 time_unit=msg.payload.get("time_unit"),
+                page_size=self.get_page_size(msg),
             )
 
-            payload = {"view_usage_report": val}
-
-            handle.respond(msg, payload)
+            self.respond_pages(handle, msg, "view_usage_report", val)
         except KeyError as exc:
             handle.respond_error(
                 msg, 0, f"view-usage-report: missing key in payload: {exc}"
@@ -925,6 +1113,7 @@ class AccountingService:
                 parsable=msg.payload.get("parsable"),
                 noheader=msg.payload.get("noheader"),
                 exclude=msg.payload.get("exclude"),
+                hierarchy=self.bank_hierarchy,
             )
 
             payload = {"bank_info": val}
@@ -935,6 +1124,92 @@ class AccountingService:
         except Exception as exc:
             handle.respond_error(msg, 0, f"bank-info: {type(exc).__name__}: {exc}")
 
+    def profile(self, handle, watcher, msg, arg):
+        try:
+            # endpoints can be named by their RPC topic or their subcommand name
+            endpoints = []
+            for endpoint in msg.payload.get("endpoints") or self.endpoints:
+                if endpoint.startswith("accounting."):
+                    endpoint = endpoint[len("accounting.") :]
+                endpoints.append(endpoint.replace("-", "_"))
+            unknown = sorted(set(endpoints) - set(self.endpoints))
+            if unknown:
+                raise ValueError(f"unknown endpoint(s): {', '.join(unknown)}")
+
+            if msg.payload.get("directory"):
+                self.profile_dir = msg.payload["directory"]
+            if msg.payload.get("disable"):
+                self.profiled_endpoints.difference_update(endpoints)
+            elif self.profile_dir is None:
+                raise ValueError(
+                    "no profile directory set; pass one with --directory or start "
+                    "the service with --profile-dir"
+                )
+            else:
+                self.profiled_endpoints.update(endpoints)
+
+            if self.profiled_endpoints:
+                val = (
+                    f"profiling {len(self.profiled_endpoints)} endpoint(s): "
+                    f"{', '.join(sorted(self.profiled_endpoints))}\n"
+                    f"writing profiles to {self.profile_dir}"
+                )
+            else:
+                val = "profiling is turned off for every endpoint"
+
+            payload = {"profile": val}
+
+            handle.respond(msg, payload)
+        except Exception as exc:
+            handle.respond_error(msg, 0, f"profile: {type(exc).__name__}: {exc}")
+
+    def apply_batch_operation(self, conn, operation):
+        """
+        Apply one operation of an accounting.batch request by passing its payload to
+        the endpoint it names, with conn in place of the service's connection.
+        """
+        name = operation["operation"]
+        if name not in BATCH_ENDPOINTS:
+            raise ValueError(f"{name} cannot be run in a batch")
+        request = BatchRequest(operation.get("payload", {}))
+        service_conn = self.conn
+        self.conn = conn
+        try:
+            getattr(self, name)(request, None, request, None)
+        finally:
+            self.conn = service_conn
+        if request.error is not None:
+            raise ValueError(request.error)
+        return request.result
+
+    def batch(self, handle, watcher, msg, arg):
+        try:
+            committed, results = bt.apply_batch(
+                self.conn,
+                msg.payload["operations"],
+                self.apply_batch_operation,
+                msg.payload.get("mode") or bt.ATOMIC,
+                hierarchy=self.bank_hierarchy,
+            )
+
+            payload = {"batch": {"committed": committed, "results": results}}
+
+            handle.respond(msg, payload)
+        except KeyError as exc:
+            handle.respond_error(msg, 0, f"batch: missing key in payload: {exc}")
+        except Exception as exc:
+            handle.respond_error(msg, 0, f"batch: {type(exc).__name__}: {exc}")
+
+    def stats(self, handle, watcher, msg, arg):
+        try:
+            stats = self.request_stats.to_dict(self.conn)
+            stats["identity"] = identity.cache.stats()
+            payload = {"stats": stats}
+
+            handle.respond(msg, payload)
+        except Exception as exc:
+            handle.respond_error(msg, 0, f"stats: {type(exc).__name__}: {exc}")
+
 
 LOGGER = logging.getLogger("flux-uri")
 
@@ -952,6 +1227,48 @@ def main():
         dest="background",
         help="used for testing",
     )
+    parser.add_argument(
+        "--profile-dir",
+        help=(
+            "write the profiles of the endpoints turned on with the "
+            "accounting.profile RPC to DIR (can also be set with "
+            "FLUX_ACCOUNT_PROFILE=DIR)"
+        ),
+        metavar="DIR",
+    )
+    parser.add_argument(
+        "--stats-file",
+        help=(
+            "periodically write request and database statistics to FILE in the "
+            "Prometheus text format, e.g. for a node exporter's textfile collector"
+        ),
+        metavar="FILE",
+    )
+    parser.add_argument(
+        "--stats-interval",
+        type=float,
+        default=60,
+        help="how often to write --stats-file, in seconds (default: 60)",
+        metavar="SECONDS",
+    )
+    parser.add_argument(
+        "--preload-identities",
+        choices=["passwd", "db"],
+        help=(
+            "fill the uid/username cache at startup from the password database "
+            "(passwd) or from the associations in the flux-accounting DB (db)"
+        ),
+    )
+    parser.add_argument(
+        "--identity-ttl",
+        type=float,
+        default=identity.DEFAULT_TTL,
+        help=(
+            "how long to cache a uid/username lookup, in seconds "
+            f"(default: {identity.DEFAULT_TTL})"
+        ),
+        metavar="SECONDS",
+    )
     args = parser.parse_args()
 
     # try to connect to flux-accounting database; if connection fails, exit
@@ -967,8 +1284,17 @@ def main():
         )
         sys.exit(1)
 
+    identity.cache.ttl = args.identity_ttl
+
     handle = flux.Flux()
-    server = AccountingService(handle, conn)
+    server = AccountingService(
+        handle,
+        conn,
+        profile_dir=profiling.get_profile_dir(args.profile_dir),
+        stats_file=args.stats_file,
+        stats_interval=args.stats_interval,
+        preload_identities=args.preload_identities,
+    )
 
     if args.background:
         background()
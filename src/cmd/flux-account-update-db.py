@@ -21,6 +21,8 @@ from argparse import RawDescriptionHelpFormatter
 
 import fluxacct.accounting
 from fluxacct.accounting import create_db as c
+from fluxacct.accounting import job_data
+from fluxacct.accounting import memberships
 from fluxacct.accounting import util
 
 LOGGER = logging.getLogger(__name__)
@@ -306,6 +308,59 @@ def init_config_table(cur):
             LOGGER.info("adding %s into config_table", key)
 
 
+def assign_assoc_ids(cur):
+    """
+    Add the assoc_id column to association_table if it does not exist yet and give
+    every association an assoc_id.
+
+    Args:
+        cur: the Cursor object used to interact with the database.
+    """
+    cur.execute("PRAGMA table_info(association_table)")
+    if "assoc_id" in [col[1] for col in cur.fetchall()]:
+        return
+
+    cur.execute("ALTER TABLE association_table ADD COLUMN assoc_id int(11)")
+    LOGGER.info("added column assoc_id to table association_table")
+    cur.execute("UPDATE association_table SET assoc_id=rowid")
+    LOGGER.info("assigned an assoc_id to %d association(s)", cur.rowcount)
+
+
+def key_usage_table_by_assoc_id(old_cur, new_cur, table):
+    """
+    Rebuild a usage table whose rows are keyed by username and bank so that they are
+    keyed by the assoc_id of the association instead. Rows of associations that are
+    no longer in association_table are dropped.
+
+    Args:
+        old_cur: the Cursor object of the old flux-accounting DB.
+        new_cur: the Cursor object of the temporary new flux-accounting DB.
+        table: the name of the usage table.
+    """
+    old_cur.execute("PRAGMA table_info(%s)" % table)
+    old_columns = [col[1] for col in old_cur.fetchall()]
+    if "assoc_id" in old_columns:
+        return
+
+    LOGGER.info("keying table %s by assoc_id...", table)
+    new_cur.execute("PRAGMA table_info(%s)" % table)
+    new_columns = new_cur.fetchall()
+    add_tmp_table_to_db(old_cur, (table,), new_columns)
+
+    # copy over the columns that are in both versions of the table
+    cols = [
+        col[1] for col in new_columns if col[1] != "assoc_id" and col[1] in old_columns
+    ]
+    old_cur.execute(f"""
+        INSERT OR IGNORE INTO {table}_tmp (assoc_id, {", ".join(cols)})
+        SELECT a.assoc_id, {", ".join("o." + col for col in cols)}
+        FROM {table} o JOIN association_table a
+        ON a.username = o.username AND a.bank = o.bank
+        """)
+    LOGGER.info("moved %d row(s) of table %s", old_cur.rowcount, table)
+    rename_tmp_table(old_cur, (table,))
+
+
 def migrate_job_usage_to_per_assoc(cur):
     """
     Migrate existing usage bin columns from job_usage_factor_table into the
@@ -330,28 +385,47 @@ def migrate_job_usage_to_per_assoc(cur):
 
     LOGGER.info("found %d usage period columns to migrate", len(bin_columns))
     # fetch all rows from the old table
-    cur.execute(
-        f"SELECT username, userid, bank, {', '.join(bin_columns)} FROM job_usage_factor_table"
-    )
+    cur.execute(f"""
+        SELECT a.assoc_id, {', '.join("j." + col for col in bin_columns)}
+        FROM job_usage_factor_table j JOIN association_table a
+        ON a.username = j.username AND a.bank = j.bank
+        """)
     rows = cur.fetchall()
     LOGGER.info("migrating %d associations...", len(rows))
 
     for row in rows:
-        username, userid, bank = row[0], row[1], row[2]
-        period_values = row[3:]
+        assoc_id = row[0]
+        period_values = row[1:]
 
         for period, value in enumerate(period_values):
             cur.execute(
                 """
                 INSERT OR IGNORE INTO job_usage_per_association_table
-                    (username, userid, bank, period, value)
-                VALUES (?, ?, ?, ?, ?)
+                    (assoc_id, period, value)
+                VALUES (?, ?, ?)
                 """,
-                (username, userid, bank, period, value),
+                (assoc_id, period, value),
             )
     LOGGER.info("migration complete")
 
 
+def update_memberships(conn):
+    """
+    Create the indexes and triggers of the association queue and project tables
+    and fill them in from the queues and projects of every association. This is
+    safe to call multiple times.
+
+    Args:
+        conn: the Connection object of the old flux-accounting DB.
+    """
+    memberships.create_tables(conn)
+    cur = conn.cursor()
+    memberships.populate(cur)
+    for table in memberships.TABLES:
+        count = cur.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        LOGGER.info("filled in %s with %d row(s)", table, count)
+
+
 def update_db(path, new_db):
     LOGGER.info("starting database update for %s", path)
     # create a backup of the database
@@ -378,9 +452,18 @@ def update_db(path, new_db):
             new_cur = new_conn.cursor()
 
             update_tables(old_cur, new_cur)
+            # the usage tables are keyed by the assoc_id of each association
+            assign_assoc_ids(old_cur)
+            key_usage_table_by_assoc_id(
+                old_cur, new_cur, "job_usage_per_association_table"
+            )
             migrate_job_usage_to_per_assoc(old_cur)
+            key_usage_table_by_assoc_id(old_cur, new_cur, "job_usage_factor_table")
 
             update_columns(old_cur, new_cur)
+            # triggers are dropped along with a table that had to be rebuilt
+            update_memberships(old_conn)
+            c.create_assoc_id_triggers(old_conn)
 
             init_priority_factor_table(old_cur)
             init_config_table(old_cur)
@@ -415,6 +498,27 @@ def update_db(path, new_db):
         sys.exit(1)
 
 
+def convert_job_storage(path, mode, chunk_size):
+    """
+    Convert the R and jobspec of every job in the jobs table to a storage mode,
+    logging the number of jobs converted after each chunk.
+    """
+    conn = est_sqlite_conn(path)
+    try:
+        converted = job_data.convert_jobs(
+            conn,
+            mode,
+            chunk_size,
+            progress=lambda count: LOGGER.info("converted %d job(s)", count),
+        )
+    except (ValueError, sqlite3.Error) as exc:
+        LOGGER.error("unable to convert jobs to %s storage: %s", mode, exc)
+        conn.close()
+        sys.exit(1)
+    conn.close()
+    LOGGER.info("converted %d job(s) to %s storage", converted, mode)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="""
@@ -433,6 +537,19 @@ def main():
         dest="new_db",
         help="(testing only) specify location of new template database file",
     )
+    parser.add_argument(
+        "--job-storage",
+        choices=job_data.STORAGE_MODES,
+        help="store the R and jobspec of jobs as text or compressed and "
+        "deduplicated, converting the jobs already in the DB",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=job_data.CONVERT_CHUNK_SIZE,
+        metavar="N",
+        help="convert N jobs per transaction with --job-storage",
+    )
     parser.add_argument(
         "-v",
         "--verbose",
@@ -447,6 +564,8 @@ def main():
     old_db = set_db_loc(args)
 
     update_db(old_db, args.new_db)
+    if args.job_storage:
+        convert_job_storage(old_db, args.job_storage, args.chunk_size)
 
 
 if __name__ == "__main__":
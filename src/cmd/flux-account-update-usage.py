@@ -9,6 +9,7 @@
 #
 # SPDX-License-Identifier: LGPL-3.0
 ###############################################################
+import json
 import logging
 import sqlite3
 import argparse
@@ -17,6 +18,7 @@ import os
 
 import fluxacct.accounting
 from fluxacct.accounting import job_usage_calculation as job_usage
+from fluxacct.accounting import profiling
 from fluxacct.accounting import util
 
 LOGGER = logging.getLogger(__name__)
@@ -57,6 +59,38 @@ def main():
     parser.add_argument(
         "-p", "--path", dest="path", help="specify location of database file"
     )
+    parser.add_argument(
+        "-c",
+        "--chunk-size",
+        type=int,
+        help=(
+            "update the job usage of at most this many associations per transaction "
+            "so that other writes to the database are not blocked for the whole "
+            "update; an interrupted update resumes where it left off"
+        ),
+        metavar="N",
+    )
+    parser.add_argument(
+        "--stats-file",
+        help=(
+            "write a JSON summary of the time spent and rows written by every phase "
+            "of the update to FILE"
+        ),
+        metavar="FILE",
+    )
+    parser.add_argument(
+        "--save-stats",
+        action="store_true",
+        help="save a JSON summary of the update in the config_table",
+    )
+    parser.add_argument(
+        "--profile",
+        help=(
+            "profile this command and write its cProfile stats and SQL statement "
+            "timings to DIR (can also be set with FLUX_ACCOUNT_PROFILE=DIR)"
+        ),
+        metavar="DIR",
+    )
     parser.add_argument(
         "-v",
         "--verbose",
@@ -71,7 +105,16 @@ def main():
     conn = est_sqlite_conn(path)
 
     try:
-        job_usage.update_job_usage(conn)
+        stats = job_usage.UpdateUsageStats(conn)
+        with profiling.profile("flux-account-update-usage", args.profile, conn):
+            job_usage.update_job_usage(conn, chunk_size=args.chunk_size, stats=stats)
+        stats.log(LOGGER)
+        if args.save_stats:
+            with conn:
+                stats.save(conn.cursor())
+        if args.stats_file:
+            with open(args.stats_file, "w", encoding="utf-8") as stats_file:
+                json.dump(stats.to_dict(), stats_file, indent=2)
     except sqlite3.OperationalError as exc:
         LOGGER.exception(
             "SQLite operational error during job-usage update; rolled back. "
@@ -10,15 +10,21 @@
 # SPDX-License-Identifier: LGPL-3.0
 ###############################################################
 import argparse
+import errno
+import json
+import os
+import shlex
 import sys
 import logging
 import subprocess
 
+from collections import deque
+
 import flux
+import flux.constants
 from flux.constants import FLUX_USERID_UNKNOWN
 import fluxacct.accounting
 
-from fluxacct.accounting import create_db as c
 from fluxacct.accounting import INTEGER_MAX
 
 
@@ -28,6 +34,18 @@ def add_path_arg(parser):
     )
 
 
+def add_profile_arg(parser):
+    parser.add_argument(
+        "--profile",
+        dest="profile_dir",
+        help=(
+            "profile this command and write its cProfile stats and SQL statement "
+            "timings to DIR (can also be set with FLUX_ACCOUNT_PROFILE=DIR)"
+        ),
+        metavar="DIR",
+    )
+
+
 def add_view_user_arg(subparsers):
     subparser_view_user = subparsers.add_parser(
         "view-user",
@@ -564,6 +582,36 @@ def add_view_job_records_arg(subparsers):
         ),
         metavar="FORMAT",
     )
+    subparser_view_job_records.add_argument(
+        "--sort",
+        help=(
+            "sort job records by a field; prefix the field with '-' to sort in "
+            "descending order. Available fields: jobid,userid,t_submit,t_run,"
+            "t_inactive,project,bank,requested_duration,actual_duration,"
+            "duration_delta"
+        ),
+        metavar="FIELD",
+    )
+    subparser_view_job_records.add_argument(
+        "--limit",
+        type=int,
+        help="only return up to N job records",
+        metavar="N",
+    )
+    subparser_view_job_records.add_argument(
+        "--offset",
+        type=int,
+        help="skip the first N job records",
+        metavar="N",
+    )
+    subparser_view_job_records.add_argument(
+        "--after-job",
+        help=(
+            "only return the job records which come after JOBID in the sort order, "
+            "e.g. the last job record of the previous page"
+        ),
+        metavar="JOBID",
+    )
 
 
 def add_create_db_arg(subparsers):
@@ -1216,6 +1264,24 @@ def add_scrub_job_records_arg(subparsers):
     )
 
 
+def add_archive_job_records_arg(subparsers):
+    subparser = subparsers.add_parser(
+        "archive-old-jobs",
+        help="move old job records into monthly archive databases",
+        formatter_class=flux.util.help_formatter(),
+    )
+
+    subparser.set_defaults(func="archive_old_jobs")
+    subparser.add_argument(
+        "num_weeks",
+        help="archive jobs that have finished more than NUM_WEEKS ago",
+        type=int,
+        nargs="?",
+        metavar="NUM_WEEKS",
+        default=26,
+    )
+
+
 def add_export_db_arg(subparsers):
     subparser = subparsers.add_parser(
         "export-db",
@@ -1229,6 +1295,30 @@ def add_export_db_arg(subparsers):
         action="store_true",
         help="export as JSON hierarchy for flux account fairshare-emulate",
     )
+    subparser.add_argument(
+        "-d",
+        "--directory",
+        type=os.path.abspath,
+        help="write the .csv files to DIR",
+        metavar="DIR",
+    )
+    subparser.add_argument(
+        "--compress",
+        choices=["gzip", "zstd"],
+        help="compress the .csv files",
+    )
+    subparser.add_argument(
+        "--since",
+        help="only export the associations and jobs which have changed since WHEN",
+        metavar="WHEN",
+    )
+    subparser.add_argument(
+        "--parallel",
+        type=int,
+        default=4,
+        help="the number of tables to export at once (default: 4)",
+        metavar="N",
+    )
 
 
 def add_pop_db_arg(subparsers):
@@ -1244,6 +1334,11 @@ def add_pop_db_arg(subparsers):
     subparser.add_argument(
         "-f", "--fields", help="which fields to insert into the table"
     )
+    subparser.add_argument(
+        "--table",
+        help="the table to populate (default: the name of the .csv file)",
+        metavar="TABLE",
+    )
 
 
 def add_list_queues_arg(subparsers):
@@ -1674,50 +1769,142 @@ def add_list_configs(subparsers):
     )
 
 
-def add_arguments_to_parser(parser, subparsers):
+def add_profile_service_arg(subparsers):
+    subparser_profile = subparsers.add_parser(
+        "profile",
+        help="turn profiling of flux-accounting service endpoints on or off",
+        formatter_class=flux.util.help_formatter(),
+    )
+    subparser_profile.set_defaults(func="profile")
+    subparser_profile.add_argument(
+        "endpoints",
+        nargs="*",
+        help="the endpoints to profile (default: every endpoint)",
+        metavar="ENDPOINT",
+    )
+    subparser_profile.add_argument(
+        "--disable",
+        action="store_true",
+        help="stop profiling the endpoints",
+    )
+    subparser_profile.add_argument(
+        "-d",
+        "--directory",
+        help="write the profiles to DIR",
+        metavar="DIR",
+    )
+
+
+def add_batch_arg(subparsers):
+    subparser_batch = subparsers.add_parser(
+        "batch",
+        help="run a file of flux account commands over one connection",
+        formatter_class=flux.util.help_formatter(),
+    )
+    subparser_batch.set_defaults(func="batch")
+    subparser_batch.add_argument(
+        "file",
+        help="a file with one command per line, or - to read from stdin",
+        metavar="FILE",
+    )
+    subparser_batch.add_argument(
+        "-t",
+        "--transaction",
+        action="store_true",
+        help="apply every command in a single transaction",
+    )
+    subparser_batch.add_argument(
+        "--continue-on-error",
+        action="store_true",
+        help="keep going after a command fails",
+    )
+    subparser_batch.add_argument(
+        "--window",
+        type=int,
+        default=64,
+        help="the number of commands to have in flight at once (default: 64)",
+        metavar="N",
+    )
+
+
+# the function which adds the parser of each subcommand, in the order they are
+# listed in the help message
+SUBCOMMANDS = {
+    "view-user": add_view_user_arg,
+    "list-users": add_list_users_arg,
+    "add-user": add_add_user_arg,
+    "delete-user": add_delete_user_arg,
+    "edit-user": add_edit_user_arg,
+    "view-job-records": add_view_job_records_arg,
+    "create-db": add_create_db_arg,
+    "add-bank": add_add_bank_arg,
+    "view-bank": add_view_bank_arg,
+    "delete-bank": add_delete_bank_arg,
+    "edit-bank": add_edit_bank_arg,
+    "list-banks": add_list_banks_arg,
+    "bank-info": add_bank_info_arg,
+    "update-usage": add_update_usage_arg,
+    "add-queue": add_add_queue_arg,
+    "view-queue": add_view_queue_arg,
+    "edit-queue": add_edit_queue_arg,
+    "delete-queue": add_delete_queue_arg,
+    "add-project": add_add_project_arg,
+    "view-project": add_view_project_arg,
+    "delete-project": add_delete_project_arg,
+    "list-projects": add_list_projects_arg,
+    "scrub-old-jobs": add_scrub_job_records_arg,
+    "archive-old-jobs": add_archive_job_records_arg,
+    "export-db": add_export_db_arg,
+    "pop-db": add_pop_db_arg,
+    "list-queues": add_list_queues_arg,
+    "view-factor": add_view_priority_factor_arg,
+    "edit-factor": add_edit_priority_factor_arg,
+    "list-factors": add_list_priority_factors,
+    "reset-factors": add_reset_priority_factors_arg,
+    "jobs": add_jobs_arg,
+    "show-usage": add_show_usage_arg,
+    "edit-all-users": add_edit_all_users_arg,
+    "sync-userids": add_synchronize_userids_arg,
+    "export-json": add_export_json_arg,
+    "view-usage-report": view_usage_report,
+    "clear-usage": add_clear_usage_arg,
+    "add-config": add_add_config_arg,
+    "view-config": add_view_config_arg,
+    "edit-config": add_edit_config_arg,
+    "delete-config": add_delete_config_arg,
+    "list-configs": add_list_configs,
+    "profile": add_profile_service_arg,
+    "batch": add_batch_arg,
+}
+
+
+def find_subcommand(argv):
+    """
+    Return the name of the subcommand in a list of command line arguments, skipping
+    over the options that come before it, or None if there isn't one.
+    """
+    args = iter(argv)
+    for arg in args:
+        if arg in ("-p", "--path", "--profile"):
+            # skip the value of the option
+            next(args, None)
+        elif not arg.startswith("-"):
+            return arg
+    return None
+
+
+def add_arguments_to_parser(parser, subparsers, subcommand=None):
+    """
+    Add the options of flux account and the parsers of its subcommands. If the
+    name of a subcommand is passed in, only its parser is built.
+    """
     add_path_arg(parser)
-    add_view_user_arg(subparsers)
-    add_list_users_arg(subparsers)
-    add_add_user_arg(subparsers)
-    add_delete_user_arg(subparsers)
-    add_edit_user_arg(subparsers)
-    add_view_job_records_arg(subparsers)
-    add_create_db_arg(subparsers)
-    add_add_bank_arg(subparsers)
-    add_view_bank_arg(subparsers)
-    add_delete_bank_arg(subparsers)
-    add_edit_bank_arg(subparsers)
-    add_list_banks_arg(subparsers)
-    add_bank_info_arg(subparsers)
-    add_update_usage_arg(subparsers)
-    add_add_queue_arg(subparsers)
-    add_view_queue_arg(subparsers)
-    add_edit_queue_arg(subparsers)
-    add_delete_queue_arg(subparsers)
-    add_add_project_arg(subparsers)
-    add_view_project_arg(subparsers)
-    add_delete_project_arg(subparsers)
-    add_list_projects_arg(subparsers)
-    add_scrub_job_records_arg(subparsers)
-    add_export_db_arg(subparsers)
-    add_pop_db_arg(subparsers)
-    add_list_queues_arg(subparsers)
-    add_view_priority_factor_arg(subparsers)
-    add_edit_priority_factor_arg(subparsers)
-    add_list_priority_factors(subparsers)
-    add_reset_priority_factors_arg(subparsers)
-    add_jobs_arg(subparsers)
-    add_show_usage_arg(subparsers)
-    add_edit_all_users_arg(subparsers)
-    add_synchronize_userids_arg(subparsers)
-    add_export_json_arg(subparsers)
-    view_usage_report(subparsers)
-    add_clear_usage_arg(subparsers)
-    add_add_config_arg(subparsers)
-    add_view_config_arg(subparsers)
-    add_edit_config_arg(subparsers)
-    add_delete_config_arg(subparsers)
-    add_list_configs(subparsers)
+    add_profile_arg(parser)
+    if subcommand in SUBCOMMANDS:
+        SUBCOMMANDS[subcommand](subparsers)
+        return
+    for add_subcommand_arg in SUBCOMMANDS.values():
+        add_subcommand_arg(subparsers)
 
 
 def set_db_location(args):
@@ -1726,6 +1913,190 @@ def set_db_location(args):
     return path
 
 
+# commands whose results can be large enough that the service streams them back
+# a page at a time, or which report their progress as they run
+STREAMED_FUNCS = {
+    "list_users",
+    "list_banks",
+    "view_job_records",
+    "view_usage_report",
+    "pop_db",
+}
+
+
+def print_pages(topic, data):
+    """
+    Send a streaming request to the accounting service and print each page of
+    its results as it arrives. The service marks the end of the stream with an
+    ENODATA error.
+    """
+    data["stream"] = True
+    future = flux.Flux().rpc(topic, data, flags=flux.constants.FLUX_RPC_STREAMING)
+    while True:
+        try:
+            page = list(future.get().values())[0]
+        except OSError as exc:
+            if exc.errno == errno.ENODATA:
+                break
+            raise
+        print(page, end="")
+        future.reset()
+    print()
+
+
+# commands that can be listed in the file passed to flux account batch
+BATCH_FUNCS = {
+    "add_user",
+    "delete_user",
+    "edit_user",
+    "add_bank",
+    "delete_bank",
+    "edit_bank",
+    "add_queue",
+    "delete_queue",
+    "edit_queue",
+    "add_project",
+    "delete_project",
+    "edit_factor",
+    "edit_all_users",
+    "add_config",
+    "edit_config",
+    "delete_config",
+}
+
+
+def subcommand_defaults(subparser):
+    """Return the default value of every argument of a subcommand."""
+    # pylint: disable=protected-access
+    defaults = {
+        action.dest: action.default
+        for action in subparser._actions
+        if action.dest != "help"
+    }
+    defaults["func"] = subparser.get_default("func")
+    return defaults
+
+
+def parse_batch_line(line, parser, subparsers):
+    """
+    Return the payload of one line of a batch file. A line is either a JSON object
+    with the name of a subcommand in "command" and its arguments in the rest of its
+    keys, or a flux account command line.
+    """
+    if line.startswith("{"):
+        data = json.loads(line)
+        command = str(data.pop("command", "")).replace("_", "-")
+        if command not in subparsers.choices:
+            raise ValueError(f"unknown command '{command}'")
+        payload = subcommand_defaults(subparsers.choices[command])
+        payload.update(data)
+    else:
+        argv = shlex.split(line)
+        if argv[:2] == ["flux", "account"]:
+            argv = argv[2:]
+        try:
+            payload = vars(parser.parse_args(argv))
+        except SystemExit:
+            # argparse has already printed why the command couldn't be parsed
+            raise ValueError("invalid command") from None
+    if payload["func"] not in BATCH_FUNCS:
+        command = payload["func"].replace("_", "-")
+        raise ValueError(f"'{command}' cannot be run in a batch")
+    return payload
+
+
+def read_batch_file(filename):
+    """
+    Read a batch file and return the line number and payload of each command in
+    it. Blank lines and lines that start with # are skipped.
+    """
+    parser = argparse.ArgumentParser(prog="flux account")
+    subparsers = parser.add_subparsers(dest="subcommand")
+    subparsers.required = True
+    add_arguments_to_parser(parser, subparsers)
+
+    if filename == "-":
+        lines = sys.stdin.readlines()
+    else:
+        with open(filename, encoding="utf-8") as batch_file:
+            lines = batch_file.readlines()
+
+    operations = []
+    for lineno, line in enumerate(lines, start=1):
+        line = line.strip()
+        if line == "" or line.startswith("#"):
+            continue
+        try:
+            operations.append((lineno, parse_batch_line(line, parser, subparsers)))
+        except ValueError as exc:
+            raise ValueError(f"{filename}:{lineno}: {exc}") from None
+    return operations
+
+
+def run_batch(args):
+    """
+    Send the commands in a batch file to the accounting service over one handle.
+
+    By default, each command is sent to its own endpoint and up to args.window
+    requests are in flight at a time; commands are not sent after one fails
+    unless args.continue_on_error is set. With args.transaction, every command is
+    sent in one accounting.batch request and applied in a single transaction.
+    """
+    # pylint: disable=import-outside-toplevel
+    from fluxacct.accounting import batch as bt
+
+    operations = read_batch_file(args.file)
+    handle = flux.Flux()
+    failed = 0
+
+    if args.transaction:
+        response = handle.rpc(
+            "accounting.batch",
+            {
+                "operations": [
+                    {"operation": payload["func"], "payload": payload}
+                    for _, payload in operations
+                ],
+                "mode": bt.CONTINUE if args.continue_on_error else bt.ATOMIC,
+            },
+        ).get()["batch"]
+        for (lineno, _), result in zip(operations, response["results"]):
+            if result["status"] == "error":
+                LOGGER.error("%s:%d: %s", args.file, lineno, result["error"])
+                failed += 1
+            elif result["status"] == "ok" and result["result"] != 0:
+                print(result["result"])
+        if not response["committed"]:
+            LOGGER.error("no changes were made to the flux-accounting DB")
+    else:
+        pending = deque()
+
+        def wait_for_oldest():
+            lineno, future = pending.popleft()
+            try:
+                return_val = list(future.get().values())[0]
+            except OSError as exc:
+                LOGGER.error("%s:%d: %s", args.file, lineno, exc.strerror or exc)
+                return 1
+            if return_val != 0:
+                print(return_val)
+            return 0
+
+        for lineno, payload in operations:
+            if failed and not args.continue_on_error:
+                break
+            pending.append(
+                (lineno, handle.rpc(f"accounting.{payload['func']}", payload))
+            )
+            if len(pending) >= args.window:
+                failed += wait_for_oldest()
+        while pending:
+            failed += wait_for_oldest()
+
+    if failed:
+        sys.exit(1)
+
+
 def select_accounting_function(args, parser):
     data = vars(args)
 
@@ -1752,6 +2123,7 @@ def select_accounting_function(args, parser):
         "delete_project": "accounting.delete_project",
         "list_projects": "accounting.list_projects",
         "scrub_old_jobs": "accounting.scrub_old_jobs",
+        "archive_old_jobs": "accounting.archive_old_jobs",
         "export_db": "accounting.export_db",
         "pop_db": "accounting.pop_db",
         "list_queues": "accounting.list_queues",
@@ -1771,8 +2143,12 @@ def select_accounting_function(args, parser):
         "edit_config": "accounting.edit_config",
         "delete_config": "accounting.delete_config",
         "list_configs": "accounting.list_configs",
+        "profile": "accounting.profile",
     }
 
+    if args.func in STREAMED_FUNCS:
+        print_pages(func_map[args.func], data)
+        return
     if args.func in func_map:
         return_val = flux.Flux().rpc(func_map[args.func], data).get()
     else:
@@ -1783,27 +2159,15 @@ def select_accounting_function(args, parser):
         print(list(return_val.values())[0])
 
 
-LOGGER = logging.getLogger("flux-account")
-
-
-@flux.util.CLIMain(LOGGER)
-def main():
-
-    parser = argparse.ArgumentParser(description="""
-        Description: Translate command line arguments into
-        SQLite instructions for the Flux Accounting Database.
-        """)
-    subparsers = parser.add_subparsers(help="sub-command help", dest="subcommand")
-    subparsers.required = True
-
-    add_arguments_to_parser(parser, subparsers)
-    args = parser.parse_args()
-
+def run_command(args, parser):
     path = set_db_location(args)
 
     # if we are creating the DB for the first time, we need
     # to ONLY create the DB and then exit out successfully
     if args.func == "create_db":
+        # pylint: disable=import-outside-toplevel
+        from fluxacct.accounting import create_db as c
+
         c.create_db(
             path,
             args.priority_usage_reset_period,
@@ -1840,8 +2204,42 @@ def main():
             sys.exit(1)
         sys.exit(0)
 
+    if args.func == "batch":
+        run_batch(args)
+        return
+
     select_accounting_function(args, parser)
 
 
+LOGGER = logging.getLogger("flux-account")
+
+
+@flux.util.CLIMain(LOGGER)
+def main():
+
+    parser = argparse.ArgumentParser(description="""
+        Description: Translate command line arguments into
+        SQLite instructions for the Flux Accounting Database.
+        """)
+    subparsers = parser.add_subparsers(help="sub-command help", dest="subcommand")
+    subparsers.required = True
+
+    # only build the parser of the subcommand being run; the parsers of every
+    # subcommand are built if it can't be found, e.g. for --help
+    add_arguments_to_parser(parser, subparsers, find_subcommand(sys.argv[1:]))
+    args = parser.parse_args()
+
+    if args.profile_dir or os.environ.get("FLUX_ACCOUNT_PROFILE"):
+        # the profiling module is only imported when profiling is turned on, with
+        # --profile or FLUX_ACCOUNT_PROFILE (see profiling.PROFILE_ENV)
+        # pylint: disable=import-outside-toplevel
+        from fluxacct.accounting import profiling
+
+        with profiling.profile(f"flux-account.{args.func}", args.profile_dir):
+            run_command(args, parser)
+    else:
+        run_command(args, parser)
+
+
 if __name__ == "__main__":
     main()
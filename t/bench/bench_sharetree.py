@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+
+# Benchmark building the bank_info sharetree on a synthetic hierarchy.
+#
+# Usage: flux python bench_sharetree.py [-u NUSERS] [-b NBANKS] [-r REPEAT]
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from fluxacct.accounting import create_db as c
+from fluxacct.accounting import bank_subcommands as b
+
+
+def populate(conn, nbanks, nusers):
+    """
+    Fill a fresh flux-accounting DB with a root bank, NBANKS sub-banks under it,
+    and NUSERS associations spread evenly across the sub-banks. Rows are inserted
+    directly so that setting up a large tree does not dominate the run time.
+    """
+    now = int(time.time())
+    conn.execute(
+        "INSERT INTO bank_table (bank, parent_bank, shares, job_usage) "
+        "VALUES ('root', '', 1, ?)",
+        (float(nusers),),
+    )
+    conn.executemany(
+        "INSERT INTO bank_table (bank, parent_bank, shares, job_usage) "
+        "VALUES (?, 'root', ?, ?)",
+        ((f"bank{i}", 1 + i % 10, float(nusers // nbanks)) for i in range(nbanks)),
+    )
+    conn.executemany(
+        """
+        INSERT INTO association_table
+        (creation_time, mod_time, username, userid, bank, default_bank, shares,
+         job_usage)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            (
+                now,
+                now,
+                f"user{i}",
+                50000 + i,
+                f"bank{i % nbanks}",
+                f"bank{i % nbanks}",
+                1 + i % 7,
+                1.0,
+            )
+            for i in range(nusers)
+        ),
+    )
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="benchmark building the bank_info sharetree"
+    )
+    parser.add_argument("-u", "--users", type=int, default=100000, metavar="NUSERS")
+    parser.add_argument("-b", "--banks", type=int, default=100, metavar="NBANKS")
+    parser.add_argument("-r", "--repeat", type=int, default=3, metavar="REPEAT")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dbpath = os.path.join(tmpdir, "FluxAccounting.db")
+        c.create_db(dbpath)
+        conn = sqlite3.connect(dbpath)
+        conn.row_factory = sqlite3.Row
+        populate(conn, args.banks, args.users)
+
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            sharetree = b._build_sharetree(conn.cursor())
+            timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        b.bank_info(conn, tree="root")
+        bank_info_time = time.perf_counter() - start
+        conn.close()
+
+    print(f"banks:               {args.banks}")
+    print(f"associations:        {args.users}")
+    print(f"sharetree nodes:     {len(sharetree)}")
+    print(f"_build_sharetree:    {min(timings):.3f}s (best of {args.repeat})")
+    print(f"bank_info -t root:   {bank_info_time:.3f}s")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
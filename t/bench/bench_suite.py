@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+
+# Time the flux-accounting operations that scale with the size of the DB against
+# a synthetic DB, and write a JSON report that can be compared across commits.
+#
+# Usage: flux python bench_suite.py [-b NBANKS] [-d DEPTH] [-a NASSOCS]
+#                                   [-q NQUEUES] [-P NPROJECTS] [-j NJOBS]
+#                                   [-r REPEAT] [-o REPORT] [--db DBPATH]
+#                                   [--compare OLD_REPORT] [--only NAME,...]
+#
+# Everything but update-fshare runs against SQLite directly, so no Flux instance
+# is needed; update-fshare is skipped if the flux command cannot be found.
+
+import argparse
+import csv
+import importlib.util
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from flux.resource import ResourceSet
+
+import fluxacct.accounting
+from fluxacct.accounting import bank_subcommands as b
+from fluxacct.accounting import db_info_subcommands as d
+from fluxacct.accounting import job_usage_calculation as jobs
+from fluxacct.accounting import jobs_table_subcommands as j
+from fluxacct.accounting import rv1
+from fluxacct.accounting import user_subcommands as u
+
+import gen_db
+
+SRCDIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+
+def load_command(name):
+    """Load one of the flux-account-*.py commands in src/cmd as a module."""
+    path = os.path.join(SRCDIR, "src", "cmd", f"flux-account-{name}.py")
+    spec = importlib.util.spec_from_file_location(name.replace("-", "_"), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def connect(path):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+class Benchmark:
+    """
+    Time one operation REPEAT times. If the operation changes the DB, SETUP copies
+    the DB for every run so that each run starts from the same state.
+    """
+
+    def __init__(self, dbpath, tmpdir, repeat):
+        self.dbpath = dbpath
+        self.tmpdir = tmpdir
+        self.repeat = repeat
+
+    def fresh_copy(self):
+        path = os.path.join(self.tmpdir, "copy.db")
+        shutil.copyfile(self.dbpath, path)
+        return path
+
+    def run(self, func, setup=None):
+        """
+        Call FUNC(state) REPEAT times, where state is the value returned by SETUP()
+        (or None), and return the timings of every run.
+        """
+        timings = []
+        for _ in range(self.repeat):
+            state = setup() if setup else None
+            start = time.perf_counter()
+            func(state)
+            timings.append(time.perf_counter() - start)
+        return {
+            "min": min(timings),
+            "mean": sum(timings) / len(timings),
+            "runs": timings,
+        }
+
+
+def bench_update_job_usage(bench, new_period=False):
+    def setup():
+        conn = connect(bench.fresh_copy())
+        if new_period:
+            # the current half-life period has just ended
+            conn.execute(
+                "UPDATE t_half_life_period_table SET end_half_life_period=?",
+                (time.time() - 1,),
+            )
+            conn.commit()
+        return conn
+
+    def update(conn):
+        jobs.update_job_usage(conn)
+        conn.close()
+
+    return bench.run(update, setup)
+
+
+def bench_update_fshare(bench):
+    flux = shutil.which("flux")
+    if flux is None:
+        return {"skipped": "flux command not found"}
+
+    def update(path):
+        subprocess.run(
+            [flux, "account-update-fshare", "-p", path],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+
+    try:
+        return bench.run(update, bench.fresh_copy)
+    except (OSError, subprocess.CalledProcessError) as exc:
+        return {"skipped": f"{type(exc).__name__}: {exc}"}
+
+
+def bench_bulk_update_payloads(bench):
+    priority_update = load_command("priority-update")
+    conn = connect(bench.dbpath)
+
+    def build(_):
+        priority_update.get_bulk_update_payloads(conn.cursor())
+
+    result = bench.run(build)
+    conn.close()
+    return result
+
+
+def bench_fetch_insert(bench, associations, njobs, seed):
+    fetch_job_records = load_command("fetch-job-records")
+    now = time.time()
+    job_records = list(
+        gen_db.make_job_records(
+            random.Random(seed),
+            associations,
+            njobs,
+            now - 3600,
+            now,
+            first_jobid=gen_db.JOBID_BASE * 2,
+        )
+    )
+
+    def setup():
+        return connect(bench.fresh_copy())
+
+    def insert(conn):
+        fetch_job_records.insert_jobs_in_db(conn, conn.cursor(), job_records)
+        conn.close()
+
+    return bench.run(insert, setup)
+
+
+def bench_pop_db(bench):
+    """Load every job record in the DB from a .csv file into an empty jobs table."""
+    conn = connect(bench.dbpath)
+    cur = conn.execute("SELECT * FROM jobs")
+    csv_path = os.path.join(bench.tmpdir, "jobs_export.csv")
+    with open(csv_path, "w", newline="") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow([description[0] for description in cur.description])
+        writer.writerows(cur)
+    conn.close()
+
+    def setup():
+        conn = connect(bench.fresh_copy())
+        conn.execute("DELETE FROM jobs")
+        conn.commit()
+        return conn
+
+    def load(conn):
+        d.populate_db(conn, csv_path, table="jobs")
+        conn.close()
+
+    return bench.run(load, setup)
+
+
+def bench_resource_counts(bench, count):
+    """Count the resources in the R of every job in the DB."""
+    conn = connect(bench.dbpath)
+    Rs = [row[0] for row in conn.execute("SELECT R FROM jobs")]
+    conn.close()
+
+    def parse(_):
+        for R in Rs:
+            count(R)
+
+    result = bench.run(parse)
+    result["per_second"] = len(Rs) / result["min"] if result["min"] else 0
+    return result
+
+
+def resourceset_counts(R):
+    rset = ResourceSet(R)
+    return rset.nnodes, rset.ncores, rset.ngpus
+
+
+def bench_read_only(bench, func):
+    conn = connect(bench.dbpath)
+    result = bench.run(lambda _: func(conn))
+    conn.close()
+    return result
+
+
+def get_benchmarks(args, dbpath, associations):
+    """
+    Return a dictionary of benchmark names and functions which take a Benchmark
+    object and return a report entry.
+    """
+    username, _, bank, _, _ = associations[0]
+    # report on every job record in the DB
+    conn = connect(dbpath)
+    first, last = conn.execute(
+        "SELECT MIN(t_inactive), MAX(t_inactive) FROM jobs"
+    ).fetchone()
+    conn.close()
+    start = datetime.fromtimestamp((first or 0) - 86400).strftime("%m/%d/%y")
+    end = datetime.fromtimestamp((last or 0) + 86400).strftime("%m/%d/%y")
+
+    return {
+        "update_job_usage": bench_update_job_usage,
+        "update_job_usage_new_period": lambda bench: bench_update_job_usage(
+            bench, new_period=True
+        ),
+        "update_fshare": bench_update_fshare,
+        "bulk_update_payloads": bench_bulk_update_payloads,
+        "fetch_insert": lambda bench: bench_fetch_insert(
+            bench, associations, args.fetch_jobs, args.seed
+        ),
+        "pop_db_jobs": bench_pop_db,
+        "view_usage_report": lambda bench: bench_read_only(
+            bench,
+            lambda conn: jobs.view_usage_report(
+                conn, start=start, end=end, report_type="byassociation"
+            ),
+        ),
+        "bank_info_root": lambda bench: bench_read_only(
+            bench, lambda conn: b.bank_info(conn, tree="root")
+        ),
+        "bank_info_user": lambda bench: bench_read_only(
+            bench, lambda conn: b.bank_info(conn, user=username)
+        ),
+        "list_users": lambda bench: bench_read_only(bench, u.list_users),
+        "resource_counts": lambda bench: bench_resource_counts(
+            bench, rv1.resource_counts
+        ),
+        "resource_counts_resourceset": lambda bench: bench_resource_counts(
+            bench, resourceset_counts
+        ),
+        "view_job_records": lambda bench: bench_read_only(
+            bench, lambda conn: j.view_jobs(conn, None)
+        ),
+        "view_job_records_user": lambda bench: bench_read_only(
+            bench, lambda conn: j.view_jobs(conn, None, user=username)
+        ),
+        "view_job_records_bank": lambda bench: bench_read_only(
+            bench, lambda conn: j.view_jobs(conn, None, bank=bank)
+        ),
+    }
+
+
+def compare(report, old_report):
+    """Print the change in the best time of every benchmark in both reports."""
+    print(f"{'benchmark':<30} {'old':>10} {'new':>10} {'change':>8}")
+    for name, result in report["results"].items():
+        old = old_report["results"].get(name, {})
+        if "min" not in result or "min" not in old:
+            continue
+        change = (result["min"] - old["min"]) / old["min"] * 100 if old["min"] else 0
+        print(f"{name:<30} {old['min']:>9.3f}s {result['min']:>9.3f}s {change:>+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="benchmark flux-accounting operations on a synthetic DB"
+    )
+    parser.add_argument("-b", "--banks", type=int, default=100, metavar="NBANKS")
+    parser.add_argument("-d", "--depth", type=int, default=3, metavar="DEPTH")
+    parser.add_argument(
+        "-a", "--associations", type=int, default=10000, metavar="NASSOCS"
+    )
+    parser.add_argument("-q", "--queues", type=int, default=8, metavar="NQUEUES")
+    parser.add_argument("-P", "--projects", type=int, default=50, metavar="NPROJECTS")
+    parser.add_argument("-j", "--jobs", type=int, default=100000, metavar="NJOBS")
+    parser.add_argument(
+        "-f",
+        "--fetch-jobs",
+        type=int,
+        default=10000,
+        metavar="NJOBS",
+        help="number of new job records inserted by the fetch benchmark",
+    )
+    parser.add_argument("-s", "--seed", type=int, default=0, metavar="SEED")
+    parser.add_argument("-r", "--repeat", type=int, default=3, metavar="REPEAT")
+    parser.add_argument(
+        "-o", "--output", metavar="REPORT", help="write the JSON report to REPORT"
+    )
+    parser.add_argument(
+        "--db",
+        metavar="DBPATH",
+        help="keep the generated DB at DBPATH instead of a temporary directory",
+    )
+    parser.add_argument(
+        "--compare", metavar="OLD_REPORT", help="compare the results to OLD_REPORT"
+    )
+    parser.add_argument(
+        "--only", metavar="NAME,...", help="only run the named benchmarks"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dbpath = args.db if args.db else os.path.join(tmpdir, "FluxAccounting.db")
+        if os.path.exists(dbpath):
+            os.remove(dbpath)
+
+        start = time.perf_counter()
+        associations = gen_db.generate_db(
+            dbpath,
+            nbanks=args.banks,
+            depth=args.depth,
+            nassocs=args.associations,
+            nqueues=args.queues,
+            nprojects=args.projects,
+            njobs=args.jobs,
+            seed=args.seed,
+        )
+        generate_time = time.perf_counter() - start
+
+        benchmarks = get_benchmarks(args, dbpath, associations)
+        if args.only:
+            names = args.only.split(",")
+            unknown = set(names) - set(benchmarks)
+            if unknown:
+                parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+            benchmarks = {name: benchmarks[name] for name in names}
+
+        bench = Benchmark(dbpath, tmpdir, args.repeat)
+        results = {}
+        for name, func in benchmarks.items():
+            results[name] = func(bench)
+            if "min" in results[name]:
+                print(f"{name:<30} {results[name]['min']:.3f}s", file=sys.stderr)
+            else:
+                print(f"{name:<30} {results[name]['skipped']}", file=sys.stderr)
+
+    report = {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "db_schema_version": fluxacct.accounting.DB_SCHEMA_VERSION,
+        "parameters": {
+            "banks": args.banks,
+            "depth": args.depth,
+            "associations": args.associations,
+            "queues": args.queues,
+            "projects": args.projects,
+            "jobs": args.jobs,
+            "fetch_jobs": args.fetch_jobs,
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "generate_seconds": generate_time,
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fp:
+            json.dump(report, fp, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fp:
+            compare(report, json.load(fp))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
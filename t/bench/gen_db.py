@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+
+# Generate a large, synthetic flux-accounting DB for benchmarking.
+#
+# Usage: flux python gen_db.py [-b NBANKS] [-d DEPTH] [-a NASSOCS] [-q NQUEUES]
+#                              [-P NPROJECTS] [-j NJOBS] [-s SEED] DBPATH
+
+import argparse
+import json
+import random
+import sqlite3
+import sys
+import time
+
+from fluxacct.accounting import create_db as c
+
+# the number of cores and GPUs on every node of the synthetic cluster
+CORES_PER_NODE = 36
+GPUS_PER_NODE = 4
+NNODES = 1024
+# the first job ID and userid handed out by the generator
+JOBID_BASE = 10**12
+USERID_BASE = 50000
+
+
+def idset(first, count):
+    """Return an RFC 22 idset string for COUNT consecutive IDs starting at FIRST."""
+    if count == 1:
+        return str(first)
+    return f"{first}-{first + count - 1}"
+
+
+def make_R(rank, nnodes, ngpus, t_run, t_inactive):
+    """Return an Rv1 string for NNODES whole nodes starting at RANK."""
+    children = {"core": idset(0, CORES_PER_NODE)}
+    if ngpus:
+        children["gpu"] = idset(0, ngpus)
+    return json.dumps(
+        {
+            "version": 1,
+            "execution": {
+                "R_lite": [{"rank": idset(rank, nnodes), "children": children}],
+                "nodelist": [f"node[{idset(rank, nnodes)}]"],
+                "starttime": t_run,
+                "expiration": t_inactive + 60,
+            },
+        }
+    )
+
+
+def make_jobspec(nnodes, ngpus, duration, bank, queue, project):
+    """Return a jobspec string requesting NNODES whole nodes."""
+    slot = [{"type": "core", "count": CORES_PER_NODE}]
+    if ngpus:
+        slot.append({"type": "gpu", "count": ngpus})
+    return json.dumps(
+        {
+            "version": 1,
+            "resources": [
+                {
+                    "type": "node",
+                    "count": nnodes,
+                    "exclusive": True,
+                    "with": [
+                        {"type": "slot", "count": 1, "label": "task", "with": slot}
+                    ],
+                }
+            ],
+            "tasks": [
+                {
+                    "command": ["flux", "start", "sleep", "inf"],
+                    "slot": "task",
+                    "count": {"per_slot": 1},
+                }
+            ],
+            "attributes": {
+                "system": {
+                    "duration": duration,
+                    "bank": bank,
+                    "queue": queue,
+                    "project": project,
+                    "cwd": "/home",
+                    "environment": {},
+                }
+            },
+        }
+    )
+
+
+def make_banks(nbanks, depth):
+    """
+    Return a list of (bank, parent_bank) tuples for a root bank and NBANKS banks
+    under it, spread evenly over DEPTH levels below the root bank.
+    """
+    banks = [("root", "")]
+    levels = [["root"]] + [[] for _ in range(depth)]
+    for i in range(nbanks):
+        level = 1 + i % depth
+        parents = levels[level - 1]
+        parent = parents[len(levels[level]) % len(parents)]
+        levels[level].append(f"bank{i}")
+        banks.append((f"bank{i}", parent))
+    return banks
+
+
+def make_job_records(rng, associations, njobs, start, end, first_jobid=JOBID_BASE):
+    """
+    Yield NJOBS job records in the format produced by flux account-fetch-job-records,
+    submitted by ASSOCIATIONS and finished between START and END.
+
+    Args:
+        rng: A random.Random object.
+        associations: A list of (username, userid, bank, queues, projects) tuples.
+        njobs: The number of job records to generate.
+        start: The earliest time a job can finish.
+        end: The latest time a job can finish.
+        first_jobid: The ID of the first job.
+    """
+    for i in range(njobs):
+        username, userid, bank, queues, projects = rng.choice(associations)
+        queue = rng.choice(queues)
+        project = rng.choice(projects)
+        nnodes = 2 ** int(rng.expovariate(0.7) % 7)
+        ngpus = GPUS_PER_NODE if rng.random() < 0.25 else 0
+        requested = rng.choice((300, 1800, 3600, 4 * 3600, 12 * 3600))
+        actual = rng.uniform(1, requested)
+        t_inactive = rng.uniform(start, end)
+        t_run = t_inactive - actual
+        rank = rng.randrange(NNODES - nnodes + 1)
+        yield {
+            "id": first_jobid + i,
+            "userid": userid,
+            "t_submit": t_run - rng.uniform(0, 3600),
+            "t_run": t_run,
+            "t_inactive": t_inactive,
+            "ranks": idset(rank, nnodes),
+            "R": make_R(rank, nnodes, ngpus, t_run, t_inactive),
+            "jobspec": make_jobspec(nnodes, ngpus, requested, bank, queue, project),
+            "project": project,
+            "bank": bank,
+            "requested_duration": requested,
+            "actual_duration": actual,
+        }
+
+
+def generate_db(
+    path,
+    nbanks=100,
+    depth=3,
+    nassocs=10000,
+    nqueues=8,
+    nprojects=50,
+    njobs=100000,
+    seed=0,
+    now=None,
+):
+    """
+    Create a flux-accounting DB at PATH and fill it with a synthetic bank hierarchy,
+    associations, queues, projects, and job records. Rows are inserted directly so
+    that setting up a large DB does not dominate the run time.
+
+    Job records finish over the length of the usage reset period before NOW, and
+    every association starts with some usage in every past half-life period.
+
+    Returns:
+        A list of (username, userid, bank, queues, projects) tuples, one for each
+        association added to the DB.
+    """
+    if nbanks < 1 or depth < 1:
+        raise ValueError("a DB needs at least one bank and a depth of at least 1")
+    rng = random.Random(seed)
+    now = time.time() if now is None else now
+
+    c.create_db(path)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+
+    half_life = float(
+        conn.execute(
+            "SELECT value FROM config_table WHERE key='priority_decay_half_life'"
+        ).fetchone()[0]
+    )
+    reset_period = float(
+        conn.execute(
+            "SELECT value FROM config_table WHERE key='priority_usage_reset_period'"
+        ).fetchone()[0]
+    )
+    num_periods = max(int(reset_period / half_life), 1)
+
+    queues = [f"queue{i}" for i in range(nqueues)] or [""]
+    projects = [f"project{i}" for i in range(nprojects)] or ["*"]
+    if nqueues:
+        conn.executemany(
+            "INSERT INTO queue_table (queue, max_nodes_per_job, priority) "
+            "VALUES (?, ?, ?)",
+            ((queue, 2**i, 100 * i) for i, queue in enumerate(queues)),
+        )
+    if nprojects:
+        conn.executemany(
+            "INSERT INTO project_table (project) VALUES (?)",
+            ((project,) for project in projects),
+        )
+
+    banks = make_banks(nbanks, depth)
+    conn.executemany(
+        "INSERT INTO bank_table (bank, parent_bank, shares) VALUES (?, ?, ?)",
+        ((bank, parent, rng.randint(1, 10)) for bank, parent in banks),
+    )
+    parents = {parent for _, parent in banks}
+    leaves = [bank for bank, _ in banks if bank not in parents]
+
+    associations = []
+    for i in range(nassocs):
+        assoc_queues = rng.sample(queues, min(len(queues), rng.randint(1, 3)))
+        assoc_projects = rng.sample(projects, min(len(projects), rng.randint(1, 3)))
+        associations.append(
+            (
+                f"user{i}",
+                USERID_BASE + i,
+                leaves[i % len(leaves)],
+                assoc_queues,
+                assoc_projects,
+            )
+        )
+    conn.executemany(
+        """
+        INSERT INTO association_table
+        (creation_time, mod_time, username, userid, bank, default_bank, shares,
+         queues, projects, default_project)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            (
+                int(now),
+                int(now),
+                username,
+                userid,
+                bank,
+                bank,
+                rng.randint(1, 10),
+                ",".join(assoc_queues) if nqueues else "",
+                ",".join(assoc_projects + ["*"]) if nprojects else "*",
+                assoc_projects[0],
+            )
+            for username, userid, bank, assoc_queues, assoc_projects in associations
+        ),
+    )
+    # the assoc_id of each association is assigned in the order it was inserted
+    conn.execute("""
+        INSERT INTO job_usage_factor_table (assoc_id, userid)
+        SELECT assoc_id, userid FROM association_table ORDER BY assoc_id
+        """)
+    assoc_ids = [
+        row[0]
+        for row in conn.execute(
+            "SELECT assoc_id FROM association_table ORDER BY assoc_id"
+        )
+    ]
+    conn.executemany(
+        """
+        INSERT INTO job_usage_per_association_table
+        (assoc_id, period, value) VALUES (?, ?, ?)
+        """,
+        (
+            (assoc_id, period, rng.uniform(0, 1000) if period else 0.0)
+            for assoc_id in assoc_ids
+            for period in range(num_periods)
+        ),
+    )
+    conn.execute("""
+        UPDATE association_table SET job_usage=(
+            SELECT SUM(value) FROM job_usage_per_association_table p
+            WHERE p.assoc_id=association_table.assoc_id
+        )
+        """)
+
+    conn.executemany(
+        """
+        INSERT INTO jobs
+        (id, userid, t_submit, t_run, t_inactive, ranks, R, jobspec, project, bank,
+         requested_duration, actual_duration)
+        VALUES (:id, :userid, :t_submit, :t_run, :t_inactive, :ranks, :R, :jobspec,
+                :project, :bank, :requested_duration, :actual_duration)
+        """,
+        make_job_records(rng, associations, njobs, now - reset_period, now),
+    )
+    conn.commit()
+    conn.close()
+
+    return associations
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="generate a synthetic flux-accounting DB for benchmarking"
+    )
+    parser.add_argument("path", metavar="DBPATH")
+    parser.add_argument("-b", "--banks", type=int, default=100, metavar="NBANKS")
+    parser.add_argument("-d", "--depth", type=int, default=3, metavar="DEPTH")
+    parser.add_argument(
+        "-a", "--associations", type=int, default=10000, metavar="NASSOCS"
+    )
+    parser.add_argument("-q", "--queues", type=int, default=8, metavar="NQUEUES")
+    parser.add_argument("-P", "--projects", type=int, default=50, metavar="NPROJECTS")
+    parser.add_argument("-j", "--jobs", type=int, default=100000, metavar="NJOBS")
+    parser.add_argument("-s", "--seed", type=int, default=0, metavar="SEED")
+    args = parser.parse_args()
+
+    generate_db(
+        args.path,
+        nbanks=args.banks,
+        depth=args.depth,
+        nassocs=args.associations,
+        nqueues=args.queues,
+        nprojects=args.projects,
+        njobs=args.jobs,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
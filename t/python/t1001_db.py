@@ -54,6 +54,8 @@ class TestDB(unittest.TestCase):
         # uses to keep track of the largest ROWID
         expected = [
             "association_table",
+            "association_queue_table",
+            "association_project_table",
             "bank_table",
             "sqlite_sequence",
             "job_usage_factor_table",
@@ -61,6 +63,7 @@ class TestDB(unittest.TestCase):
             "queue_table",
             "project_table",
             "jobs",
+            "job_data_table",
             "priority_factor_weight_table",
             "config_table",
             "job_usage_per_association_table",
@@ -132,7 +135,8 @@ class TestDB(unittest.TestCase):
         b.add_bank(test_conn, parent_bank="root", bank="A", shares=1)
         u.add_user(test_conn, username="user1", uid=50001, bank="A")
         test = cur.execute(
-            "SELECT * FROM job_usage_per_association_table WHERE username='user1'"
+            "SELECT * FROM job_usage_per_association_table WHERE assoc_id IN "
+            "(SELECT assoc_id FROM association_table WHERE username='user1')"
         ).fetchall()
         self.assertEqual(len(test), 4)
 
@@ -154,7 +158,8 @@ class TestDB(unittest.TestCase):
         b.add_bank(test_conn, parent_bank="root", bank="A", shares=1)
         u.add_user(test_conn, username="user1", uid=50001, bank="A")
         test = cur.execute(
-            "SELECT * FROM job_usage_per_association_table WHERE username='user1'"
+            "SELECT * FROM job_usage_per_association_table WHERE assoc_id IN "
+            "(SELECT assoc_id FROM association_table WHERE username='user1')"
         ).fetchall()
         self.assertEqual(len(test), 10)
 
@@ -56,10 +56,10 @@ class TestAccountingCLI(unittest.TestCase):
             queues="",
         )
         cursor = acct_conn.cursor()
-        num_rows_assoc_table = cursor.execute("DELETE FROM association_table").rowcount
         num_rows_job_usage_factor_table = cursor.execute(
             "DELETE FROM job_usage_factor_table"
         ).rowcount
+        num_rows_assoc_table = cursor.execute("DELETE FROM association_table").rowcount
 
         self.assertEqual(num_rows_assoc_table, num_rows_job_usage_factor_table)
 
@@ -150,7 +150,8 @@ class TestAccountingCLI(unittest.TestCase):
         u.delete_user(acct_conn, username="fluxuser", bank="A")
 
         cursor.execute(
-            "SELECT active FROM association_table WHERE username='fluxuser' AND bank='A'"
+            "SELECT active FROM association_table "
+            "WHERE username='fluxuser' AND bank='A'"
         )
         rows = cursor.fetchall()
 
@@ -347,14 +348,16 @@ class TestAccountingCLI(unittest.TestCase):
         cur = acct_conn.cursor()
         cur.execute(
             "UPDATE job_usage_per_association_table SET value=1.23 "
-            "WHERE username='test_user5' AND bank='A' AND period=0"
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='test_user6' AND bank='B') AND period=0"
         )
         cur.execute(
             "UPDATE job_usage_per_association_table SET value=4.56 "
-            "WHERE username='test_user5' AND bank='A' AND period=1"
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='test_user6' AND bank='B') AND period=1"
         )
         acct_conn.commit()
-        result = u.view_user(acct_conn, user="test_user5", job_usage=True)
+        result = u.view_user(acct_conn, user="test_user6", job_usage=True)
         self.assertIn("1.23", result)
         self.assertIn("4.56", result)
 
@@ -365,7 +368,8 @@ class TestAccountingCLI(unittest.TestCase):
         cur = acct_conn.cursor()
         result = cur.execute(
             "SELECT * FROM job_usage_per_association_table "
-            "WHERE username='test_user7' AND bank='A'"
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='test_user7' AND bank='A')"
         ).fetchall()
         self.assertEqual(len(result), 4)
 
@@ -271,22 +271,26 @@ class TestAccountingCLI(unittest.TestCase):
         userid = 1002
         update_stmt = (
             "UPDATE job_usage_per_association_table SET value=256 "
-            "WHERE username='1002' AND userid=1002 AND bank='C' AND period=0"
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='1002' AND bank='C') AND period=0"
         )
         acct_conn.execute(update_stmt)
         update_stmt = (
             "UPDATE job_usage_per_association_table SET value=64 "
-            "WHERE username='1002' AND userid=1002 AND bank='C' AND period=1"
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='1002' AND bank='C') AND period=1"
         )
         acct_conn.execute(update_stmt)
         update_stmt = (
             "UPDATE job_usage_per_association_table SET value=16 "
-            "WHERE username='1002' AND userid=1002 AND bank='C' AND period=2"
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='1002' AND bank='C') AND period=2"
         )
         acct_conn.execute(update_stmt)
         update_stmt = (
             "UPDATE job_usage_per_association_table SET value=8 "
-            "WHERE username='1002' AND userid=1002 AND bank='C' AND period=3"
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='1002' AND bank='C') AND period=3"
         )
         acct_conn.execute(update_stmt)
         acct_conn.commit()
@@ -314,22 +318,26 @@ class TestAccountingCLI(unittest.TestCase):
         userid = 1001
         update_stmt = (
             "UPDATE job_usage_per_association_table SET value=4096 "
-            "WHERE username='1001' AND userid=1001 AND bank='C' AND period=0"
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='1001' AND bank='C') AND period=0"
         )
         acct_conn.execute(update_stmt)
         update_stmt = (
             "UPDATE job_usage_per_association_table SET value=256 "
-            "WHERE username='1001' AND userid=1001 AND bank='C' AND period=1"
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='1001' AND bank='C') AND period=1"
         )
         acct_conn.execute(update_stmt)
         update_stmt = (
             "UPDATE job_usage_per_association_table SET value=32 "
-            "WHERE username='1001' AND userid=1001 AND bank='C' AND period=2"
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='1001' AND bank='C') AND period=2"
         )
         acct_conn.execute(update_stmt)
         update_stmt = (
             "UPDATE job_usage_per_association_table SET value=16 "
-            "WHERE username='1001' AND userid=1001 AND bank='C' AND period=3"
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='1001' AND bank='C') AND period=3"
         )
         acct_conn.execute(update_stmt)
         acct_conn.commit()
@@ -351,8 +359,9 @@ class TestAccountingCLI(unittest.TestCase):
     # make sure update_t_inactive() updates the last seen job timestamp
     def test_13_update_t_inactive_success(self):
         s_ts = (
-            "SELECT last_job_timestamp FROM "
-            "job_usage_factor_table WHERE username='1003' AND bank='D'"
+            "SELECT last_job_timestamp FROM job_usage_factor_table "
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='1003' AND bank='D')"
         )
         cur.execute(s_ts)
         result = cur.fetchall()
@@ -381,7 +390,11 @@ class TestAccountingCLI(unittest.TestCase):
     # make sure current usage factor was written to job_usage_factor_table, but
     # historical usage factor was written to association_table
     def test_14_check_usage_factor_in_tables(self):
-        select_stmt = "SELECT value FROM job_usage_per_association_table WHERE username='1002' AND bank='C' AND period=0"
+        select_stmt = (
+            "SELECT value FROM job_usage_per_association_table "
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='1002' AND bank='C') AND period=0"
+        )
         cur.execute(select_stmt)
         usage_factor = cur.fetchone()[0]
         self.assertEqual(usage_factor, 16956.0)
@@ -478,9 +491,13 @@ class TestAccountingCLI(unittest.TestCase):
             gpu_weight=0.0,
         )
 
-        self.assertEqual(usage_factor, 4334.0)
+        self.assertEqual(usage_factor, 2213.0)
 
-        select_stmt = "SELECT value FROM job_usage_per_association_table WHERE username='1001' AND bank='C' AND period=0"
+        select_stmt = (
+            "SELECT value FROM job_usage_per_association_table "
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='1001' AND bank='C') AND period=0"
+        )
         cur.execute(select_stmt)
         curr_job_usage = cur.fetchone()[0]
         self.assertEqual(curr_job_usage, 0.0)
@@ -504,6 +521,8 @@ class TestAccountingCLI(unittest.TestCase):
         new_hl = cur.fetchone()[0]
 
         self.assertGreater(new_hl, old_hl)
+        # every half-life period that has ended is skipped over at once
+        self.assertEqual(new_hl, time.time() - 1)
 
     # removing a user from the flux-accounting DB should NOT remove their job
     # usage history from the job_usage_factor_table
@@ -513,8 +532,8 @@ class TestAccountingCLI(unittest.TestCase):
         select_stmt = """
             SELECT * FROM
             job_usage_factor_table
-            WHERE username='1001'
-            AND bank='C'
+            WHERE assoc_id=(SELECT assoc_id FROM association_table
+            WHERE username='1001' AND bank='C')
             """
         cur.execute(select_stmt)
         records = len(cur.fetchall())
@@ -534,6 +553,13 @@ class TestAccountingCLI(unittest.TestCase):
 
         self.assertEqual(job_usage, 17044.0)
 
+        # start the update one half-life period after the current one has ended
+        acct_conn.execute(
+            "UPDATE t_half_life_period_table SET end_half_life_period=? "
+            "WHERE cluster='cluster'",
+            (10000000 + 604800,),
+        )
+        acct_conn.commit()
         jobs.update_job_usage(acct_conn)
 
         cur.execute(s_stmt)
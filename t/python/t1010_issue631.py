@@ -78,31 +78,38 @@ class TestAccountingCLI(unittest.TestCase):
         # manually set current job usage factor all associations in the DB
         cur.execute(
             "UPDATE job_usage_per_association_table "
-            "SET value=20 WHERE username='user1' AND period=0"
+            "SET value=20 WHERE assoc_id IN (SELECT assoc_id FROM association_table "
+            "WHERE username='user1') AND period=0"
         )
         cur.execute(
             "UPDATE job_usage_per_association_table "
-            "SET value=20 WHERE username='user2' AND period=0"
+            "SET value=20 WHERE assoc_id IN (SELECT assoc_id FROM association_table "
+            "WHERE username='user2') AND period=0"
         )
         cur.execute(
             "UPDATE job_usage_per_association_table "
-            "SET value=10 WHERE username='user3' AND period=0"
+            "SET value=10 WHERE assoc_id IN (SELECT assoc_id FROM association_table "
+            "WHERE username='user3') AND period=0"
         )
         cur.execute(
             "UPDATE job_usage_per_association_table "
-            "SET value=13 WHERE username='user4' AND period=0"
+            "SET value=13 WHERE assoc_id IN (SELECT assoc_id FROM association_table "
+            "WHERE username='user4') AND period=0"
         )
         cur.execute(
             "UPDATE job_usage_per_association_table "
-            "SET value=12 WHERE username='user5' AND period=0"
+            "SET value=12 WHERE assoc_id IN (SELECT assoc_id FROM association_table "
+            "WHERE username='user5') AND period=0"
         )
         cur.execute(
             "UPDATE job_usage_per_association_table "
-            "SET value=25 WHERE username='user6' AND period=0"
+            "SET value=25 WHERE assoc_id IN (SELECT assoc_id FROM association_table "
+            "WHERE username='user6') AND period=0"
         )
         cur.execute(
             "UPDATE job_usage_per_association_table "
-            "SET value=10 WHERE username='user7' AND period=0"
+            "SET value=10 WHERE assoc_id IN (SELECT assoc_id FROM association_table "
+            "WHERE username='user7') AND period=0"
         )
 
         conn.commit()
@@ -153,7 +160,7 @@ class TestAccountingCLI(unittest.TestCase):
 
     # simulate a half-period further; update the job usage values for all banks, which will
     # result in a decay of all the previous job usage values
-    @mock.patch("time.time", mock.MagicMock(return_value=(100000000 + (604801 * 1.1))))
+    @mock.patch("time.time", mock.MagicMock(return_value=(10000000 + (604801 * 1.1))))
     def test_08_call_update_usage_new_half_life_period(self):
         j.update_job_usage(conn)
 
@@ -167,7 +174,8 @@ class TestAccountingCLI(unittest.TestCase):
         # usage should be 0
         cur.execute(
             "SELECT value FROM job_usage_per_association_table "
-            "WHERE username='user1' AND period=0"
+            "WHERE assoc_id IN (SELECT assoc_id FROM association_table "
+            "WHERE username='user1') AND period=0"
         )
         current_usage = cur.fetchone()[0]
         self.assertEqual(current_usage, 0.0)
@@ -176,7 +184,8 @@ class TestAccountingCLI(unittest.TestCase):
         # the second slot in job_usage_factor_table
         cur.execute(
             "SELECT value FROM job_usage_per_association_table "
-            "WHERE username='user1' AND period=1"
+            "WHERE assoc_id IN (SELECT assoc_id FROM association_table "
+            "WHERE username='user1') AND period=1"
         )
         usage_last_half_life = cur.fetchone()[0]
         self.assertEqual(usage_last_half_life, 10.0)
@@ -188,14 +197,16 @@ class TestAccountingCLI(unittest.TestCase):
 
         cur.execute(
             "SELECT value FROM job_usage_per_association_table "
-            "WHERE username='user2' AND period=0"
+            "WHERE assoc_id IN (SELECT assoc_id FROM association_table "
+            "WHERE username='user2') AND period=0"
         )
         current_usage = cur.fetchone()[0]
         self.assertEqual(current_usage, 0.0)
 
         cur.execute(
             "SELECT value FROM job_usage_per_association_table "
-            "WHERE username='user2' AND period=1"
+            "WHERE assoc_id IN (SELECT assoc_id FROM association_table "
+            "WHERE username='user2') AND period=1"
         )
         usage_last_half_life = cur.fetchone()[0]
         self.assertEqual(usage_last_half_life, 10.0)
@@ -207,14 +218,16 @@ class TestAccountingCLI(unittest.TestCase):
 
         cur.execute(
             "SELECT value FROM job_usage_per_association_table "
-            "WHERE username='user3' AND period=0"
+            "WHERE assoc_id IN (SELECT assoc_id FROM association_table "
+            "WHERE username='user3') AND period=0"
         )
         current_usage = cur.fetchone()[0]
         self.assertEqual(current_usage, 0.0)
 
         cur.execute(
             "SELECT value FROM job_usage_per_association_table "
-            "WHERE username='user3' AND period=1"
+            "WHERE assoc_id IN (SELECT assoc_id FROM association_table "
+            "WHERE username='user3') AND period=1"
         )
         usage_last_half_life = cur.fetchone()[0]
         self.assertEqual(usage_last_half_life, 5.0)
@@ -226,14 +239,16 @@ class TestAccountingCLI(unittest.TestCase):
 
         cur.execute(
             "SELECT value FROM job_usage_per_association_table "
-            "WHERE username='user4' AND period=0"
+            "WHERE assoc_id IN (SELECT assoc_id FROM association_table "
+            "WHERE username='user4') AND period=0"
         )
         current_usage = cur.fetchone()[0]
         self.assertEqual(current_usage, 0.0)
 
         cur.execute(
             "SELECT value FROM job_usage_per_association_table "
-            "WHERE username='user4' AND period=1"
+            "WHERE assoc_id IN (SELECT assoc_id FROM association_table "
+            "WHERE username='user4') AND period=1"
         )
         usage_last_half_life = cur.fetchone()[0]
         self.assertEqual(usage_last_half_life, 6.5)
@@ -245,14 +260,16 @@ class TestAccountingCLI(unittest.TestCase):
 
         cur.execute(
             "SELECT value FROM job_usage_per_association_table "
-            "WHERE username='user5' AND period=0"
+            "WHERE assoc_id IN (SELECT assoc_id FROM association_table "
+            "WHERE username='user5') AND period=0"
         )
         current_usage = cur.fetchone()[0]
         self.assertEqual(current_usage, 0.0)
 
         cur.execute(
             "SELECT value FROM job_usage_per_association_table "
-            "WHERE username='user5' AND period=1"
+            "WHERE assoc_id IN (SELECT assoc_id FROM association_table "
+            "WHERE username='user5') AND period=1"
         )
         usage_last_half_life = cur.fetchone()[0]
         self.assertEqual(usage_last_half_life, 6.0)
@@ -264,14 +281,16 @@ class TestAccountingCLI(unittest.TestCase):
 
         cur.execute(
             "SELECT value FROM job_usage_per_association_table "
-            "WHERE username='user6' AND period=0"
+            "WHERE assoc_id IN (SELECT assoc_id FROM association_table "
+            "WHERE username='user6') AND period=0"
         )
         current_usage = cur.fetchone()[0]
         self.assertEqual(current_usage, 0.0)
 
         cur.execute(
             "SELECT value FROM job_usage_per_association_table "
-            "WHERE username='user6' AND period=1"
+            "WHERE assoc_id IN (SELECT assoc_id FROM association_table "
+            "WHERE username='user6') AND period=1"
         )
         usage_last_half_life = cur.fetchone()[0]
         self.assertEqual(usage_last_half_life, 12.5)
@@ -110,12 +110,14 @@ class TestAccountingCLI(unittest.TestCase):
         usage_assoc_user1 = cur.fetchone()[0]
         cur.execute(
             "SELECT VALUE FROM job_usage_per_association_table "
-            "WHERE username='user1' AND period=0"
+            "WHERE assoc_id IN (SELECT assoc_id FROM association_table "
+            "WHERE username='user1') AND period=0"
         )
         usage_factor_period_0 = cur.fetchone()[0]
         cur.execute(
             "SELECT last_job_timestamp FROM job_usage_factor_table "
-            "WHERE username='user1'"
+            "WHERE assoc_id IN (SELECT assoc_id FROM association_table "
+            "WHERE username='user1')"
         )
         last_job_timestamp = cur.fetchone()[0]
         cur.execute("SELECT ignore_older_than FROM bank_table WHERE bank='A'")
@@ -166,6 +168,28 @@ class TestAccountingCLI(unittest.TestCase):
         self.assertEqual(usage_bank_A, 200)
         self.assertEqual(usage_assoc_user1, 200)
 
+    # the usage of every bank is rolled up from the associations under the banks
+    # with no sub-banks; clearing a bank only recomputes the banks above it
+    def test_04_rollup_nested_banks(self):
+        b.add_bank(conn, "B", 1, "root")
+        b.add_bank(conn, "C", 1, "B")
+        b.add_bank(conn, "D", 1, "B")
+        u.add_user(conn, username="user2", bank="C", uid=50002)
+        u.add_user(conn, username="user3", bank="D", uid=50003)
+        cur.execute("UPDATE association_table SET job_usage=50 WHERE bank='C'")
+        cur.execute("UPDATE association_table SET job_usage=25 WHERE bank='D'")
+        j.rollup_bank_usage(cur)
+        conn.commit()
+
+        cur.execute("SELECT bank, job_usage FROM bank_table")
+        usage = {row["bank"]: row["job_usage"] for row in cur.fetchall()}
+        self.assertEqual(usage, {"root": 275, "A": 200, "B": 75, "C": 50, "D": 25})
+
+        j.clear_usage(conn, banks=["C"])
+        cur.execute("SELECT bank, job_usage FROM bank_table")
+        usage = {row["bank"]: row["job_usage"] for row in cur.fetchall()}
+        self.assertEqual(usage, {"root": 225, "A": 200, "B": 25, "C": 0, "D": 25})
+
     # remove database and log file
     @classmethod
     def tearDownClass(self):
@@ -55,7 +55,8 @@ class TestAccountingCLI(unittest.TestCase):
         # manually set current job usage factor all associations in the DB
         cur.execute(
             "UPDATE job_usage_per_association_table SET value=100 "
-            "WHERE username='user1' AND userid=50001 AND bank='A' AND period=0"
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='user1' AND bank='A') AND period=0"
         )
 
         conn.commit()
@@ -92,28 +93,32 @@ class TestAccountingCLI(unittest.TestCase):
 
         cur.execute(
             "SELECT value FROM job_usage_per_association_table "
-            "WHERE username='user1' AND bank='A' AND period=0"
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='user1' AND bank='A') AND period=0"
         )
         usage_period_0 = cur.fetchone()[0]
         self.assertEqual(usage_period_0, 100.0)
 
         cur.execute(
             "SELECT value FROM job_usage_per_association_table "
-            "WHERE username='user1' AND bank='A' AND period=1"
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='user1' AND bank='A') AND period=1"
         )
         usage_period_0 = cur.fetchone()[0]
         self.assertEqual(usage_period_0, 0)
 
         cur.execute(
             "SELECT value FROM job_usage_per_association_table "
-            "WHERE username='user1' AND bank='A' AND period=2"
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='user1' AND bank='A') AND period=2"
         )
         usage_period_0 = cur.fetchone()[0]
         self.assertEqual(usage_period_0, 0)
 
         cur.execute(
             "SELECT value FROM job_usage_per_association_table "
-            "WHERE username='user1' AND bank='A' AND period=3"
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='user1' AND bank='A') AND period=3"
         )
         usage_period_0 = cur.fetchone()[0]
         self.assertEqual(usage_period_0, 0)
@@ -125,7 +130,7 @@ class TestAccountingCLI(unittest.TestCase):
     # p0 | p1 | p2 | p3
     # -----------------
     # 0  | 50 | 0  | 0
-    @mock.patch("time.time", mock.MagicMock(return_value=(100000000 + (604801 * 1.1))))
+    @mock.patch("time.time", mock.MagicMock(return_value=(10000000 + (604801 * 1.1))))
     def test_05_call_update_usage_new_half_life_period(self):
         j.update_job_usage(conn)
 
@@ -136,28 +141,32 @@ class TestAccountingCLI(unittest.TestCase):
 
         cur.execute(
             "SELECT value FROM job_usage_per_association_table "
-            "WHERE username='user1' AND bank='A' AND period=0"
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='user1' AND bank='A') AND period=0"
         )
         usage_period_0 = cur.fetchone()[0]
         self.assertEqual(usage_period_0, 0)
 
         cur.execute(
             "SELECT value FROM job_usage_per_association_table "
-            "WHERE username='user1' AND bank='A' AND period=1"
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='user1' AND bank='A') AND period=1"
         )
         usage_period_1 = cur.fetchone()[0]
         self.assertEqual(usage_period_1, 50.0)
 
         cur.execute(
             "SELECT value FROM job_usage_per_association_table "
-            "WHERE username='user1' AND bank='A' AND period=2"
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='user1' AND bank='A') AND period=2"
         )
         usage_period_2 = cur.fetchone()[0]
         self.assertEqual(usage_period_2, 0.0)
 
         cur.execute(
             "SELECT value FROM job_usage_per_association_table "
-            "WHERE username='user1' AND bank='A' AND period=3"
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='user1' AND bank='A') AND period=3"
         )
         usage_period_3 = cur.fetchone()[0]
         self.assertEqual(usage_period_3, 0)
@@ -168,7 +177,7 @@ class TestAccountingCLI(unittest.TestCase):
     # p0 | p1 | p2 | p3
     # -----------------
     # 0  | 0  | 25 | 0
-    @mock.patch("time.time", mock.MagicMock(return_value=(100000000 + (604801 * 2.1))))
+    @mock.patch("time.time", mock.MagicMock(return_value=(10000000 + (604801 * 2.1))))
     def test_07_call_update_usage_new_half_life_period(self):
         j.update_job_usage(conn)
 
@@ -179,28 +188,32 @@ class TestAccountingCLI(unittest.TestCase):
 
         cur.execute(
             "SELECT value FROM job_usage_per_association_table "
-            "WHERE username='user1' AND bank='A' AND period=0"
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='user1' AND bank='A') AND period=0"
         )
         usage_period_0 = cur.fetchone()[0]
         self.assertEqual(usage_period_0, 0)
 
         cur.execute(
             "SELECT value FROM job_usage_per_association_table "
-            "WHERE username='user1' AND bank='A' AND period=1"
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='user1' AND bank='A') AND period=1"
         )
         usage_period_1 = cur.fetchone()[0]
         self.assertEqual(usage_period_1, 0)
 
         cur.execute(
             "SELECT value FROM job_usage_per_association_table "
-            "WHERE username='user1' AND bank='A' AND period=2"
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='user1' AND bank='A') AND period=2"
         )
         usage_period_2 = cur.fetchone()[0]
         self.assertEqual(usage_period_2, 25.0)
 
         cur.execute(
             "SELECT value FROM job_usage_per_association_table "
-            "WHERE username='user1' AND bank='A' AND period=3"
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='user1' AND bank='A') AND period=3"
         )
         usage_period_3 = cur.fetchone()[0]
         self.assertEqual(usage_period_3, 0)
@@ -211,7 +224,7 @@ class TestAccountingCLI(unittest.TestCase):
     # p0  | p1 | p2 | p3
     # --------------------
     # 0   | 0  | 0  | 12.5
-    @mock.patch("time.time", mock.MagicMock(return_value=(100000000 + (604801 * 3.1))))
+    @mock.patch("time.time", mock.MagicMock(return_value=(10000000 + (604801 * 3.1))))
     def test_09_call_update_usage_new_half_life_period(self):
         j.update_job_usage(conn)
 
@@ -222,32 +235,71 @@ class TestAccountingCLI(unittest.TestCase):
 
         cur.execute(
             "SELECT value FROM job_usage_per_association_table "
-            "WHERE username='user1' AND bank='A' AND period=0"
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='user1' AND bank='A') AND period=0"
         )
         usage_period_0 = cur.fetchone()[0]
         self.assertEqual(usage_period_0, 0)
 
         cur.execute(
             "SELECT value FROM job_usage_per_association_table "
-            "WHERE username='user1' AND bank='A' AND period=1"
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='user1' AND bank='A') AND period=1"
         )
         usage_period_1 = cur.fetchone()[0]
         self.assertEqual(usage_period_1, 0)
 
         cur.execute(
             "SELECT value FROM job_usage_per_association_table "
-            "WHERE username='user1' AND bank='A' AND period=2"
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='user1' AND bank='A') AND period=2"
         )
         usage_period_2 = cur.fetchone()[0]
         self.assertEqual(usage_period_2, 0)
 
         cur.execute(
             "SELECT value FROM job_usage_per_association_table "
-            "WHERE username='user1' AND bank='A' AND period=3"
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='user1' AND bank='A') AND period=3"
         )
         usage_period_3 = cur.fetchone()[0]
         self.assertEqual(usage_period_3, 12.5)
 
+    # after a fourth half-life decay, all of user1's usage has fallen off of the
+    # oldest period; an association with no usage left is not decayed any further
+    @mock.patch("time.time", mock.MagicMock(return_value=(10000000 + (604801 * 4.1))))
+    def test_11_call_update_usage_new_half_life_period(self):
+        j.update_job_usage(conn)
+
+        cur.execute("SELECT job_usage FROM association_table WHERE username='user1'")
+        self.assertEqual(cur.fetchone()[0], 0)
+        cur.execute(
+            "SELECT SUM(value) FROM job_usage_per_association_table "
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='user1' AND bank='A')"
+        )
+        self.assertEqual(cur.fetchone()[0], 0)
+
+    # moving an association's periods back by more than one half-life period at a
+    # time gives the same result as moving them back one period at a time
+    def test_12_decay_multiple_periods(self):
+        for period, value in enumerate([8.0, 4.0, 2.0, 1.0]):
+            cur.execute(
+                "UPDATE job_usage_per_association_table SET value=? "
+                "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+                "WHERE username='user1' AND bank='A') AND period=?",
+                (value, period),
+            )
+        j.decay_usage_periods(cur, [j.get_assoc_id(cur, "user1", "A")], 0.5, periods=2)
+        conn.commit()
+
+        cur.execute(
+            "SELECT value FROM job_usage_per_association_table "
+            "WHERE assoc_id=(SELECT assoc_id FROM association_table "
+            "WHERE username='user1' AND bank='A') ORDER BY period"
+        )
+        self.assertEqual([row[0] for row in cur.fetchall()], [0.0, 0.0, 2.0, 1.0])
+
     # remove database and log file
     @classmethod
     def tearDownClass(self):
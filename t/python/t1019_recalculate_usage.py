@@ -120,8 +120,9 @@ class TestAccountingCLI(unittest.TestCase):
     # So, for each association, a total of 3 rows will be inserted into
     # job_usage_per_association_table where each row represents a 400-second period:
     #
-    # The usage for every association will be reset to 0.0 and job usage will be
-    # calculated from a fresh start.
+    # The usage for every association is recalculated from the jobs table under the
+    # new configuration; the job above finished 1001 seconds ago, so it falls in p2
+    # and has the decay factor applied twice.
     @mock.patch("builtins.input", return_value="y")
     @mock.patch("time.time", mock.MagicMock(return_value=1600))
     def test_02_reconfigure_bins(self, mock_input):
@@ -134,27 +135,28 @@ class TestAccountingCLI(unittest.TestCase):
 
         # make sure association has a total of 3 rows in job_usage_per_association_table
         num_rows = cursor.execute(
-            "SELECT * FROM job_usage_per_association_table WHERE username='user1'"
+            "SELECT * FROM job_usage_per_association_table WHERE assoc_id IN "
+            "(SELECT assoc_id FROM association_table WHERE username='user1')"
         ).fetchall()
         self.assertEqual(len(num_rows), 3)
 
         total_usage = u.view_user(conn, user="user1", format_string="{job_usage}")
-        self.assertIn("0.0", total_usage)
+        self.assertIn("25.0", total_usage)
         # association has the following job usage breakdown:
         #
         # p0  | p1 | p2 |
         # ---------------
-        # 0   | 0  | 0  |
+        # 0   | 0  | 25 |
         job_usage_breakdown = ast.literal_eval(
             u.view_user(conn, user="user1", job_usage=True)
         )
         self.assertEqual(len(job_usage_breakdown), 3)
         self.assertEqual(job_usage_breakdown[0]["value"], 0.0)
         self.assertEqual(job_usage_breakdown[1]["value"], 0.0)
-        self.assertEqual(job_usage_breakdown[2]["value"], 0.0)
+        self.assertEqual(job_usage_breakdown[2]["value"], 25.0)
 
-    # The total usage for the association will include all jobs seen since last
-    # reconfiguration
+    # The usage from the first job falls off of the last period once a new half-life
+    # period begins
     @mock.patch("time.time", mock.MagicMock(return_value=2500))
     def test_03_insert_new_job(self):
         # insert another 1-node, 1-second-long job
@@ -172,7 +174,8 @@ class TestAccountingCLI(unittest.TestCase):
         self.assertEqual(job_usage_breakdown[2]["value"], 0.0)
 
     # decay_factor can be changed and the amount of decay applied to past jobs will be
-    # different
+    # different; the job from test_03 finished within the last half-life period, so it
+    # stays in p0
     @mock.patch("builtins.input", return_value="y")
     @mock.patch("time.time", mock.MagicMock(return_value=2600))
     def test_04_edit_decay_factor(self, mock_input):
@@ -188,12 +191,12 @@ class TestAccountingCLI(unittest.TestCase):
         jobs.update_job_usage(conn)
 
         total_usage = u.view_user(conn, user="user1", format_string="{job_usage}")
-        self.assertIn("1000.0", total_usage)
+        self.assertIn("1100.0", total_usage)
         job_usage_breakdown = ast.literal_eval(
             u.view_user(conn, user="user1", job_usage=True)
         )
         self.assertEqual(len(job_usage_breakdown), 3)
-        self.assertEqual(job_usage_breakdown[0]["value"], 1000.0)
+        self.assertEqual(job_usage_breakdown[0]["value"], 1100.0)
         self.assertEqual(job_usage_breakdown[1]["value"], 0.0)
         self.assertEqual(job_usage_breakdown[2]["value"], 0.0)
 
@@ -201,13 +204,13 @@ class TestAccountingCLI(unittest.TestCase):
     def test_06_update_usage_new_decay_factor(self):
         jobs.update_job_usage(conn)
         total_usage = u.view_user(conn, user="user1", format_string="{job_usage}")
-        self.assertIn("100.0", total_usage)
+        self.assertIn("110.0", total_usage)
         job_usage_breakdown = ast.literal_eval(
             u.view_user(conn, user="user1", job_usage=True)
         )
         self.assertEqual(len(job_usage_breakdown), 3)
         self.assertEqual(job_usage_breakdown[0]["value"], 0.0)
-        self.assertEqual(job_usage_breakdown[1]["value"], 100.0)
+        self.assertEqual(job_usage_breakdown[1]["value"], 110.0)
         self.assertEqual(job_usage_breakdown[2]["value"], 0.0)
 
     # remove database and log file
@@ -139,6 +139,18 @@ class TestBankInfo(unittest.TestCase):
         with self.assertRaises(ValueError):
             b.bank_info(acct_conn, user="nonexistent_user")
 
+    # normalized shares are each node's fraction of its siblings' shares scaled
+    # by the parent's normalized shares
+    def test_11_normalized_shares(self):
+        sharetree = b._build_sharetree(cur)
+        self.assertEqual(sharetree["/root/"]["nshares"], 1.0)
+        self.assertAlmostEqual(sharetree["/root/A/"]["nshares"], 0.5)
+        self.assertAlmostEqual(sharetree["/root/B/"]["nshares"], 0.5)
+        self.assertAlmostEqual(sharetree["/root/A/user1/"]["nshares"], 0.5)
+        self.assertAlmostEqual(sharetree["/root/B/user2/"]["nshares"], 0.4)
+        self.assertAlmostEqual(sharetree["/root/B/user3/"]["nshares"], 0.1)
+        self.assertEqual(sharetree["/root/B/"]["children"], ["user2", "user3"])
+
     # remove test database and log file
     @classmethod
     def tearDownClass(self):
@@ -15,10 +15,13 @@ import sqlite3
 import time
 import json
 
+from unittest import mock
+
 from fluxacct.accounting import create_db as c
 from fluxacct.accounting import bank_subcommands as b
 from fluxacct.accounting import user_subcommands as u
 from fluxacct.accounting import jobs_table_subcommands as j
+from fluxacct.accounting import identity
 
 
 class TestJobRecordResourceExtraction(unittest.TestCase):
@@ -159,6 +162,36 @@ class TestJobRecordResourceExtraction(unittest.TestCase):
         job_records = j.convert_to_obj(j.get_jobs(conn, jobid=6))
         self.assertEqual(len(job_records), 0)
 
+    # test that a job record built without resource counts computes them from R
+    def test_07_counts_computed_from_R(self):
+        R = {
+            "version": 1,
+            "execution": {
+                "R_lite": [{"rank": "0-2", "children": {"core": "0-1", "gpu": "0"}}],
+                "starttime": 0,
+                "expiration": 0,
+                "nodelist": ["node[0-2]"],
+            },
+        }
+        job = j.JobRecord(50001, 7, 0, 0, 100, None, json.dumps(R), "", "A", 0, 0)
+        self.assertEqual((job.nnodes, job.ncores, job.ngpus), (3, 6, 3))
+        with self.assertRaises(AttributeError):
+            job.foo = 1
+
+    # test that usernames are only looked up when used, once per userid
+    def test_08_username_looked_up_once(self):
+        identity.cache.clear()
+        with mock.patch(
+            "fluxacct.accounting.identity.pwd.getpwuid",
+            return_value=mock.Mock(pw_name="user1"),
+        ) as getpwuid:
+            job_records = j.convert_to_obj(j.get_jobs(conn, bank="A"))
+            self.assertGreater(len(job_records), 1)
+            getpwuid.assert_not_called()
+            self.assertEqual({job.username for job in job_records}, {"user1"})
+            getpwuid.assert_called_once_with(50001)
+        identity.cache.clear()
+
     @classmethod
     def tearDownClass(self):
         conn.close()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import sys
+import os
+import time
+import sqlite3
+
+from fluxacct.accounting import bank_subcommands as b
+from fluxacct.accounting import create_db as c
+from fluxacct.accounting.bank_hierarchy import BankHierarchy
+
+
+class TestBankHierarchy(unittest.TestCase):
+    # create test flux-accounting database
+    @classmethod
+    def setUpClass(self):
+        self.dbname = f"TestDB_{os.path.basename(__file__)[:5]}_{round(time.time())}.db"
+        c.create_db(self.dbname)
+        global acct_conn
+        global hierarchy
+        try:
+            acct_conn = sqlite3.connect(
+                f"file:{self.dbname}?mode=rw", uri=True, timeout=60
+            )
+            acct_conn.row_factory = sqlite3.Row
+        except sqlite3.OperationalError:
+            print(f"Unable to open test database file", file=sys.stderr)
+            sys.exit(-1)
+
+        # set up a bank hierarchy for testing
+        b.add_bank(acct_conn, bank="root", shares=1)
+        b.add_bank(acct_conn, bank="A", parent_bank="root", shares=1)
+        b.add_bank(acct_conn, bank="B", parent_bank="root", shares=1)
+        b.add_bank(acct_conn, bank="C", parent_bank="B", shares=1)
+        b.add_bank(acct_conn, bank="D", parent_bank="B", shares=1)
+        hierarchy = BankHierarchy(acct_conn)
+
+    # the hierarchy should mirror the parent/child relationships in bank_table
+    def test_01_structure(self):
+        self.assertEqual(hierarchy.root, "root")
+        self.assertEqual(len(hierarchy), 5)
+        self.assertIn("C", hierarchy)
+        self.assertNotIn("foo", hierarchy)
+        self.assertEqual(hierarchy.parent("root"), "")
+        self.assertEqual(hierarchy.parent("C"), "B")
+        self.assertEqual(hierarchy.children("root"), ["A", "B"])
+        self.assertEqual(hierarchy.children("B"), ["C", "D"])
+        self.assertTrue(hierarchy.is_leaf("A"))
+        self.assertFalse(hierarchy.is_leaf("B"))
+
+    # looking up the parent of a bank that does not exist raises a ValueError
+    def test_02_parent_bad_bank(self):
+        with self.assertRaises(ValueError):
+            hierarchy.parent("foo")
+
+    # ancestors are listed from the immediate parent up to the root bank
+    def test_03_ancestors(self):
+        self.assertEqual(hierarchy.ancestors("D"), ["B", "root"])
+        self.assertEqual(hierarchy.ancestors("root"), [])
+
+    # a subtree is walked depth-first and includes the bank it starts from
+    def test_04_subtree(self):
+        self.assertEqual(
+            list(hierarchy.subtree("root")),
+            [("root", 0), ("A", 1), ("B", 1), ("C", 2), ("D", 2)],
+        )
+        self.assertEqual(list(hierarchy.subtree("B")), [("B", 0), ("C", 1), ("D", 1)])
+
+    # writes made through the same connection are picked up on refresh()
+    def test_05_refresh_after_write(self):
+        b.add_bank(acct_conn, bank="E", parent_bank="A", shares=1)
+        self.assertNotIn("E", hierarchy)
+        hierarchy.refresh()
+        self.assertEqual(hierarchy.children("A"), ["E"])
+        b.edit_bank(acct_conn, bank="E", parent_bank="B")
+        hierarchy.refresh()
+        self.assertEqual(hierarchy.children("A"), [])
+        self.assertEqual(hierarchy.children("B"), ["C", "D", "E"])
+
+    # commits made by another connection are picked up on refresh()
+    def test_06_refresh_after_other_connection(self):
+        other_conn = sqlite3.connect(f"file:{self.dbname}?mode=rw", uri=True)
+        other_conn.row_factory = sqlite3.Row
+        b.add_bank(other_conn, bank="F", parent_bank="C", shares=1)
+        other_conn.close()
+        self.assertNotIn("F", hierarchy)
+        hierarchy.refresh()
+        self.assertEqual(hierarchy.ancestors("F"), ["C", "B", "root"])
+
+    # a cached hierarchy can be passed to the bank commands that walk it
+    def test_07_shared_hierarchy(self):
+        b.add_bank(acct_conn, bank="G", parent_bank="D", shares=1, hierarchy=hierarchy)
+        b.delete_bank(acct_conn, bank="B", force=True, hierarchy=hierarchy)
+        hierarchy.refresh()
+        self.assertEqual(hierarchy.children("root"), ["A"])
+        self.assertNotIn("G", hierarchy)
+        with self.assertRaises(ValueError):
+            b.add_bank(
+                acct_conn, bank="H", parent_bank="B", shares=1, hierarchy=hierarchy
+            )
+
+    # remove test database and log file
+    @classmethod
+    def tearDownClass(self):
+        acct_conn.close()
+        os.remove(self.dbname)
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import os
+import sqlite3
+import time
+
+from unittest import mock
+
+from fluxacct.accounting import create_db as c
+from fluxacct.accounting import bank_subcommands as b
+from fluxacct.accounting import user_subcommands as u
+from fluxacct.accounting import job_usage_calculation as j
+
+# the start of the half-life period in the DB and the length of one period
+END_HL = 10000000
+PDHL = 604800
+
+
+def insert_job(cur, jobid, userid, t_inactive, bank):
+    cur.execute(
+        """
+        INSERT INTO jobs (
+            id, userid, t_submit, t_run, t_inactive, ranks, R, jobspec, bank
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            jobid,
+            userid,
+            t_inactive - 300,
+            t_inactive - 200,
+            t_inactive,
+            "0",
+            '{"version":1,"execution": {"R_lite":[{"rank":"0","children": {"core": "0"}}]}}',
+            '{ "attributes": { "system": { "bank": "A"} } }',
+            bank,
+        ),
+    )
+
+
+class TestUsageCatchUp(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        # create test accounting database
+        self.dbname = f"TestDB_{os.path.basename(__file__)[:5]}_{round(time.time())}.db"
+        c.create_db(self.dbname)
+        global conn
+        global cur
+
+        conn = sqlite3.connect(self.dbname, timeout=60)
+        conn.row_factory = sqlite3.Row
+        cur = conn.cursor()
+
+        cur.execute(
+            "UPDATE t_half_life_period_table SET end_half_life_period=? "
+            "WHERE cluster='cluster'",
+            (END_HL,),
+        )
+        conn.commit()
+
+        b.add_bank(conn, "root", 1)
+        b.add_bank(conn, "A", 1, "root")
+        u.add_user(conn, username="user1", bank="A", uid=50001)
+        u.add_user(conn, username="user2", bank="A", uid=50002)
+
+        # both associations start with usage in the current period:
+        # user1 | p0: 100
+        # user2 | p0: 80
+        for username, usage in (("user1", 100), ("user2", 80)):
+            cur.execute(
+                "UPDATE association_table SET job_usage=? WHERE username=?",
+                (usage, username),
+            )
+            cur.execute(
+                "UPDATE job_usage_per_association_table SET value=? "
+                "WHERE assoc_id IN (SELECT assoc_id FROM association_table "
+                "WHERE username=?) AND period=0",
+                (usage, username),
+            )
+
+        # user1 runs one job in the last half-life period that ended during the gap
+        # and one job in the new half-life period
+        start = END_HL + (3 * PDHL)
+        insert_job(cur, "1", 50001, start - 1000, "A")
+        insert_job(cur, "2", 50001, start + 1000, "A")
+        conn.commit()
+
+    # update-usage does not run for almost three and a half half-life periods; all
+    # three periods that ended are applied in a single run
+    @mock.patch("time.time", mock.MagicMock(return_value=END_HL + (PDHL * 3.5)))
+    def test_01_update_after_missed_periods(self):
+        j.update_job_usage(conn)
+
+        cur.execute("SELECT end_half_life_period FROM t_half_life_period_table")
+        self.assertEqual(cur.fetchone()[0], END_HL + (3 * PDHL))
+
+    # an association without new jobs has its usage decayed three times
+    def test_02_idle_association_decayed(self):
+        cur.execute(
+            "SELECT value FROM job_usage_per_association_table "
+            "WHERE assoc_id IN (SELECT assoc_id FROM association_table "
+            "WHERE username='user2') ORDER BY period"
+        )
+        self.assertEqual([row[0] for row in cur.fetchall()], [0.0, 0.0, 0.0, 10.0])
+        cur.execute("SELECT job_usage FROM association_table WHERE username='user2'")
+        self.assertEqual(cur.fetchone()[0], 10.0)
+
+    # a job that finished during the gap is placed in the period it finished in
+    # and decayed along with it; only the job in the new period counts towards
+    # period 0
+    def test_03_gap_job_placed_in_its_period(self):
+        cur.execute(
+            "SELECT period, value FROM job_usage_per_association_table "
+            "WHERE assoc_id IN (SELECT assoc_id FROM association_table "
+            "WHERE username='user1') ORDER BY period"
+        )
+        self.assertEqual(
+            [tuple(row) for row in cur.fetchall()],
+            [(0, 200.0), (1, 100.0), (2, 0.0), (3, 12.5)],
+        )
+        cur.execute("SELECT job_usage FROM association_table WHERE username='user1'")
+        self.assertEqual(cur.fetchone()[0], 312.5)
+
+    # the bank's usage reflects both associations after the catch-up
+    def test_04_bank_usage(self):
+        cur.execute("SELECT job_usage FROM bank_table WHERE bank='A'")
+        self.assertEqual(cur.fetchone()[0], 322.5)
+
+    # the job that finished during the gap is only decayed once more when the next
+    # half-life period ends without any new jobs
+    @mock.patch("time.time", mock.MagicMock(return_value=END_HL + (PDHL * 4.5)))
+    def test_05_update_after_next_period(self):
+        j.update_job_usage(conn)
+
+        cur.execute(
+            "SELECT value FROM job_usage_per_association_table "
+            "WHERE assoc_id IN (SELECT assoc_id FROM association_table "
+            "WHERE username='user1') ORDER BY period"
+        )
+        self.assertEqual([row[0] for row in cur.fetchall()], [0.0, 100.0, 50.0, 0.0])
+        cur.execute("SELECT job_usage FROM association_table WHERE username='user1'")
+        self.assertEqual(cur.fetchone()[0], 150.0)
+
+    # remove database
+    @classmethod
+    def tearDownClass(self):
+        conn.close()
+        os.remove(self.dbname)
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
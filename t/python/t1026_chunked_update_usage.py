@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import os
+import json
+import sqlite3
+import time
+
+from unittest import mock
+
+from fluxacct.accounting import create_db as c
+from fluxacct.accounting import bank_subcommands as b
+from fluxacct.accounting import user_subcommands as u
+from fluxacct.accounting import job_usage_calculation as j
+
+END_HL = 10000000
+PDHL = 604800
+
+
+def create_test_db(dbname):
+    """
+    Create a DB with 10 associations, half of which have run a job in the current
+    half-life period, and all of which have some usage in past periods.
+    """
+    c.create_db(dbname)
+    conn = sqlite3.connect(dbname, timeout=60)
+    conn.row_factory = sqlite3.Row
+    conn.execute(
+        "UPDATE t_half_life_period_table SET end_half_life_period=? "
+        "WHERE cluster='cluster'",
+        (END_HL,),
+    )
+    conn.commit()
+
+    b.add_bank(conn, "root", 1)
+    b.add_bank(conn, "A", 1, "root")
+    b.add_bank(conn, "B", 1, "root")
+    for i in range(10):
+        bank = "A" if i % 2 else "B"
+        u.add_user(conn, username=f"user{i}", bank=bank, uid=50000 + i)
+        conn.execute(
+            "UPDATE job_usage_per_association_table SET value=? "
+            "WHERE assoc_id IN (SELECT assoc_id FROM association_table "
+            "WHERE username=?) AND period=1",
+            (10.0 * (i + 1), f"user{i}"),
+        )
+        conn.execute(
+            "UPDATE association_table SET job_usage=? WHERE username=?",
+            (10.0 * (i + 1), f"user{i}"),
+        )
+        if i % 2:
+            t_inactive = END_HL + (PDHL * 1.5)
+            conn.execute(
+                """
+                INSERT INTO jobs (
+                    id, userid, t_submit, t_run, t_inactive, ranks, R, jobspec, bank
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    str(i),
+                    50000 + i,
+                    t_inactive - 200,
+                    t_inactive - 100,
+                    t_inactive,
+                    "0",
+                    '{"version":1,"execution": {"R_lite":[{"rank":"0","children": {"core": "0"}}]}}',
+                    "{}",
+                    bank,
+                ),
+            )
+    conn.commit()
+
+    return conn
+
+
+def usage_snapshot(conn):
+    return {
+        "periods": [
+            tuple(row)
+            for row in conn.execute(
+                "SELECT a.username, a.bank, p.period, p.value "
+                "FROM job_usage_per_association_table p "
+                "JOIN association_table a ON p.assoc_id = a.assoc_id "
+                "ORDER BY a.username, a.bank, p.period"
+            )
+        ],
+        "associations": [
+            tuple(row)
+            for row in conn.execute(
+                "SELECT username, bank, job_usage FROM association_table "
+                "ORDER BY username, bank"
+            )
+        ],
+        "banks": [
+            tuple(row) for row in conn.execute("SELECT bank, job_usage FROM bank_table")
+        ],
+        "end_hl": conn.execute(
+            "SELECT end_half_life_period FROM t_half_life_period_table"
+        ).fetchone()[0],
+    }
+
+
+class TestChunkedUpdateUsage(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        prefix = f"TestDB_{os.path.basename(__file__)[:5]}_{round(time.time())}"
+        self.dbnames = [f"{prefix}_{name}.db" for name in ("one", "chunked")]
+        global single_conn
+        global chunked_conn
+        single_conn = create_test_db(self.dbnames[0])
+        chunked_conn = create_test_db(self.dbnames[1])
+
+    # a new half-life period has begun; updating the DB in chunks gives the same
+    # result as updating it in a single transaction
+    @mock.patch("time.time", mock.MagicMock(return_value=END_HL + (PDHL * 1.6)))
+    def test_01_chunked_matches_single_transaction(self):
+        j.update_job_usage(single_conn)
+        j.update_job_usage(chunked_conn, chunk_size=3)
+
+        self.assertEqual(usage_snapshot(single_conn), usage_snapshot(chunked_conn))
+        self.assertIsNone(j.get_update_usage_checkpoint(chunked_conn.cursor()))
+
+    # an update that fails part of the way through leaves a checkpoint behind; the
+    # chunks that were already committed are not updated again
+    @mock.patch("time.time", mock.MagicMock(return_value=END_HL + (PDHL * 2.6)))
+    def test_02_interrupted_update_leaves_checkpoint(self):
+        j.update_job_usage(single_conn)
+
+        decay_associations = j.decay_associations
+        calls = []
+
+        # the second chunk fails after the first one has been committed
+        def fail_second_chunk(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise sqlite3.OperationalError("database is locked")
+            decay_associations(*args)
+
+        with mock.patch.object(j, "decay_associations", side_effect=fail_second_chunk):
+            with self.assertRaises(sqlite3.OperationalError):
+                j.update_job_usage(chunked_conn, chunk_size=3)
+
+        checkpoint = j.get_update_usage_checkpoint(chunked_conn.cursor())
+        self.assertEqual(checkpoint["periods"], 1)
+        self.assertEqual(checkpoint["username"], "user2")
+        # the end of the half-life period has not been advanced yet
+        self.assertEqual(usage_snapshot(chunked_conn)["end_hl"], END_HL + PDHL)
+
+    # resuming the update applies the half-life period that had ended when the update
+    # began to the rest of the associations exactly once, even if another half-life
+    # period has ended since then
+    @mock.patch("time.time", mock.MagicMock(return_value=END_HL + (PDHL * 3.7)))
+    def test_03_resume_from_checkpoint(self):
+        j.update_job_usage(chunked_conn, chunk_size=3)
+
+        self.assertEqual(usage_snapshot(single_conn), usage_snapshot(chunked_conn))
+        self.assertIsNone(j.get_update_usage_checkpoint(chunked_conn.cursor()))
+
+    # a chunk size must be a positive number of associations
+    def test_04_bad_chunk_size(self):
+        with self.assertRaises(ValueError):
+            j.update_job_usage(chunked_conn, chunk_size=0)
+
+    # every phase of an update records its run time and the rows it wrote, and the
+    # summary can be saved in config_table
+    @mock.patch("time.time", mock.MagicMock(return_value=END_HL + (PDHL * 3.7)))
+    def test_05_update_usage_stats(self):
+        for conn, chunk_size in ((single_conn, None), (chunked_conn, 4)):
+            stats = j.UpdateUsageStats(conn)
+            j.update_job_usage(conn, chunk_size=chunk_size, stats=stats)
+            summary = stats.to_dict()
+
+            self.assertIn("read_new_jobs", summary["phases"])
+            self.assertIn("rollup_bank_usage", summary["phases"])
+            self.assertEqual(summary["counts"]["associations_read"], 10)
+            self.assertEqual(summary["counts"]["half_life_periods"], 1)
+            self.assertEqual(summary["counts"]["associations_decayed"], 10)
+            # the 4 periods of every association are moved in two steps, and its
+            # job_usage is updated
+            self.assertEqual(
+                summary["phases"]["decay_idle_associations"]["rows_written"], 90
+            )
+            self.assertGreaterEqual(summary["seconds"], 0)
+
+        with chunked_conn:
+            stats.save(chunked_conn.cursor())
+        saved = chunked_conn.execute(
+            "SELECT value FROM config_table WHERE key=?", (j.UPDATE_USAGE_STATS,)
+        ).fetchone()[0]
+        self.assertEqual(json.loads(saved)["counts"]["chunks"], 3)
+
+    # remove databases
+    @classmethod
+    def tearDownClass(self):
+        single_conn.close()
+        chunked_conn.close()
+        for dbname in self.dbnames:
+            os.remove(dbname)
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
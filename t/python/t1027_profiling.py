@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import os
+import json
+import pstats
+import shutil
+import sqlite3
+import tempfile
+
+from unittest import mock
+
+from fluxacct.accounting import create_db as c
+from fluxacct.accounting import bank_subcommands as b
+from fluxacct.accounting import profiling
+
+
+class TestProfiling(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.dbname = os.path.join(self.tmpdir, "FluxAccounting.db")
+        c.create_db(self.dbname)
+        global conn
+        conn = sqlite3.connect(self.dbname, timeout=60)
+        conn.row_factory = sqlite3.Row
+
+    # profiling is turned off unless a directory is passed in or set in the
+    # environment
+    def test_01_profile_dir(self):
+        with mock.patch.dict(os.environ, clear=True):
+            self.assertIsNone(profiling.get_profile_dir())
+            with profiling.profile("test", conn=conn) as profiler:
+                self.assertIsNone(profiler)
+            self.assertEqual(profiling.get_profile_dir("/tmp/foo"), "/tmp/foo")
+        with mock.patch.dict(os.environ, {profiling.PROFILE_ENV: "/tmp/bar"}):
+            self.assertEqual(profiling.get_profile_dir(), "/tmp/bar")
+            self.assertEqual(profiling.get_profile_dir("/tmp/foo"), "/tmp/foo")
+
+    # statements which only differ by their literals are counted together
+    def test_02_normalize_statement(self):
+        self.assertEqual(
+            profiling.normalize_statement(
+                "SELECT * FROM bank_table\n  WHERE bank='it''s' AND bank_id=12"
+            ),
+            "SELECT * FROM bank_table WHERE bank=? AND bank_id=?",
+        )
+
+    # a profile writes a pstats file and the SQL statements run while profiling
+    def test_03_profile_writes_stats(self):
+        profile_dir = os.path.join(self.tmpdir, "profiles")
+        with profiling.profile("flux account add-bank", profile_dir, conn) as profiler:
+            b.add_bank(conn, bank="root", shares=1)
+            b.add_bank(conn, bank="A", shares=1, parent_bank="root")
+
+        self.assertTrue(
+            os.path.basename(profiler.path).startswith("flux_account_add-bank-")
+        )
+        stats = pstats.Stats(profiler.path)
+        self.assertTrue(
+            any(func[2] == "add_bank" for func in stats.stats), "add_bank not profiled"
+        )
+
+        with open(profiler.path.replace(".pstats", ".sql.json")) as sql_file:
+            timings = json.load(sql_file)
+        statements = {timing["statement"]: timing["count"] for timing in timings}
+        self.assertEqual(
+            statements["SELECT active FROM bank_table WHERE bank=? AND parent_bank=?"],
+            2,
+        )
+        self.assertTrue(all(timing["seconds"] >= 0 for timing in timings))
+
+        # the trace callback is removed once the profile is written
+        b.add_bank(conn, bank="B", shares=1, parent_bank="root")
+        self.assertEqual(profiler.sql_timings(), timings)
+
+    # remove the database and profiles
+    @classmethod
+    def tearDownClass(self):
+        conn.close()
+        shutil.rmtree(self.tmpdir)
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import os
+import json
+import sqlite3
+import time
+
+from unittest import mock
+
+from fluxacct.accounting import create_db as c
+from fluxacct.accounting import service_stats as s
+
+
+class TestServiceStats(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.dbname = f"TestDB_{os.path.basename(__file__)[:5]}_{round(time.time())}.db"
+        self.stats_file = f"{self.dbname}.prom"
+        c.create_db(self.dbname)
+        global conn
+        global stats
+        conn = sqlite3.connect(self.dbname, timeout=60)
+        stats = s.ServiceStats()
+
+    # a wrapped handle passes responses through and notes their size and whether
+    # the request failed
+    def test_01_recording_handle(self):
+        handle = mock.MagicMock()
+        recorder = s.RecordingHandle(handle)
+        recorder.respond("msg", {"list_banks": "root"})
+        self.assertEqual(recorder.nbytes, len(json.dumps({"list_banks": "root"})))
+        self.assertFalse(recorder.error)
+        handle.respond.assert_called_once_with("msg", {"list_banks": "root"})
+
+        recorder.respond_error("msg", 0, "list-banks: ValueError: foo")
+        self.assertTrue(recorder.error)
+        handle.respond_error.assert_called_once_with(
+            "msg", 0, "list-banks: ValueError: foo"
+        )
+        # every other attribute is looked up on the wrapped handle
+        self.assertIs(recorder.service_register, handle.service_register)
+
+    # requests are counted per endpoint, and the latency histogram is cumulative
+    def test_02_record_requests(self):
+        stats.record("view_user", 0.002, nbytes=100, payload={"username": "user1"})
+        stats.record("view_user", 0.5, error=True, payload={"username": "user2"})
+        stats.record("list_banks", 2.0, nbytes=50, payload={"json": True})
+
+        summary = stats.to_dict(conn)
+        view_user = summary["endpoints"]["view_user"]
+        self.assertEqual(view_user["requests"], 2)
+        self.assertEqual(view_user["errors"], 1)
+        self.assertEqual(view_user["bytes"], 100)
+        self.assertEqual(view_user["latency_buckets"]["0.001"], 0)
+        self.assertEqual(view_user["latency_buckets"]["0.005"], 1)
+        self.assertEqual(view_user["latency_buckets"]["0.5"], 2)
+        self.assertEqual(view_user["latency_buckets"]["10.0"], 2)
+
+        # the slowest requests are listed first, along with their payloads
+        slowest = summary["slowest_requests"]
+        self.assertEqual(
+            [request["endpoint"] for request in slowest][:2],
+            ["list_banks", "view_user"],
+        )
+        self.assertEqual(slowest[1]["payload"], {"username": "user2"})
+        self.assertTrue(slowest[1]["error"])
+
+        # the size of the DB is reported
+        self.assertEqual(summary["sqlite"]["path"], os.path.abspath(self.dbname))
+        self.assertEqual(summary["sqlite"]["db_size"], os.path.getsize(self.dbname))
+        self.assertEqual(summary["sqlite"]["wal_size"], 0)
+        json.dumps(summary)
+
+    # only the most recent requests are kept
+    def test_03_recent_requests_bounded(self):
+        for _ in range(s.RECENT_REQUESTS + 10):
+            stats.record("list_users", 0.0001)
+        self.assertEqual(len(stats.recent), s.RECENT_REQUESTS)
+        self.assertEqual(len(stats.slowest()), s.SLOWEST_REQUESTS)
+        self.assertEqual(stats.to_dict()["endpoints"]["list_users"]["requests"], 1010)
+
+    # the statistics can be written in the Prometheus text format
+    def test_04_prometheus(self):
+        stats.write_prometheus(self.stats_file, conn)
+        with open(self.stats_file) as stats_file:
+            lines = stats_file.read().splitlines()
+
+        self.assertIn("# TYPE flux_accounting_requests_total counter", lines)
+        self.assertIn('flux_accounting_requests_total{endpoint="view_user"} 2', lines)
+        self.assertIn(
+            'flux_accounting_request_errors_total{endpoint="view_user"} 1', lines
+        )
+        self.assertIn(
+            'flux_accounting_request_duration_seconds_bucket{endpoint="list_banks",'
+            'le="1.0"} 0',
+            lines,
+        )
+        self.assertIn(
+            'flux_accounting_request_duration_seconds_bucket{endpoint="list_banks",'
+            'le="+Inf"} 1',
+            lines,
+        )
+        self.assertIn(
+            f"flux_accounting_db_size_bytes {os.path.getsize(self.dbname)}", lines
+        )
+
+    # remove database and stats file
+    @classmethod
+    def tearDownClass(self):
+        conn.close()
+        os.remove(self.dbname)
+        os.remove(self.stats_file)
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
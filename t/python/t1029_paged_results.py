@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import os
+import errno
+import sqlite3
+import time
+import json
+
+from unittest import mock
+
+from fluxacct.accounting import create_db as c
+from fluxacct.accounting import bank_subcommands as b
+from fluxacct.accounting import user_subcommands as u
+from fluxacct.accounting import jobs_table_subcommands as j
+from fluxacct.accounting import job_usage_calculation as jobs
+from fluxacct.accounting import service_stats as s
+
+R = {
+    "version": 1,
+    "execution": {
+        "R_lite": [{"rank": "0", "children": {"core": "0-3"}}],
+        "starttime": 0,
+        "expiration": 0,
+        "nodelist": ["node0"],
+    },
+}
+# a time in the middle of November 2023
+T_RUN = 1700000000
+
+
+class TestPagedResults(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.dbname = f"TestDB_{os.path.basename(__file__)[:5]}_{round(time.time())}.db"
+        c.create_db(self.dbname)
+        global conn
+
+        conn = sqlite3.connect(self.dbname, timeout=60)
+        conn.row_factory = sqlite3.Row
+
+        b.add_bank(conn, "root", 1)
+        for bank in ["A", "B", "C", "D"]:
+            b.add_bank(conn, bank, 1, "root")
+        for i in range(7):
+            bank = "A" if i % 2 else "B"
+            u.add_user(conn, username=f"user{i}", bank=bank, uid=50000 + i)
+            conn.execute(
+                "INSERT INTO jobs "
+                "(id, userid, t_submit, t_run, t_inactive, ranks, R, jobspec, bank) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    i + 1,
+                    50000 + i,
+                    T_RUN - 60,
+                    T_RUN,
+                    T_RUN + 100 * (i + 1),
+                    "0",
+                    json.dumps(R),
+                    json.dumps({"attributes": {"system": {"bank": bank}}}),
+                    bank,
+                ),
+            )
+        conn.commit()
+
+    # joined together, the pages of JSON output are the same as unpaged output
+    def test_01_list_users_json(self):
+        pages = list(u.list_users(conn, json_fmt=True, page_size=3))
+        self.assertEqual(len(pages), 3)
+        self.assertEqual("".join(pages), u.list_users(conn, json_fmt=True))
+        self.assertEqual(len(json.loads("".join(pages))), 7)
+
+    # only the first page of format string output has a header
+    def test_02_list_banks_format_string(self):
+        pages = list(b.list_banks(conn, format_string="{bank}", page_size=2))
+        self.assertEqual(pages[0], "bank\nroot\nA\n")
+        self.assertEqual("".join(pages), b.list_banks(conn, format_string="{bank}"))
+
+    # the columns of a table are sized to fit the rows on every page
+    def test_03_list_banks_table(self):
+        b.add_bank(conn, "a_bank_with_a_long_name", 1, "root")
+        pages = list(b.list_banks(conn, cols=["bank_id", "bank"], page_size=2))
+        self.assertEqual(len(pages), 3)
+        self.assertEqual("".join(pages), b.list_banks(conn, cols=["bank_id", "bank"]))
+
+    # a query with no results raises an error before any page is sent
+    def test_04_no_results(self):
+        with self.assertRaises(ValueError):
+            u.list_users(conn, bank="D", page_size=3)
+
+    # job records are read from the DB a page at a time
+    def test_05_view_jobs(self):
+        fields = "{jobid.dec:<4} {userid:<8} {bank}"
+        pages = list(j.view_jobs(conn, fields, page_size=3))
+        self.assertEqual(len(pages), 3)
+        self.assertTrue(pages[0].startswith("jobid.dec"))
+        self.assertFalse(pages[1].startswith("jobid.dec"))
+        self.assertEqual("".join(pages), j.view_jobs(conn, fields))
+
+        # a query with no results still returns a header
+        pages = list(j.view_jobs(conn, fields, page_size=3, bank="C"))
+        self.assertEqual(pages, [j.view_jobs(conn, fields, bank="C")])
+
+    # the lines of a usage report can be split into pages
+    def test_06_view_usage_report(self):
+        args = {"start": "11/01/23", "end": "12/01/23", "report_type": "byuser"}
+        report = jobs.view_usage_report(conn, **args)
+        self.assertEqual(len(report.splitlines()), 9)
+        pages = list(jobs.view_usage_report(conn, page_size=4, **args))
+        self.assertEqual(len(pages), 3)
+        self.assertEqual("".join(pages), report)
+
+    # the end of a streamed response is not counted as an error
+    def test_07_end_of_stream(self):
+        recorder = s.RecordingHandle(mock.MagicMock())
+        recorder.respond_error("msg", errno.ENODATA)
+        self.assertFalse(recorder.error)
+
+    # jobs can be sorted by a field in either direction
+    def test_08_sort_jobs(self):
+        jobids = [int(job["id"]) for job in j.get_jobs(conn, sort="-t_inactive")]
+        self.assertEqual(jobids, [7, 6, 5, 4, 3, 2, 1])
+        # jobs with the same sort value are sorted by jobid
+        jobids = [int(job["id"]) for job in j.get_jobs(conn, sort="-bank")]
+        self.assertEqual(jobids, [7, 5, 3, 1, 6, 4, 2])
+        with self.assertRaises(ValueError):
+            j.get_jobs(conn, sort="nnodes")
+
+    # only the rows inside of a limit and offset are read
+    def test_09_limit_and_offset(self):
+        jobs_found = j.get_jobs(conn, sort="-t_inactive", limit=2)
+        self.assertEqual([int(job["id"]) for job in jobs_found], [7, 6])
+        jobs_found = j.get_jobs(conn, sort="-t_inactive", limit=2, offset=2)
+        self.assertEqual([int(job["id"]) for job in jobs_found], [5, 4])
+        jobs_found = j.get_jobs(conn, offset=5)
+        self.assertEqual([int(job["id"]) for job in jobs_found], [6, 7])
+        jobs_found = j.get_jobs(conn, bank="A", limit=0)
+        self.assertEqual(jobs_found, [])
+        with self.assertRaises(ValueError):
+            j.get_jobs(conn, limit=-1)
+
+    # a page of jobs can be found by the last job of the previous page
+    def test_10_after_job(self):
+        jobs_found = j.get_jobs(conn, bank="B", sort="-t_inactive", after_job=5)
+        self.assertEqual([int(job["id"]) for job in jobs_found], [3, 1])
+        jobs_found = j.get_jobs(conn, sort="bank", after_job=4, limit=2)
+        self.assertEqual([int(job["id"]) for job in jobs_found], [6, 1])
+        with self.assertRaises(ValueError):
+            j.get_jobs(conn, after_job=100)
+
+    # without fields, the columns of job records are sized to fit every job
+    def test_11_view_jobs_default_format(self):
+        conn.execute(
+            "INSERT INTO jobs "
+            "(id, userid, t_submit, t_run, t_inactive, ranks, R, jobspec, bank) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                123456789,
+                50001,
+                T_RUN - 60,
+                T_RUN,
+                T_RUN + 800,
+                "0",
+                json.dumps(R),
+                json.dumps({"attributes": {"system": {"bank": "A"}}}),
+                "A",
+            ),
+        )
+        conn.commit()
+        pages = list(j.view_jobs(conn, None, page_size=3))
+        self.assertEqual(len(pages), 3)
+        self.assertEqual("".join(pages), j.view_jobs(conn, None))
+
+    # remove database
+    @classmethod
+    def tearDownClass(self):
+        conn.close()
+        os.remove(self.dbname)
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
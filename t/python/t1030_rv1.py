@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import json
+
+from unittest import mock
+
+from flux.resource import ResourceSet
+from fluxacct.accounting import rv1
+
+# R documents in the shapes written by Flux's schedulers, along with the number of
+# nodes, cores, and GPUs in each
+CORPUS = [
+    (
+        {
+            "version": 1,
+            "execution": {
+                "R_lite": [{"rank": "0", "children": {"core": "0"}}],
+                "starttime": 1750178607.82,
+                "expiration": 1750182207.82,
+                "nodelist": ["node0"],
+            },
+        },
+        (1, 1, 0),
+    ),
+    (
+        {
+            "version": 1,
+            "execution": {
+                "R_lite": [{"rank": "0-3", "children": {"core": "0-43", "gpu": "0-3"}}],
+                "starttime": 1750178607.82,
+                "expiration": 1750182207.82,
+                "nodelist": ["node[0-3]"],
+                "properties": {"pbatch": "0-3"},
+            },
+        },
+        (4, 176, 16),
+    ),
+    (
+        {
+            "version": 1,
+            "execution": {
+                "R_lite": [
+                    {"rank": "0,2", "children": {"core": "0-7"}},
+                    {"rank": "5-6,9", "children": {"core": "0-3,8-11", "gpu": "1"}},
+                ],
+                "starttime": 0.0,
+                "expiration": 0.0,
+                "nodelist": ["node[0,2,5-6,9]"],
+            },
+        },
+        (5, 40, 3),
+    ),
+    (
+        {
+            "version": 1,
+            "execution": {
+                "R_lite": [{"rank": "12", "children": {"core": "3"}}],
+                "starttime": 0.0,
+                "expiration": 0.0,
+                "nodelist": ["node12"],
+            },
+            "scheduling": {"graph": {"nodes": [], "edges": []}},
+        },
+        (1, 1, 0),
+    ),
+    (
+        {
+            "version": 1,
+            "execution": {
+                "R_lite": [{"rank": "0-1023", "children": {"core": "0-95"}}],
+                "starttime": 0.0,
+                "expiration": 0.0,
+                "nodelist": ["node[0-1023]"],
+            },
+        },
+        (1024, 98304, 0),
+    ),
+]
+
+
+class TestRv1(unittest.TestCase):
+    # the ids in an idset are counted from its ranges
+    def test_01_idset_count(self):
+        self.assertEqual(rv1.idset_count("0"), 1)
+        self.assertEqual(rv1.idset_count("0-3,7,10-11"), 7)
+        self.assertEqual(rv1.idset_count("[0-3]"), 4)
+        self.assertEqual(rv1.idset_count(""), 0)
+        with self.assertRaises(ValueError):
+            rv1.idset_count("3-1")
+        with self.assertRaises(ValueError):
+            rv1.idset_count("a-b")
+
+    # the counts match the expected counts and ResourceSet for every R document,
+    # whether R is passed in as a string or decoded
+    def test_02_corpus(self):
+        for R, expected in CORPUS:
+            rset = ResourceSet(json.dumps(R))
+            self.assertEqual(rv1.resource_counts(json.dumps(R)), expected)
+            self.assertEqual(rv1.resource_counts(R), expected)
+            self.assertEqual((rset.nnodes, rset.ncores, rset.ngpus), expected)
+
+    # malformed R raises the exceptions that the callers of resource_counts() catch
+    def test_03_malformed_R(self):
+        with self.assertRaises(ValueError):
+            rv1.resource_counts("{")
+        with self.assertRaises(KeyError):
+            rv1.resource_counts(json.dumps({"version": 1, "execution": {}}))
+        with self.assertRaises(ValueError):
+            rv1.resource_counts(
+                json.dumps({"version": 1, "execution": {"R_lite": [{"rank": "1-0"}]}})
+            )
+
+    # R which isn't version 1, or lists a rank more than once, is passed to
+    # ResourceSet
+    @mock.patch("fluxacct.accounting.rv1.ResourceSet")
+    def test_04_fall_back_to_resourceset(self, mock_rset):
+        mock_rset.return_value = mock.Mock(nnodes=1, ncores=2, ngpus=3)
+        R = {"version": 2, "execution": {}}
+        self.assertEqual(rv1.resource_counts(R), (1, 2, 3))
+        mock_rset.assert_called_once_with(R)
+
+        R = {
+            "version": 1,
+            "execution": {
+                "R_lite": [
+                    {"rank": "0-1", "children": {"core": "0-1"}},
+                    {"rank": "1", "children": {"core": "2-3"}},
+                ]
+            },
+        }
+        self.assertEqual(rv1.resource_counts(json.dumps(R)), (1, 2, 3))
+        self.assertEqual(mock_rset.call_count, 2)
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
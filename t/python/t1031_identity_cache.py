@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import os
+import sqlite3
+import time
+
+from collections import namedtuple
+from unittest import mock
+
+from flux.constants import FLUX_USERID_UNKNOWN
+from fluxacct.accounting import create_db as c
+from fluxacct.accounting import bank_subcommands as b
+from fluxacct.accounting import user_subcommands as u
+from fluxacct.accounting import identity
+
+struct_passwd = namedtuple("struct_passwd", "pw_name pw_uid")
+PASSWD = [struct_passwd("user1", 1001), struct_passwd("user2", 1002)]
+
+
+def fake_getpwnam(username):
+    for entry in PASSWD:
+        if entry.pw_name == username:
+            return entry
+    raise KeyError(username)
+
+
+def fake_getpwuid(userid):
+    for entry in PASSWD:
+        if entry.pw_uid == userid:
+            return entry
+    raise KeyError(userid)
+
+
+@mock.patch("fluxacct.accounting.identity.pwd.getpwnam", side_effect=fake_getpwnam)
+@mock.patch("fluxacct.accounting.identity.pwd.getpwuid", side_effect=fake_getpwuid)
+class TestIdentityCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.dbname = f"TestDB_{os.path.basename(__file__)[:5]}_{round(time.time())}.db"
+        c.create_db(self.dbname)
+        global conn
+
+        conn = sqlite3.connect(self.dbname, timeout=60)
+        b.add_bank(conn, "root", 1)
+        b.add_bank(conn, "A", 1, "root")
+        u.add_user(conn, username="user3", bank="A", uid=1003)
+        u.add_user(conn, username="user4", bank="A")
+
+    # a lookup only goes to the password database the first time
+    def test_01_hits_and_misses(self, getpwuid, getpwnam):
+        cache = identity.IdentityCache()
+        self.assertEqual(cache.get_uid("user1"), 1001)
+        self.assertEqual(cache.get_uid("user1"), 1001)
+        self.assertEqual(cache.get_username(1002), "user2")
+        self.assertEqual(getpwnam.call_count, 1)
+        self.assertEqual(getpwuid.call_count, 1)
+
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 2)
+
+    # users that can't be found are cached for a shorter time
+    def test_02_negative_caching(self, getpwuid, getpwnam):
+        cache = identity.IdentityCache(ttl=100, negative_ttl=10)
+        with mock.patch("time.monotonic", return_value=0):
+            self.assertEqual(cache.get_uid("nobody"), FLUX_USERID_UNKNOWN)
+            self.assertEqual(cache.get_username(9999), "9999")
+            self.assertEqual(cache.get_uid("nobody"), FLUX_USERID_UNKNOWN)
+            self.assertEqual(cache.get_uid("user1"), 1001)
+        self.assertEqual(cache.stats()["negative_hits"], 1)
+
+        # the user that wasn't found is looked up again once its entry expires
+        with mock.patch("time.monotonic", return_value=50):
+            cache.get_uid("nobody")
+            cache.get_uid("user1")
+        self.assertEqual(getpwnam.call_count, 3)
+
+        # and so is the user that was found
+        with mock.patch("time.monotonic", return_value=150):
+            cache.get_uid("user1")
+        self.assertEqual(getpwnam.call_count, 4)
+
+    # the cache can be filled with one pass over the password database
+    def test_03_preload_passwd(self, getpwuid, getpwnam):
+        cache = identity.IdentityCache()
+        with mock.patch(
+            "fluxacct.accounting.identity.pwd.getpwall", return_value=PASSWD
+        ):
+            self.assertEqual(cache.preload_passwd(), 2)
+        self.assertEqual(cache.get_uid("user2"), 1002)
+        self.assertEqual(cache.get_username(1001), "user1")
+        getpwnam.assert_not_called()
+        getpwuid.assert_not_called()
+        self.assertEqual(cache.stats()["preloaded"], 2)
+
+    # or with the associations in the flux-accounting DB whose uid is known
+    def test_04_preload_db(self, getpwuid, getpwnam):
+        cache = identity.IdentityCache()
+        self.assertEqual(cache.preload_db(conn), 1)
+        self.assertEqual(cache.get_username(1003), "user3")
+        getpwuid.assert_not_called()
+
+    # clearing the cache resets its statistics
+    def test_05_clear(self, getpwuid, getpwnam):
+        cache = identity.IdentityCache()
+        cache.get_uid("user1")
+        cache.clear()
+        self.assertEqual(cache.stats()["misses"], 0)
+        self.assertEqual(cache.stats()["usernames"], 0)
+
+    # remove database
+    @classmethod
+    def tearDownClass(self):
+        conn.close()
+        os.remove(self.dbname)
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import os
+import subprocess
+import sys
+
+FLUX_ACCOUNT = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..",
+    "..",
+    "src",
+    "cmd",
+    "flux-account.py",
+)
+
+# modules which are only needed by some subcommands and should not be imported by
+# the others
+LAZY_MODULES = ["fluxacct.accounting.create_db", "fluxacct.accounting.profiling"]
+
+
+def run_flux_account(*args):
+    """
+    Run flux-account.py with -X importtime and return its exit code, its output,
+    and the modules it imported along with their cumulative import time.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", FLUX_ACCOUNT, *args],
+        capture_output=True,
+        text=True,
+    )
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        modules[name.strip()] = (int(cumulative), not name.startswith("  "))
+    return proc.returncode, proc.stdout, modules
+
+
+def total_import_time(modules):
+    """Return the time, in microseconds, spent on top-level imports."""
+    return sum(cumulative for cumulative, top_level in modules.values() if top_level)
+
+
+class TestCLIStartup(unittest.TestCase):
+    # only the parser of the subcommand being run is built
+    def test_01_subcommand_help(self):
+        returncode, stdout, modules = run_flux_account("view-user", "--help")
+        self.assertEqual(returncode, 0)
+        self.assertIn("usage: flux-account.py view-user", stdout)
+        self.assertNotIn("list-configs", stdout)
+        sys.stderr.write(
+            f"# view-user --help imports: {total_import_time(modules) / 1000:.1f}ms\n"
+        )
+
+    # modules used by other subcommands are not imported
+    def test_02_lazy_imports(self):
+        _, _, modules = run_flux_account("view-user", "--help")
+        for module in LAZY_MODULES:
+            self.assertNotIn(module, modules)
+
+    # the top-level help still lists every subcommand
+    def test_03_top_level_help(self):
+        returncode, stdout, _ = run_flux_account("--help")
+        self.assertEqual(returncode, 0)
+        for subcommand in ["view-user", "create-db", "list-configs", "profile"]:
+            self.assertIn(subcommand, stdout)
+
+    # options that take a value are skipped when looking for the subcommand
+    def test_04_options_before_subcommand(self):
+        returncode, stdout, _ = run_flux_account(
+            "-p", "view-bank", "view-bank", "--help"
+        )
+        self.assertEqual(returncode, 0)
+        self.assertIn("usage: flux-account.py view-bank", stdout)
+
+    # an unknown subcommand is still reported with the list of valid ones
+    def test_05_unknown_subcommand(self):
+        proc = subprocess.run(
+            [sys.executable, FLUX_ACCOUNT, "foo"], capture_output=True, text=True
+        )
+        self.assertEqual(proc.returncode, 2)
+        self.assertIn("invalid choice: 'foo'", proc.stderr)
+        self.assertIn("list-configs", proc.stderr)
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import os
+import sqlite3
+import time
+
+from fluxacct.accounting import create_db as c
+from fluxacct.accounting import bank_subcommands as b
+from fluxacct.accounting import user_subcommands as u
+from fluxacct.accounting import batch as bt
+from fluxacct.accounting.bank_hierarchy import BankHierarchy
+
+
+def apply(conn, operation):
+    """Apply an operation in the form of (function, kwargs)."""
+    func, kwargs = operation
+    return func(conn, **kwargs)
+
+
+def count_associations(bank):
+    return conn.execute(
+        "SELECT COUNT(*) FROM association_table WHERE bank=?", (bank,)
+    ).fetchone()[0]
+
+
+class TestBatch(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.dbname = f"TestDB_{os.path.basename(__file__)[:5]}_{round(time.time())}.db"
+        c.create_db(self.dbname)
+        global conn
+
+        conn = sqlite3.connect(self.dbname, timeout=60)
+        b.add_bank(conn, "root", 1)
+        b.add_bank(conn, "A", 1, "root")
+
+    # the operations in a batch are committed together
+    def test_01_atomic_batch(self):
+        operations = [
+            (u.add_user, {"username": f"user{i}", "bank": "A", "uid": 5000 + i})
+            for i in range(5)
+        ]
+        committed, results = bt.apply_batch(conn, operations, apply)
+        self.assertTrue(committed)
+        self.assertEqual([result["status"] for result in results], ["ok"] * 5)
+        self.assertEqual(count_associations("A"), 5)
+        self.assertFalse(conn.in_transaction)
+
+    # none of the operations in an atomic batch are kept if one of them fails
+    def test_02_atomic_batch_failure(self):
+        operations = [
+            (b.add_bank, {"bank": "B", "shares": 1, "parent_bank": "root"}),
+            (u.add_user, {"username": "user10", "bank": "B", "uid": 5010}),
+            (u.add_user, {"username": "user11", "bank": "foo", "uid": 5011}),
+            (u.add_user, {"username": "user12", "bank": "B", "uid": 5012}),
+        ]
+        committed, results = bt.apply_batch(conn, operations, apply)
+        self.assertFalse(committed)
+        self.assertEqual(
+            [result["status"] for result in results],
+            ["ok", "ok", "error", "skipped"],
+        )
+        self.assertIn("foo", results[2]["error"])
+        bank = conn.execute("SELECT * FROM bank_table WHERE bank='B'").fetchone()
+        self.assertIsNone(bank)
+        self.assertEqual(count_associations("B"), 0)
+
+    # only the operations that fail are rolled back in continue-on-error mode
+    def test_03_continue_on_error(self):
+        hierarchy = BankHierarchy(conn)
+        operations = [
+            (u.add_user, {"username": "user20", "bank": "A", "uid": 5020}),
+            (u.add_user, {"username": "user0", "bank": "A", "uid": 5000}),
+            (u.add_user, {"username": "user21", "bank": "A", "uid": 5021}),
+        ]
+        committed, results = bt.apply_batch(
+            conn, operations, apply, bt.CONTINUE, hierarchy=hierarchy
+        )
+        self.assertTrue(committed)
+        self.assertEqual(
+            [result["status"] for result in results], ["ok", "error", "ok"]
+        )
+        self.assertIn("already active", results[1]["error"])
+        self.assertEqual(count_associations("A"), 7)
+
+    # an operation that fails partway through has its changes rolled back
+    def test_04_partial_operation(self):
+        def add_user_then_fail(conn, username):
+            u.add_user(conn, username=username, bank="A", uid=5030)
+            raise ValueError("failed after add-user")
+
+        committed, results = bt.apply_batch(
+            conn,
+            [(add_user_then_fail, {"username": "user30"})],
+            apply,
+            bt.CONTINUE,
+        )
+        self.assertTrue(committed)
+        self.assertEqual(results[0]["error"], "failed after add-user")
+        self.assertEqual(count_associations("A"), 7)
+
+    # commits made by a subcommand are deferred to the end of the batch
+    def test_05_batch_connection(self):
+        batch_conn = bt.BatchConnection(conn)
+        conn.execute("BEGIN")
+        u.edit_user(batch_conn, username="user1", bank="A", shares=10)
+        self.assertTrue(conn.in_transaction)
+        conn.rollback()
+        self.assertEqual(
+            conn.execute(
+                "SELECT shares FROM association_table WHERE username='user1'"
+            ).fetchone()[0],
+            1,
+        )
+
+    # an unknown mode raises a ValueError
+    def test_06_bad_mode(self):
+        with self.assertRaises(ValueError):
+            bt.apply_batch(conn, [], apply, "foo")
+
+    # remove database
+    @classmethod
+    def tearDownClass(self):
+        conn.close()
+        os.remove(self.dbname)
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import os
+import sqlite3
+import time
+
+from unittest import mock
+
+from fluxacct.accounting import create_db as c
+from fluxacct.accounting import db_info_subcommands as d
+
+
+def write_csv(filename, lines):
+    with open(filename, "w") as csv_file:
+        csv_file.write("\n".join(lines) + "\n")
+
+
+class TestPopDB(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.dbname = f"TestDB_{os.path.basename(__file__)[:5]}_{round(time.time())}.db"
+        c.create_db(self.dbname)
+        global conn
+
+        conn = sqlite3.connect(self.dbname, timeout=60)
+
+    # rows keep their order even when they leave different columns empty
+    def test_01_bank_table(self):
+        write_csv(
+            "bank_table.csv",
+            ["bank,parent_bank,shares", "root,,1", "A,root,1", "B,root,2", "C,root,3"],
+        )
+        val = d.populate_db(conn, "bank_table.csv")
+        self.assertEqual(val, "inserted 4 row(s) into bank_table")
+        rows = conn.execute(
+            "SELECT bank_id, bank, parent_bank, shares FROM bank_table ORDER BY bank_id"
+        ).fetchall()
+        self.assertEqual([row[1] for row in rows], ["root", "A", "B", "C"])
+        # empty columns are left to their default values
+        self.assertEqual(rows[0][2], "")
+        self.assertEqual(rows[3][3], 3)
+
+    # the table can be passed in instead of being taken from the file name
+    def test_02_table_override(self):
+        write_csv("queues.csv", ["queue,priority", "bronze,1", "silver,2"])
+        with self.assertRaises(ValueError):
+            d.populate_db(conn, "queues.csv")
+        d.populate_db(conn, "queues.csv", table="queue_table")
+        queues = conn.execute("SELECT queue FROM queue_table").fetchall()
+        self.assertEqual(queues, [("bronze",), ("silver",)])
+
+    # only the columns that are included are inserted
+    def test_03_columns_included(self):
+        write_csv("project_table.csv", ["project_id,project,usage", "10,p1,5"])
+        d.populate_db(conn, "project_table.csv", "project,usage")
+        row = conn.execute(
+            "SELECT project_id, usage FROM project_table WHERE project='p1'"
+        ).fetchone()
+        self.assertNotEqual(row[0], 10)
+        self.assertEqual(row[1], 5)
+
+    # a column that the table doesn't have raises an error before any row is read
+    def test_04_unknown_column(self):
+        write_csv("queue_table.csv", ["queue,foo", "gold,1"])
+        with self.assertRaises(ValueError):
+            d.populate_db(conn, "queue_table.csv")
+
+    # nothing is inserted if one of the rows fails
+    def test_05_rollback(self):
+        write_csv("queue_table.csv", ["queue", "gold", "bronze", "platinum"])
+        with self.assertRaises(sqlite3.IntegrityError):
+            d.populate_db(conn, "queue_table.csv")
+        self.assertIsNone(
+            conn.execute("SELECT * FROM queue_table WHERE queue='gold'").fetchone()
+        )
+        self.assertFalse(conn.in_transaction)
+
+    # the durability settings of the connection are restored after a load
+    def test_06_pragmas_restored(self):
+        conn.execute("PRAGMA synchronous=FULL")
+        write_csv("queue_table.csv", ["queue", "copper"])
+        d.populate_db(conn, "queue_table.csv")
+        self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 2)
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "delete")
+
+    # a bulk load only syncs less often; its rollback journal stays on disk
+    def test_07_relax_durability(self):
+        conn.execute("PRAGMA synchronous=FULL")
+        restore = d.relax_durability(conn)
+        self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "delete")
+        for stmt in restore:
+            conn.execute(stmt)
+        self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 2)
+
+    # indexes on the table are rebuilt after the rows are inserted
+    def test_08_indexes(self):
+        conn.execute("CREATE INDEX idx_jobs_bank ON jobs (bank)")
+        write_csv(
+            "jobs.csv",
+            ["id,userid,t_submit,t_run,t_inactive,ranks,R,jobspec,bank"]
+            + [f"{i},5001,0,1,2,0,{{}},{{}},A" for i in range(5)],
+        )
+        d.populate_db(conn, "jobs.csv")
+        index = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='jobs'"
+        ).fetchall()
+        self.assertIn(("idx_jobs_bank",), index)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0], 5)
+
+    # unique indexes are kept during a load, so the trigger which assigns every new
+    # association the next assoc_id can look it up through its index
+    def test_10_unique_indexes_kept(self):
+        self.assertEqual(d.drop_indexes(conn, "association_table"), [])
+        write_csv(
+            "association_table.csv",
+            ["creation_time,username,userid,bank,default_bank"]
+            + [f"0,user{i},{5000 + i},A,A" for i in range(5)],
+        )
+        d.populate_db(conn, "association_table.csv")
+        assoc_ids = conn.execute(
+            "SELECT assoc_id FROM association_table ORDER BY assoc_id"
+        ).fetchall()
+        self.assertEqual(assoc_ids, [(1,), (2,), (3,), (4,), (5,)])
+        index = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='index' "
+            "AND tbl_name='association_table'"
+        ).fetchall()
+        self.assertIn(("association_table_assoc_id_idx",), index)
+
+    # progress is reported as the rows are inserted
+    @mock.patch("fluxacct.accounting.db_info_subcommands.POP_DB_PROGRESS_INTERVAL", 2)
+    def test_09_progress(self):
+        write_csv(
+            "jobs.csv",
+            ["id,userid,t_submit,t_run,t_inactive,ranks,R,jobspec,bank"]
+            + [
+                f"{i},5001,0,1,2,0,{{}},{{}},{'A' if i % 3 else ''}"
+                for i in range(10, 15)
+            ],
+        )
+        progress = mock.Mock()
+        d.populate_db(conn, "jobs.csv", progress=progress)
+        # progress is reported after each group of rows with the same columns
+        self.assertEqual(progress.call_args_list, [mock.call(2), mock.call(5)])
+
+    # remove database and .csv files
+    @classmethod
+    def tearDownClass(self):
+        conn.close()
+        os.remove(self.dbname)
+        for csv_file in [
+            "bank_table.csv",
+            "queues.csv",
+            "project_table.csv",
+            "queue_table.csv",
+            "jobs.csv",
+            "association_table.csv",
+        ]:
+            os.remove(csv_file)
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import csv
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from unittest import mock
+
+from fluxacct.accounting import create_db as c
+from fluxacct.accounting import bank_subcommands as b
+from fluxacct.accounting import user_subcommands as u
+from fluxacct.accounting import db_info_subcommands as d
+
+
+def read_csv(path, opener=open):
+    with opener(path, "rt", newline="") as csv_file:
+        return list(csv.reader(csv_file))
+
+
+class TestExportDB(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.dbname = f"TestDB_{os.path.basename(__file__)[:5]}_{round(time.time())}.db"
+        c.create_db(self.dbname)
+        global conn
+
+        conn = sqlite3.connect(self.dbname, timeout=60)
+        b.add_bank(conn, "root", 1)
+        b.add_bank(conn, "A", 1, "root")
+        u.add_user(conn, username="user1", bank="A", uid=5001)
+        u.add_user(conn, username="user2", bank="A", uid=5002)
+        conn.execute("UPDATE association_table SET mod_time=100 WHERE username='user1'")
+        conn.execute("UPDATE association_table SET mod_time=200 WHERE username='user2'")
+        for jobid in range(1, 6):
+            conn.execute(
+                "INSERT INTO jobs "
+                "(id, userid, t_submit, t_run, t_inactive, ranks, R, jobspec, bank) "
+                "VALUES (?, 5001, 0, 0, ?, '0', '{}', '{}', 'A')",
+                (jobid, jobid * 100),
+            )
+        conn.commit()
+        self.tmpdir = tempfile.mkdtemp()
+
+    # every table is written to its own .csv file in the directory passed in
+    def test_01_export_to_directory(self):
+        directory = os.path.join(self.tmpdir, "plain")
+        val = d.export_db_info(conn, directory)
+        self.assertIn(directory, val)
+        # the compressed documents in job_data_table are written out with jobs,
+        # and the membership tables are rebuilt from association_table
+        tables = [
+            row[0]
+            for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
+            if row[0]
+            not in (
+                "job_data_table",
+                "association_queue_table",
+                "association_project_table",
+            )
+        ]
+        self.assertEqual(
+            sorted(os.listdir(directory)), sorted(f"{table}.csv" for table in tables)
+        )
+        rows = read_csv(os.path.join(directory, "bank_table.csv"))
+        self.assertEqual(rows[0][:2], ["bank_id", "bank"])
+        self.assertEqual([row[1] for row in rows[1:]], ["root", "A"])
+
+    # rows are read a page at a time, and tables can be exported at once
+    @mock.patch("fluxacct.accounting.PAGE_SIZE", 2)
+    def test_02_parallel_export(self):
+        directory = os.path.join(self.tmpdir, "parallel")
+        d.export_db_info(conn, directory, parallel=4)
+        for table in ["jobs", "association_table", "bank_table"]:
+            self.assertEqual(
+                read_csv(os.path.join(directory, f"{table}.csv")),
+                read_csv(os.path.join(self.tmpdir, "plain", f"{table}.csv")),
+            )
+        self.assertEqual(len(read_csv(os.path.join(directory, "jobs.csv"))), 6)
+
+    # the .csv files can be compressed with gzip
+    def test_03_gzip(self):
+        directory = os.path.join(self.tmpdir, "gzip")
+        d.export_db_info(conn, directory, compression="gzip")
+        self.assertEqual(
+            read_csv(os.path.join(directory, "jobs.csv.gz"), gzip.open),
+            read_csv(os.path.join(self.tmpdir, "plain", "jobs.csv")),
+        )
+
+    # zstd compression needs the zstandard module
+    @mock.patch.dict("sys.modules", {"zstandard": None})
+    def test_04_zstd_not_installed(self):
+        with self.assertRaises(ValueError):
+            d.export_db_info(conn, self.tmpdir, compression="zstd")
+        with self.assertRaises(ValueError):
+            d.export_db_info(conn, self.tmpdir, compression="bzip2")
+
+    # only the associations and jobs which changed since a timestamp are exported
+    def test_05_since(self):
+        directory = os.path.join(self.tmpdir, "since")
+        d.export_db_info(conn, directory, since=200)
+        jobs = read_csv(os.path.join(directory, "jobs.csv"))
+        self.assertEqual([row[0] for row in jobs[1:]], ["2", "3", "4", "5"])
+        associations = read_csv(os.path.join(directory, "association_table.csv"))
+        self.assertEqual(len(associations), 2)
+        self.assertIn("user2", associations[1])
+        # tables which don't record when their rows change are exported in full
+        banks = read_csv(os.path.join(directory, "bank_table.csv"))
+        self.assertEqual(len(banks), 3)
+
+    # nothing can be committed to the DB while it is being exported
+    def test_06_consistent_snapshot(self):
+        # the tables are exported in other threads, which take turns writing
+        writer = sqlite3.connect(self.dbname, timeout=0, check_same_thread=False)
+        lock = threading.Lock()
+        export_table = d.export_table
+        errors = []
+
+        def write_during_export(*args, **kwargs):
+            with lock:
+                try:
+                    writer.execute("UPDATE bank_table SET shares=2 WHERE bank='A'")
+                    writer.commit()
+                except sqlite3.OperationalError as exc:
+                    writer.rollback()
+                    errors.append(exc)
+            return export_table(*args, **kwargs)
+
+        with mock.patch(
+            "fluxacct.accounting.db_info_subcommands.export_table",
+            side_effect=write_during_export,
+        ):
+            d.export_db_info(conn, os.path.join(self.tmpdir, "snapshot"), parallel=2)
+        writer.close()
+        self.assertTrue(errors)
+        self.assertIn("locked", str(errors[0]))
+        shares = conn.execute("SELECT shares FROM bank_table WHERE bank='A'")
+        self.assertEqual(shares.fetchone()[0], 1)
+
+    # remove database and exported files
+    @classmethod
+    def tearDownClass(self):
+        conn.close()
+        os.remove(self.dbname)
+        shutil.rmtree(self.tmpdir)
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
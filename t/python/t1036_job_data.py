@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import csv
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from fluxacct.accounting import create_db as c
+from fluxacct.accounting import db_info_subcommands as d
+from fluxacct.accounting import job_data
+from fluxacct.accounting import jobs_table_subcommands as j
+from fluxacct.accounting import job_usage_calculation as jobs
+
+R = json.dumps(
+    {
+        "version": 1,
+        "execution": {
+            "R_lite": [{"rank": "0", "children": {"core": "0-3"}}],
+            "starttime": 0,
+            "expiration": 0,
+            "nodelist": ["fluke0"],
+        },
+    }
+)
+
+
+def jobspec(bank):
+    return json.dumps({"attributes": {"system": {"bank": bank}}})
+
+
+def count_documents():
+    return conn.execute("SELECT COUNT(*) FROM job_data_table").fetchone()[0]
+
+
+class TestJobData(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.dbname = f"TestDB_{os.path.basename(__file__)[:5]}_{round(time.time())}.db"
+        c.create_db(self.dbname)
+        global conn
+
+        conn = sqlite3.connect(self.dbname, timeout=60)
+        # five jobs submitted together to bank A share a jobspec, and one job
+        # finished long ago in bank B
+        for jobid in range(1, 6):
+            conn.execute(
+                "INSERT INTO jobs (id, userid, t_submit, t_run, t_inactive, ranks, "
+                "R, jobspec, bank) VALUES (?, 5001, 0, ?, ?, '0', ?, ?, 'A')",
+                (jobid, time.time(), time.time() + 60, R, jobspec("A")),
+            )
+        conn.execute(
+            "INSERT INTO jobs (id, userid, t_submit, t_run, t_inactive, ranks, "
+            "R, jobspec, bank) VALUES (6, 5002, 0, 0, 100, '0', ?, ?, 'B')",
+            (R, jobspec("B")),
+        )
+        conn.commit()
+
+    # a document is stored once no matter how many jobs use it
+    def test_01_store_and_load(self):
+        cur = conn.cursor()
+        key = job_data.store(cur, R)
+        self.assertTrue(job_data.is_key(key))
+        self.assertEqual(job_data.store(cur, R), key)
+        self.assertEqual(job_data.store(cur, key), key)
+        self.assertEqual(count_documents(), 1)
+        self.assertEqual(job_data.load(cur, key), R)
+        self.assertEqual(job_data.load(cur, R), R)
+        with self.assertRaises(ValueError):
+            job_data.load(cur, job_data.KEY_PREFIX + "0" * 32)
+        conn.rollback()
+
+    # jobs are stored as text until their storage mode is changed
+    def test_02_default_storage_mode(self):
+        self.assertEqual(job_data.storage_mode(conn), job_data.TEXT)
+        self.assertFalse(job_data.has_documents(conn))
+        with self.assertRaises(ValueError):
+            job_data.convert_jobs(conn, "bzip2")
+
+    # converting the jobs compresses and deduplicates their R and jobspec
+    def test_03_convert_to_compressed(self):
+        progress = []
+        converted = job_data.convert_jobs(
+            conn, job_data.COMPRESSED, chunk_size=4, progress=progress.append
+        )
+        self.assertEqual(converted, 6)
+        self.assertEqual(progress, [4, 6])
+        self.assertEqual(job_data.storage_mode(conn), job_data.COMPRESSED)
+        # one R and two jobspecs
+        self.assertEqual(count_documents(), 3)
+        for R_key, jobspec_key in conn.execute("SELECT R, jobspec FROM jobs"):
+            self.assertTrue(job_data.is_key(R_key))
+            self.assertTrue(job_data.is_key(jobspec_key))
+
+        # converting the jobs again doesn't change them
+        self.assertEqual(job_data.convert_jobs(conn, job_data.COMPRESSED), 0)
+
+    # the accessors of the jobs table return R and jobspec as text
+    def test_04_read_compressed_jobs(self):
+        rows = j.get_jobs(conn, bank="A")
+        self.assertEqual(len(rows), 5)
+        self.assertEqual([row[6] for row in rows], [R] * 5)
+        self.assertEqual(len(j.filter_jobs_by_bank(rows, "A")), 5)
+        records = j.convert_to_obj(j.get_jobs(conn, jobid=6))
+        self.assertEqual(records[0].ncores, 4)
+        self.assertEqual(records[0].bank, "B")
+
+    # the jobs table is exported with R and jobspec as text
+    def test_05_export_compressed_jobs(self):
+        directory = tempfile.mkdtemp()
+        try:
+            d.export_db_info(conn, directory)
+            self.assertNotIn("job_data_table.csv", os.listdir(directory))
+            with open(os.path.join(directory, "jobs.csv"), newline="") as csv_file:
+                rows = list(csv.DictReader(csv_file))
+            self.assertEqual(len(rows), 6)
+            self.assertEqual({row["R"] for row in rows}, {R})
+            self.assertEqual(rows[5]["jobspec"], jobspec("B"))
+        finally:
+            shutil.rmtree(directory)
+
+    # the storage mode can only be set to one of the storage modes
+    def test_06_edit_storage_mode(self):
+        with self.assertRaises(ValueError):
+            d.edit_config(conn, ["job_storage=bzip2"])
+        d.edit_config(conn, ["job_storage=compressed"])
+
+    # scrubbing old jobs removes the documents only they used
+    def test_07_scrub_old_jobs(self):
+        jobs.scrub_old_jobs(conn, num_weeks=1)
+        self.assertEqual(
+            conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0],
+            5,
+        )
+        self.assertEqual(count_documents(), 2)
+
+    # converting the jobs back to text removes every document
+    def test_08_convert_to_text(self):
+        self.assertEqual(job_data.convert_jobs(conn, job_data.TEXT), 5)
+        self.assertEqual(count_documents(), 0)
+        self.assertEqual(
+            conn.execute("SELECT DISTINCT R, jobspec FROM jobs").fetchall(),
+            [(R, jobspec("A"))],
+        )
+
+    # remove database
+    @classmethod
+    def tearDownClass(self):
+        conn.close()
+        os.remove(self.dbname)
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
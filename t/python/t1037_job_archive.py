@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import calendar
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from unittest import mock
+
+from fluxacct.accounting import create_db as c
+from fluxacct.accounting import db_info_subcommands as d
+from fluxacct.accounting import job_archive
+from fluxacct.accounting import job_data
+from fluxacct.accounting import jobs_table_subcommands as j
+from fluxacct.accounting import job_usage_calculation as jobs
+
+R = json.dumps(
+    {
+        "version": 1,
+        "execution": {
+            "R_lite": [{"rank": "0-1", "children": {"core": "0-3"}}],
+            "starttime": 0,
+            "expiration": 0,
+            "nodelist": ["fluke[0-1]"],
+        },
+    }
+)
+JOBSPEC = json.dumps({"attributes": {"system": {"bank": "A"}}})
+
+# three jobs which finished in January and February of 2020, and one which just
+# finished
+T_INACTIVE = [
+    calendar.timegm((2020, 1, 15, 0, 0, 0)),
+    calendar.timegm((2020, 2, 10, 0, 0, 0)),
+    calendar.timegm((2020, 2, 20, 0, 0, 0)),
+    time.time(),
+]
+
+
+class TestJobArchive(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        # partitions are written next to the DB file
+        self.tmpdir = tempfile.mkdtemp()
+        self.dbname = os.path.join(self.tmpdir, "FluxAccounting.db")
+        c.create_db(self.dbname)
+        global conn
+
+        conn = sqlite3.connect(self.dbname, timeout=60)
+        for jobid, t_inactive in enumerate(T_INACTIVE, start=1):
+            conn.execute(
+                "INSERT INTO jobs (id, userid, t_submit, t_run, t_inactive, ranks, "
+                "R, jobspec, bank) VALUES (?, 5001, ?, ?, ?, '0-1', ?, ?, 'A')",
+                (jobid, t_inactive - 200, t_inactive - 100, t_inactive, R, JOBSPEC),
+            )
+        conn.commit()
+        job_data.convert_jobs(conn, job_data.COMPRESSED)
+
+    def partition(self, year, month):
+        return job_archive.partition_path(self.dbname, year, month)
+
+    # with no partitions, jobs are only read from the jobs table
+    def test_01_no_partitions(self):
+        self.assertEqual(job_archive.list_partitions(self.dbname), [])
+        self.assertEqual(job_archive.jobs_source(conn), "jobs")
+
+    # jobs are moved into one partition per month they finished in
+    def test_02_archive_old_jobs(self):
+        val = job_archive.archive_old_jobs(conn, 1)
+        self.assertEqual(val, "archived 3 job(s) into 2 partition(s)")
+        self.assertTrue(os.path.isfile(self.partition(2020, 1)))
+        self.assertTrue(os.path.isfile(self.partition(2020, 2)))
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0], 1)
+
+        # a partition holds R and jobspec as text
+        archive = sqlite3.connect(self.partition(2020, 2))
+        rows = archive.execute("SELECT id, R, jobspec FROM jobs ORDER BY id").fetchall()
+        archive.close()
+        self.assertEqual(rows, [("2", R, JOBSPEC), ("3", R, JOBSPEC)])
+
+        # the documents of the recent job are still in job_data_table
+        self.assertEqual(
+            conn.execute("SELECT COUNT(*) FROM job_data_table").fetchone()[0], 2
+        )
+
+    # only the partitions which could hold jobs in a time range are listed
+    def test_03_list_partitions(self):
+        self.assertEqual(
+            job_archive.list_partitions(self.dbname), [(2020, 1), (2020, 2)]
+        )
+        self.assertEqual(
+            job_archive.list_partitions(
+                self.dbname, start=calendar.timegm((2020, 2, 1, 0, 0, 0))
+            ),
+            [(2020, 2)],
+        )
+        self.assertEqual(
+            job_archive.list_partitions(
+                self.dbname, end=calendar.timegm((2020, 2, 1, 0, 0, 0))
+            ),
+            [(2020, 1)],
+        )
+        self.assertEqual(
+            job_archive.list_partitions(self.dbname, start=time.time() - 60), []
+        )
+
+    # archived jobs are still returned by the accessors of the jobs table
+    def test_04_view_archived_jobs(self):
+        rows = j.get_jobs(conn)
+        self.assertEqual(sorted(row[1] for row in rows), ["1", "2", "3", "4"])
+        self.assertEqual({row[6] for row in rows}, {R})
+
+        rows = j.get_jobs(
+            conn, after_start_time="2020-02-01", before_end_time="2020-03-01"
+        )
+        self.assertEqual([row[1] for row in rows], ["2", "3"])
+
+        # pages can be read across partitions
+        first = j.get_jobs(conn, sort="-t_inactive", limit=2)
+        self.assertEqual([row[1] for row in first], ["4", "3"])
+        rest = j.get_jobs(conn, sort="-t_inactive", limit=2, after_job=first[-1][1])
+        self.assertEqual([row[1] for row in rest], ["2", "1"])
+
+    # the usage report includes archived jobs
+    def test_05_usage_report(self):
+        report = jobs.view_usage_report(conn, start="2020-02-01", end="2020-03-01")
+        lines = report.splitlines()
+        self.assertTrue(lines[1].startswith("A:"))
+        # two jobs on two nodes for 100 seconds each
+        self.assertEqual(float(lines[1].split()[1]), 400.0)
+
+    # the job usage periods are rebuilt from archived jobs too
+    def test_06_rebin_archived_jobs(self):
+        conn.execute("INSERT INTO bank_table (bank, shares) VALUES ('A', 1)")
+        conn.commit()
+        now = calendar.timegm((2020, 3, 1, 0, 0, 0))
+        usage, _ = jobs.rebin_job_usage(conn.cursor(), 604800, 4, now)
+        # the archived jobs of February are decayed once and twice, the job in
+        # January is older than the oldest period, and the job which just finished
+        # counts towards period 0
+        self.assertEqual(usage[(5001, "A")], [200.0, 100.0, 50.0, 0.0])
+
+    # a query can span more partitions than can be attached at once
+    def test_07_many_partitions(self):
+        for month in range(1, 13):
+            t_inactive = calendar.timegm((2019, month, 15, 0, 0, 0))
+            conn.execute(
+                "INSERT INTO jobs (id, userid, t_submit, t_run, t_inactive, ranks, "
+                "R, jobspec, bank) VALUES (?, 5001, ?, ?, ?, '0-1', ?, ?, 'A')",
+                (
+                    100 + month,
+                    t_inactive - 200,
+                    t_inactive - 100,
+                    t_inactive,
+                    R,
+                    JOBSPEC,
+                ),
+            )
+        conn.commit()
+        job_archive.archive_old_jobs(conn, 1)
+        self.assertEqual(len(job_archive.list_partitions(self.dbname)), 14)
+
+        rows = j.get_jobs(conn)
+        self.assertEqual(len(rows), 16)
+        self.assertEqual({row[6] for row in rows}, {R})
+        self.assertEqual(len(j.get_jobs(conn, bank="A")), 16)
+        self.assertIn("104", j.view_jobs(conn, None, jobid_format="dec", bank="A"))
+
+        # pages can be read across batches of partitions
+        first = j.get_jobs(conn, sort="t_inactive", limit=2)
+        self.assertEqual([row[1] for row in first], ["101", "102"])
+        rest = j.get_jobs(conn, sort="t_inactive", limit=2, after_job=first[-1][1])
+        self.assertEqual([row[1] for row in rest], ["103", "104"])
+
+    # archiving jobs again doesn't move anything
+    def test_08_archive_again(self):
+        val = job_archive.archive_old_jobs(conn, 1)
+        self.assertEqual(val, "archived 0 job(s) into 0 partition(s)")
+        self.assertEqual(job_archive.attached_partitions(conn), [])
+
+    # the most recent job is still known once the jobs table has been emptied, so
+    # fetch-job-records doesn't fetch it again
+    def test_09_last_job_timestamp(self):
+        self.assertEqual(job_archive.last_job_timestamp(conn), T_INACTIVE[3])
+        job_archive.archive_old_jobs(conn, 0)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0], 0)
+        self.assertEqual(job_archive.last_job_timestamp(conn), T_INACTIVE[3])
+
+    # jobs can only be archived from a DB file
+    def test_10_in_memory_db(self):
+        memory_conn = sqlite3.connect(":memory:")
+        with self.assertRaises(ValueError):
+            job_archive.archive_old_jobs(memory_conn)
+        memory_conn.close()
+
+    # the configuration is put back if the usage bins can't be rebuilt after the
+    # new configuration was committed to attach the archived jobs
+    def test_11_edit_config_rolled_back(self):
+        query = "SELECT value FROM config_table WHERE key='priority_decay_half_life'"
+        half_life = conn.execute(query).fetchone()[0]
+        with mock.patch.object(
+            jobs, "rebin_job_usage", side_effect=sqlite3.OperationalError("failed")
+        ):
+            with self.assertRaises(RuntimeError):
+                d.edit_config(conn, ["priority_decay_half_life=14d"])
+        self.assertFalse(conn.in_transaction)
+        self.assertEqual(conn.execute(query).fetchone()[0], half_life)
+
+    # remove database and partitions
+    @classmethod
+    def tearDownClass(self):
+        conn.close()
+        shutil.rmtree(self.tmpdir)
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import importlib.util
+import json
+import os
+import sqlite3
+import time
+
+from fluxacct.accounting import create_db as c
+
+FETCH_JOB_RECORDS = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..",
+    "..",
+    "src",
+    "cmd",
+    "flux-account-fetch-job-records.py",
+)
+spec = importlib.util.spec_from_file_location("fetch_job_records", FETCH_JOB_RECORDS)
+fetch_job_records = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(fetch_job_records)
+
+R = '{"version": 1, "execution": {"R_lite": []}}'
+
+
+def jobspec(bank, project):
+    return json.dumps(
+        {"attributes": {"system": {"bank": bank, "project": project, "duration": 60}}}
+    )
+
+
+class FailingCursor:
+    """A Cursor which fails after returning a number of batches."""
+
+    def __init__(self, cur, batches):
+        self.cur = cur
+        self.batches = batches
+
+    def execute(self, *args):
+        return self.cur.execute(*args)
+
+    def fetchmany(self, size):
+        if self.batches == 0:
+            raise sqlite3.OperationalError("disk I/O error")
+        self.batches -= 1
+        return self.cur.fetchmany(size)
+
+
+class TestCopyJobArchive(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.dbname = f"TestDB_{os.path.basename(__file__)[:5]}_{round(time.time())}.db"
+        self.archive = f"TestArchive_{os.path.basename(__file__)[:5]}.db"
+        c.create_db(self.dbname)
+        global conn
+        global archive_conn
+
+        conn = sqlite3.connect(self.dbname, timeout=60)
+        # the jobs table of a job-archive DB; job 5 never ran and job 7 has a
+        # jobspec that can't be decoded
+        archive_conn = sqlite3.connect(self.archive)
+        archive_conn.execute("""
+            CREATE TABLE jobs (
+                id int PRIMARY KEY, userid int, t_submit real, t_run real,
+                t_inactive real, ranks text, R text, jobspec text
+            )""")
+        for jobid in range(1, 26):
+            archive_conn.execute(
+                "INSERT INTO jobs VALUES (?, 5001, 0, 100, 150, '0', ?, ?)",
+                (
+                    jobid,
+                    "" if jobid == 5 else R,
+                    "{" if jobid == 7 else jobspec("A", "P1"),
+                ),
+            )
+        archive_conn.commit()
+
+    def setUp(self):
+        conn.execute("DELETE FROM jobs")
+        conn.execute(
+            "DELETE FROM config_table WHERE key=?", (fetch_job_records.COPY_CHECKPOINT,)
+        )
+        conn.commit()
+
+    def copy(self, old_cur=None, source=None, **kwargs):
+        with self.assertLogs(fetch_job_records.LOGGER, "INFO") as logs:
+            copied = fetch_job_records.copy_db_contents(
+                old_cur or archive_conn.cursor(),
+                conn.cursor(),
+                conn,
+                source or self.archive,
+                **kwargs,
+            )
+        return copied, logs.output
+
+    def job_ids(self):
+        return sorted(int(row[0]) for row in conn.execute("SELECT id FROM jobs"))
+
+    # jobs are copied a batch at a time, and the progress of the copy is logged
+    def test_01_copy(self):
+        copied, logs = self.copy(batch_size=10)
+        self.assertEqual(copied, 24)
+        self.assertEqual(self.job_ids(), [i for i in range(1, 26) if i != 5])
+        self.assertEqual(len(logs), 3)
+        self.assertIn("copied 24 job(s)", logs[-1])
+        self.assertIn("jobs/sec", logs[-1])
+        # the checkpoint is removed once the copy is done
+        self.assertIsNone(fetch_job_records.get_copy_checkpoint(conn, self.archive))
+        # the other columns are only filled in when asked for
+        row = conn.execute("SELECT bank, project FROM jobs WHERE id='1'").fetchone()
+        self.assertEqual(row, (None, None))
+
+    # the bank, project, and duration columns can be filled in from the jobspec
+    def test_02_fill_columns(self):
+        self.copy(fill_columns=True)
+        row = conn.execute(
+            "SELECT bank, project, requested_duration, actual_duration FROM jobs "
+            "WHERE id='1'"
+        ).fetchone()
+        self.assertEqual(row, ("A", "P1", 60, 50))
+        row = conn.execute("SELECT bank, project FROM jobs WHERE id='7'").fetchone()
+        self.assertEqual(row, ("", ""))
+
+    # a copy which fails keeps the jobs and checkpoint of the batches it finished
+    def test_03_resume_interrupted_copy(self):
+        old_cur = FailingCursor(archive_conn.cursor(), batches=2)
+        with self.assertRaises(sqlite3.OperationalError):
+            self.copy(old_cur, batch_size=10)
+        self.assertEqual(self.job_ids(), [i for i in range(1, 21) if i != 5])
+        self.assertEqual(fetch_job_records.get_copy_checkpoint(conn, self.archive), 20)
+
+        # the next copy only reads the jobs after the checkpoint
+        copied, logs = self.copy(batch_size=10)
+        self.assertEqual(copied, 5)
+        self.assertIn("resuming copy", logs[0])
+        self.assertEqual(len(self.job_ids()), 24)
+
+    # a checkpoint of a copy from a different job-archive DB is ignored
+    def test_04_checkpoint_of_other_source(self):
+        old_cur = FailingCursor(archive_conn.cursor(), batches=1)
+        with self.assertRaises(sqlite3.OperationalError):
+            self.copy(old_cur, source="/other/job-archive.db", batch_size=10)
+        self.assertIsNone(fetch_job_records.get_copy_checkpoint(conn, self.archive))
+        copied, _ = self.copy()
+        self.assertEqual(copied, 24)
+
+    # remove databases
+    @classmethod
+    def tearDownClass(self):
+        conn.close()
+        archive_conn.close()
+        os.remove(self.dbname)
+        os.remove(self.archive)
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
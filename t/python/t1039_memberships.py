@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import json
+import os
+import sqlite3
+import time
+
+from fluxacct.accounting import create_db as c
+from fluxacct.accounting import bank_subcommands as b
+from fluxacct.accounting import memberships
+from fluxacct.accounting import project_subcommands as p
+from fluxacct.accounting import queue_subcommands as q
+from fluxacct.accounting import user_subcommands as u
+
+
+def queues_of(username, bank):
+    return sorted(
+        row[0]
+        for row in conn.execute(
+            "SELECT queue FROM association_queue_table WHERE username=? AND bank=?",
+            (username, bank),
+        )
+    )
+
+
+def projects_of(username, bank):
+    return sorted(
+        row[0]
+        for row in conn.execute(
+            "SELECT project FROM association_project_table "
+            "WHERE username=? AND bank=?",
+            (username, bank),
+        )
+    )
+
+
+def list_usernames(**kwargs):
+    users = json.loads(u.list_users(conn, json_fmt=True, **kwargs))
+    return sorted(f"{user['username']}:{user['bank']}" for user in users)
+
+
+class TestMemberships(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.dbname = f"TestDB_{os.path.basename(__file__)[:5]}_{round(time.time())}.db"
+        c.create_db(self.dbname)
+        global conn
+
+        conn = sqlite3.connect(self.dbname, timeout=60)
+        conn.row_factory = sqlite3.Row
+        b.add_bank(conn, bank="root", shares=1)
+        b.add_bank(conn, bank="A", parent_bank="root", shares=1)
+        b.add_bank(conn, bank="B", parent_bank="root", shares=1)
+        for queue in ("bronze", "silver", "gold", "gold2"):
+            q.add_queue(conn, queue=queue)
+        for project in ("P1", "P10"):
+            p.add_project(conn, project=project)
+
+    # the queues and projects of a new association are added to the membership
+    # tables
+    def test_01_add_user(self):
+        u.add_user(conn, username="user1", bank="A", uid=5001, queues="bronze,silver")
+        u.add_user(conn, username="user2", bank="A", uid=5002, queues="gold2")
+        u.add_user(conn, username="user2", bank="B", uid=5002, projects="P10")
+        self.assertEqual(queues_of("user1", "A"), ["bronze", "silver"])
+        self.assertEqual(projects_of("user1", "A"), ["*"])
+        self.assertEqual(projects_of("user2", "B"), ["*", "P10"])
+
+    # editing the queues or projects of an association updates its memberships
+    def test_02_edit_user(self):
+        u.edit_user(conn, username="user1", bank="A", queues="gold")
+        self.assertEqual(queues_of("user1", "A"), ["gold"])
+        u.edit_user(conn, username="user1", bank="A", add_queue="bronze")
+        self.assertEqual(queues_of("user1", "A"), ["bronze", "gold"])
+        u.edit_user(conn, username="user1", bank="A", delete_queue="gold")
+        self.assertEqual(queues_of("user1", "A"), ["bronze"])
+        u.edit_user(conn, username="user2", bank="B", projects="-1")
+        self.assertEqual(projects_of("user2", "B"), ["*"])
+        u.edit_user(conn, username="user2", bank="B", projects="P1,P10")
+        self.assertEqual(projects_of("user2", "B"), ["*", "P1", "P10"])
+
+    # the queues and projects are still shown as comma-separated lists
+    def test_03_output_format(self):
+        row = conn.execute(
+            "SELECT queues, projects FROM association_table "
+            "WHERE username='user2' AND bank='B'"
+        ).fetchone()
+        self.assertEqual(tuple(row), ("", "P1,P10,*"))
+
+    # associations are filtered by exact queue or project names
+    def test_04_list_users(self):
+        # no association has "gold" as a queue, only "gold2"
+        with self.assertRaises(ValueError):
+            list_usernames(queues="gold")
+        self.assertEqual(list_usernames(queues="gold2"), ["user2:A"])
+        self.assertEqual(list_usernames(queues="bronze,gold2"), ["user1:A", "user2:A"])
+        self.assertEqual(list_usernames(projects="P1"), ["user2:B"])
+        with self.assertRaises(ValueError):
+            list_usernames(projects="P1", bank="A")
+
+    # deleting a queue only warns about the associations which have it
+    def test_05_delete_queue(self):
+        self.assertEqual(q.delete_queue(conn, queue="gold"), 0)
+        self.assertIn("WARNING", q.delete_queue(conn, queue="gold2"))
+        self.assertIn("WARNING", p.delete_project(conn, project="P10"))
+
+    # removing an association removes its memberships
+    def test_06_delete_user(self):
+        u.delete_user(conn, username="user2", bank="B", force=True)
+        self.assertEqual(projects_of("user2", "B"), [])
+
+    # the membership tables can be rebuilt from association_table
+    def test_07_populate(self):
+        expected = conn.execute(
+            "SELECT * FROM association_queue_table ORDER BY 1, 2, 3"
+        ).fetchall()
+        conn.execute("DELETE FROM association_queue_table")
+        memberships.populate(conn.cursor())
+        self.assertEqual(
+            conn.execute(
+                "SELECT * FROM association_queue_table ORDER BY 1, 2, 3"
+            ).fetchall(),
+            expected,
+        )
+        conn.rollback()
+
+    # looking up the associations of a queue uses its index
+    def test_08_indexed_lookup(self):
+        clause, params = memberships.filter_sql("queues", ["bronze"])
+        plan = " ".join(
+            row[-1]
+            for row in conn.execute(
+                f"EXPLAIN QUERY PLAN SELECT * FROM association_table WHERE {clause}",
+                params,
+            )
+        )
+        self.assertIn("association_queue_table_queue_idx", plan)
+
+    # remove database
+    @classmethod
+    def tearDownClass(self):
+        conn.close()
+        os.remove(self.dbname)
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+###############################################################
+# Copyright 2026 Lawrence Livermore National Security, LLC
+# (c.f. AUTHORS, NOTICE.LLNS, COPYING)
+#
+# This file is part of the Flux resource manager framework.
+# For details, see https://github.com/flux-framework.
+#
+# SPDX-License-Identifier: LGPL-3.0
+###############################################################
+import unittest
+import json
+import os
+import sqlite3
+import time
+
+from fluxacct.accounting import create_db as c
+from fluxacct.accounting import bank_subcommands as b
+from fluxacct.accounting import job_usage_calculation as j
+from fluxacct.accounting import user_subcommands as u
+
+
+def usage_rows(assoc_id):
+    factor_rows = conn.execute(
+        "SELECT * FROM job_usage_factor_table WHERE assoc_id=?", (assoc_id,)
+    ).fetchall()
+    period_rows = conn.execute(
+        "SELECT * FROM job_usage_per_association_table WHERE assoc_id=?", (assoc_id,)
+    ).fetchall()
+    return len(factor_rows), len(period_rows)
+
+
+class TestAssocID(unittest.TestCase):
+    @classmethod
+    def setUpClass(self):
+        self.dbname = f"TestDB_{os.path.basename(__file__)[:5]}_{round(time.time())}.db"
+        c.create_db(self.dbname)
+        global conn
+
+        conn = sqlite3.connect(self.dbname, timeout=60)
+        conn.row_factory = sqlite3.Row
+        b.add_bank(conn, bank="root", shares=1)
+        b.add_bank(conn, bank="A", parent_bank="root", shares=1)
+        b.add_bank(conn, bank="B", parent_bank="root", shares=1)
+
+    # every new association is given the next assoc_id
+    def test_01_assign_assoc_id(self):
+        u.add_user(conn, username="user1", bank="A", uid=5001)
+        u.add_user(conn, username="user1", bank="B", uid=5001)
+        u.add_user(conn, username="user2", bank="A", uid=5002)
+        self.assertEqual(j.get_assoc_id(conn.cursor(), "user1", "A"), 1)
+        self.assertEqual(j.get_assoc_id(conn.cursor(), "user1", "B"), 2)
+        self.assertEqual(j.get_assoc_id(conn.cursor(), "user2", "A"), 3)
+
+    # looking up the assoc_id of an association that does not exist raises
+    def test_02_assoc_id_not_found(self):
+        with self.assertRaises(ValueError):
+            j.get_assoc_id(conn.cursor(), "user2", "B")
+
+    # the usage rows of a new association are keyed by its assoc_id
+    def test_03_usage_rows(self):
+        self.assertEqual(usage_rows(2), (1, 4))
+        row = conn.execute(
+            "SELECT userid FROM job_usage_factor_table WHERE assoc_id=2"
+        ).fetchone()
+        self.assertEqual(row["userid"], 5001)
+
+    # the job usage breakdown of an association still shows its username and bank
+    def test_04_view_user_job_usage(self):
+        result = json.loads(u.view_user(conn, user="user2", job_usage=True))
+        self.assertEqual(len(result), 4)
+        self.assertEqual(result[0]["username"], "user2")
+        self.assertEqual(result[0]["bank"], "A")
+
+    # disabling an association keeps its usage, removing it does not
+    def test_05_delete_user(self):
+        u.delete_user(conn, username="user1", bank="B")
+        self.assertEqual(usage_rows(2), (1, 4))
+        u.delete_user(conn, username="user1", bank="B", force=True)
+        self.assertEqual(usage_rows(2), (0, 0))
+
+    # an assoc_id handed out again does not pick up the usage of the association
+    # that had it before
+    def test_06_reuse_assoc_id(self):
+        conn.execute(
+            "UPDATE job_usage_per_association_table SET value=10 WHERE assoc_id=3"
+        )
+        conn.commit()
+        u.delete_user(conn, username="user2", bank="A", force=True)
+        u.add_user(conn, username="user3", bank="A", uid=5003)
+        u.add_user(conn, username="user4", bank="A", uid=5004)
+        self.assertEqual(j.get_assoc_id(conn.cursor(), "user4", "A"), 3)
+        values = conn.execute(
+            "SELECT value FROM job_usage_per_association_table WHERE assoc_id=3"
+        ).fetchall()
+        self.assertEqual([row["value"] for row in values], [0.0] * 4)
+
+    # remove database
+    @classmethod
+    def tearDownClass(self):
+        conn.close()
+        os.remove(self.dbname)
+
+
+def suite():
+    suite = unittest.TestSuite()
+
+    return suite
+
+
+if __name__ == "__main__":
+    from pycotap import TAPTestRunner
+
+    unittest.main(testRunner=TAPTestRunner())
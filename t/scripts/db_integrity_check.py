@@ -24,7 +24,10 @@ def main():
 
     # check if migration succeeded: every association in job_usage_factor_table
     # should have entries in job_usage_per_association_table
-    cur.execute("SELECT username, bank FROM job_usage_factor_table")
+    cur.execute("""
+        SELECT j.assoc_id, a.username, a.bank FROM job_usage_factor_table j
+        LEFT JOIN association_table a ON j.assoc_id = a.assoc_id
+        """)
     usage_factor_users = cur.fetchall()
 
     # check if legacy usage columns exist to determine expected period count
@@ -35,10 +38,10 @@ def main():
     ]
     expected_periods = len(bin_columns) if bin_columns else 0
 
-    for username, bank in usage_factor_users:
+    for assoc_id, username, bank in usage_factor_users:
         cur.execute(
-            "SELECT COUNT(*) FROM job_usage_per_association_table WHERE username=? AND bank=?",
-            (username, bank),
+            "SELECT COUNT(*) FROM job_usage_per_association_table WHERE assoc_id=?",
+            (assoc_id,),
         )
         count = cur.fetchone()[0]
         if count == 0:
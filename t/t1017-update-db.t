@@ -79,11 +79,14 @@ test_expect_success 'get all the tables of the old DB and check that new table w
 	cat <<-EOF | sort >tables.expected
 	sqlite_sequence
 	association_table
+	association_queue_table
+	association_project_table
 	bank_table
 	job_usage_factor_table
 	t_half_life_period_table
 	project_table
 	jobs
+	job_data_table
 	priority_factor_weight_table
 	config_table
 	job_usage_per_association_table
@@ -117,6 +120,7 @@ test_expect_success 'get all the columns of the updated table in the DB and chec
 	max_sched_jobs
 	organization
 	yrs_experience
+	assoc_id
 	EOF
 	test_cmp association_table_columns.expected association_table_columns.test
 '
@@ -23,7 +23,8 @@ def update_userid(dbpath, username, userid):
 	try:
 		conn = sqlite3.connect(dbpath)
 		cursor = conn.cursor()
-		query = "UPDATE job_usage_factor_table SET userid=? WHERE username=?"
+		query = "UPDATE job_usage_factor_table SET userid=? WHERE assoc_id IN " \
+			"(SELECT assoc_id FROM association_table WHERE username=?)"
 		cursor.execute(query, (userid, username))
 		conn.commit()
 		conn.close()
@@ -37,7 +38,8 @@ def get_userid(dbpath, username):
 	try:
 		conn = sqlite3.connect(dbpath)
 		cursor = conn.cursor()
-		query = "SELECT userid FROM job_usage_factor_table WHERE username=?"
+		query = "SELECT userid FROM job_usage_factor_table WHERE assoc_id IN " \
+			"(SELECT assoc_id FROM association_table WHERE username=?)"
 		cursor.execute(query, (username,))
 		result = cursor.fetchone()
 		conn.close()
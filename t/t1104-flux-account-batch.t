@@ -0,0 +1,87 @@
+#!/bin/bash
+
+test_description='test running a file of flux account commands with batch'
+
+. `dirname $0`/sharness.sh
+FLUX_ACCOUNTING_DB=$(pwd)/FluxAccountingTest.db
+
+export TEST_UNDER_FLUX_NO_JOB_EXEC=y
+export TEST_UNDER_FLUX_SCHED_SIMPLE_MODE="limited=1"
+test_under_flux 1 job -Slog-stderr-level=1
+
+test_expect_success 'create flux-accounting DB' '
+	flux account -p ${FLUX_ACCOUNTING_DB} create-db
+'
+
+test_expect_success 'start flux-accounting service' '
+	flux account-service -p ${FLUX_ACCOUNTING_DB} -t
+'
+
+test_expect_success 'run a batch of command lines and JSON objects' '
+	cat <<-EOF >batch1.txt &&
+	# banks
+	flux account add-bank root 1
+	add-bank --parent-bank=root A 1
+
+	{"command": "add-user", "username": "user1", "userid": 5001, "bank": "A"}
+	add-user --username=user2 --userid=5002 --bank=A --shares=10
+	edit-user user1 --max-running-jobs=9
+	EOF
+	flux account batch batch1.txt &&
+	flux account view-user user1 > user1.out &&
+	grep "\"max_running_jobs\": 9" user1.out &&
+	flux account view-user user2 > user2.out &&
+	grep "\"shares\": 10" user2.out
+'
+
+test_expect_success 'commands can be read from stdin' '
+	echo "add-queue bronze" | flux account batch - &&
+	flux account view-queue bronze
+'
+
+test_expect_success 'every line is checked before any command is sent' '
+	cat <<-EOF >batch2.txt &&
+	add-bank --parent-bank=root B 1
+	view-user user1
+	EOF
+	test_must_fail flux account batch batch2.txt > not_batchable.err 2>&1 &&
+	grep "batch2.txt:2: .view-user. cannot be run in a batch" not_batchable.err &&
+	test_must_fail flux account view-bank B
+'
+
+test_expect_success 'a batch stops at the first command that fails' '
+	cat <<-EOF >batch3.txt &&
+	add-user --username=user3 --userid=5003 --bank=foo
+	add-user --username=user4 --userid=5004 --bank=A
+	EOF
+	test_must_fail flux account batch --window=1 batch3.txt > stop.err 2>&1 &&
+	grep "batch3.txt:1: " stop.err &&
+	test_must_fail flux account view-user user4
+'
+
+test_expect_success 'nothing in a failed transaction is kept' '
+	cat <<-EOF >batch4.txt &&
+	add-bank --parent-bank=root C 1
+	add-user --username=user5 --userid=5005 --bank=C
+	add-user --username=user1 --userid=5001 --bank=A
+	EOF
+	test_must_fail flux account batch --transaction batch4.txt > atomic.err 2>&1 &&
+	grep "batch4.txt:3: add-user: IntegrityError" atomic.err &&
+	grep "no changes were made" atomic.err &&
+	test_must_fail flux account view-bank C &&
+	test_must_fail flux account view-user user5
+'
+
+test_expect_success 'a transaction can keep the commands that succeed' '
+	test_must_fail flux account batch --transaction --continue-on-error \
+		batch4.txt > continue.err 2>&1 &&
+	grep "batch4.txt:3: add-user: IntegrityError" continue.err &&
+	flux account view-bank C &&
+	flux account view-user user5
+'
+
+test_expect_success 'shut down flux-accounting service' '
+	flux python -c "import flux; flux.Flux().rpc(\"accounting.shutdown_service\").get()"
+'
+
+test_done
@@ -0,0 +1,80 @@
+#!/bin/bash
+
+test_description='test moving old job records into monthly archive databases'
+
+. `dirname $0`/sharness.sh
+DB_PATH=$(pwd)/FluxAccountingTest.db
+QUERYCMD="flux python ${SHARNESS_TEST_SRCDIR}/scripts/query.py"
+INSERT_JOBS="flux python ${SHARNESS_TEST_SRCDIR}/scripts/insert_jobs.py"
+
+export TEST_UNDER_FLUX_NO_JOB_EXEC=y
+export TEST_UNDER_FLUX_SCHED_SIMPLE_MODE="limited=1"
+test_under_flux 1 job -Slog-stderr-level=1
+
+# get the number of job records in the jobs table of a database
+# arg1 - database path
+get_job_records() {
+		local dbpath=$1
+		query="select count(*) from jobs;"
+
+		${QUERYCMD} -t 100 ${dbpath} "${query}" | awk -F' = ' '{print $2}'
+}
+
+test_expect_success 'create flux-accounting DB' '
+	flux account -p ${DB_PATH} create-db
+'
+
+test_expect_success 'start flux-accounting service' '
+	flux account-service -p ${DB_PATH} -t
+'
+
+# insert_jobs.py inserts four job records into the jobs table: one which just
+# finished, two which finished just over two weeks ago, and one which finished
+# over six months ago
+test_expect_success 'populate DB with four job records' '
+	${INSERT_JOBS} ${DB_PATH} &&
+	test $(get_job_records ${DB_PATH}) -eq 4
+'
+
+test_expect_success 'archive-old-jobs moves the oldest job into a partition' '
+	flux account archive-old-jobs > archive.out &&
+	grep "archived 1 job(s) into 1 partition(s)" archive.out &&
+	test $(get_job_records ${DB_PATH}) -eq 3 &&
+	ls FluxAccountingTest-jobs-*.db > partitions.out &&
+	test $(wc -l < partitions.out) -eq 1 &&
+	test $(get_job_records $(cat partitions.out)) -eq 1
+'
+
+test_expect_success 'view-job-records still lists the archived job' '
+	flux account view-job-records -o "{userid}" > jobs.out &&
+	test $(grep -c 9999 jobs.out) -eq 4
+'
+
+test_expect_success 'archive-old-jobs moves the jobs older than NUM_WEEKS' '
+	flux account archive-old-jobs 2 > archive.out &&
+	grep "archived 2 job(s)" archive.out &&
+	test $(get_job_records ${DB_PATH}) -eq 1 &&
+	flux account view-job-records -o "{userid}" > jobs.out &&
+	test $(grep -c 9999 jobs.out) -eq 4
+'
+
+test_expect_success 'archiving the same jobs again does nothing' '
+	flux account archive-old-jobs 2 > archive.out &&
+	grep "archived 0 job(s)" archive.out
+'
+
+test_expect_success 'a job which finished after the time range is not read' '
+	flux account view-job-records -o "{userid}" \
+		--before-end-time="$(date -d "-1 day" +%Y-%m-%d)" > old_jobs.out &&
+	test $(grep -c 9999 old_jobs.out) -eq 3
+'
+
+test_expect_success 'remove flux-accounting DB and partitions' '
+	rm ${DB_PATH} FluxAccountingTest-jobs-*.db
+'
+
+test_expect_success 'shut down flux-accounting service' '
+	flux python -c "import flux; flux.Flux().rpc(\"accounting.shutdown_service\").get()"
+'
+
+test_done